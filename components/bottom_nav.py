@@ -1,6 +1,19 @@
+import logging
+import time
+from typing import Dict, Optional
+
 from appium.webdriver.common.appiumby import AppiumBy as By
+from selenium.common.exceptions import WebDriverException
+
+from core.contexts import NATIVE
+from core.polling import Poller
+from core.strategy_cache import StrategyCache
+from core.ui_snapshot import Bounds, UiNode, UiSnapshot
 from screens.base_screen import BaseScreen
 
+logger = logging.getLogger(__name__)
+
+
 class BottomNav(BaseScreen):
     def __init__(self, driver, timeout=10):
         super().__init__(driver, timeout)   # берем self.w из BaseScreen
@@ -11,6 +24,18 @@ class BottomNav(BaseScreen):
     TAB_CART     = (By.ACCESSIBILITY_ID, "Корзина")
     TAB_MORE     = (By.ACCESSIBILITY_ID, "Еще")
 
+    # подписи вкладок для поиска в снимке иерархии (text или content-desc)
+    TABS = {
+        "Главная": ("Главная", "Home"),
+        "Каталог": ("Каталог", "Catalog"),
+        "QR": ("QR", "Код", "Scanner"),
+        "Корзина": ("Корзина", "Cart"),
+        "Еще": ("Ещё", "Еще", "More"),
+    }
+    # панель ищем только в нижней части экрана
+    BAR_ZONE = 0.75
+    VERIFY_TIMEOUT = 2
+
     def find_tab_by_text(self, text: str):
         self.find_by_text_instant(text)
 
@@ -33,32 +58,156 @@ class BottomNav(BaseScreen):
     }
 
     def open(self, name: str, timeout: int | None = None):
-        """Открыть вкладку по человекочитаемому имени."""
-        locator = getattr(self, f"TAB_{name.upper()}", None)
+        """
+        Открыть вкладку по человекочитаемому имени.
 
-        # 1) основной путь — accessibility id
-        if locator:
-            element = self.waits.clickable(*locator, timeout=timeout)
-            if element:
-                element.click()
-                return
+        Быстрый путь: bounds всех вкладок снимаются одним снимком иерархии при первом
+        вызове и хранятся в сессии по ориентации; дальше — один тап по координатам и
+        проверка по снимку, что вкладка выбрана. Если проверка не прошла, кэш
+        сбрасывается и работают стратегии ниже.
 
-        # 2) фолбэк: заранее заданная стратегия из словаря
-        if self._click_from_map(name):
+        Порядок стратегий по умолчанию: accessibility id → словарь фолбэков → текст по платформе
+        → TextFinder. Стратегия, сработавшая для вкладки в прошлый раз (в т.ч. в прошлом
+        прогоне), пробуется первой — промах accessibility id не стоит полного таймаута.
+        """
+        start = time.monotonic()
+        bounds = self._tab_bounds(name)
+        if bounds and self._tap_and_verify(name, bounds):
+            logger.info(f"Вкладка {name!r} открыта тапом по координатам за {time.monotonic() - start:.2f}s")
             return
+        if bounds:
+            self.session.nav_bounds.pop(self.session.orientation, None)
 
-        # 3) фолбэк по платформе: текст/descriptionContains (Android) или predicate (iOS)
-        if self._click_by_text_platform(name):
-            return
+        strategies = {
+            # 1) основной путь — accessibility id
+            "accessibility_id": lambda: self._click_by_accessibility_id(name, timeout),
+            # 2) фолбэк: заранее заданная стратегия из словаря
+            "fallback_map": lambda: self._click_from_map(name),
+            # 3) фолбэк по платформе: текст/descriptionContains (Android) или predicate (iOS)
+            "platform_text": lambda: self._click_by_text_platform(name),
+            # 4) последний шанс: TextFinder на экране/базе
+            "textfinder": lambda: self._click_via_textfinder(name, timeout),
+        }
+        cache = self.text.strategies
+        key = StrategyCache.key(self.driver, type(self).__name__, name)
 
-        # 4) последний шанс: если есть TextFinder на экране/базе
-        if self._click_via_textfinder(name, timeout):
-            return
+        for strategy in cache.order(key, list(strategies)):
+            start = time.monotonic()
+            if strategies[strategy]():
+                cache.record(key, strategy, time.monotonic() - start)
+                return
 
         raise AssertionError(f"Не нашли вкладку: {name!r} ни по accessibility id, ни по фолбэкам")
 
+    # ---------- координаты вкладок ----------
+
+    def _tab_bounds(self, name: str) -> Optional[Bounds]:
+        cached = self.session.nav_bounds.get(self.session.orientation)
+        if cached is None:
+            cached = self._resolve_tabs()
+            if cached:
+                self.session.nav_bounds[self.session.orientation] = cached
+        return (cached or {}).get(name)
+
+    def _resolve_tabs(self) -> Dict[str, Bounds]:
+        """Все вкладки за один проход по иерархии: вкладка → bounds кликабельного узла."""
+        try:
+            with self.session.contexts.within(NATIVE):
+                snap = UiSnapshot.capture(self.driver)
+        except WebDriverException as e:
+            logger.warning(f"Снимок для панели навигации недоступен: {e}")
+            return {}
+
+        tabs: Dict[str, Bounds] = {}
+        for name in self.TABS:
+            node = self._tab_node(snap, name)
+            if node:
+                tabs[name] = snap.clickable_ancestor(node).bounds
+        logger.info(f"Панель навигации: найдено {len(tabs)}/{len(self.TABS)} вкладок")
+        return tabs
+
+    def _tab_node(self, snap: UiSnapshot, name: str) -> Optional[UiNode]:
+        return self._tab_node_in(snap, name, self.session.window_size().get("height", 0))
+
+    @classmethod
+    def _tab_node_in(cls, snap: UiSnapshot, name: str, height: int) -> Optional[UiNode]:
+        zone = height * cls.BAR_ZONE
+        candidates = [
+            n for alias in cls.TABS.get(name, (name,))
+            for n in snap.find_text(alias)
+            if n.has_area and n.bounds[1] >= zone
+        ]
+        # подпись самой панели — самая нижняя из совпавших
+        return max(candidates, key=lambda n: n.bounds[1], default=None)
+
+    def _tap_and_verify(self, name: str, bounds: Bounds) -> bool:
+        """
+        Тап по центру bounds и дешёвая проверка по снимку: вкладка на том же месте
+        и помечена selected. Если selected панель не отдаёт вовсе — достаточно,
+        что вкладка на месте.
+        """
+        l, t, r, b = bounds
+        try:
+            self.session.tap((l + r) // 2, (t + b) // 2)
+        except WebDriverException as e:
+            logger.warning(f"Тап по вкладке {name!r} не удался: {e}")
+            return False
+
+        poller = Poller(self.VERIFY_TIMEOUT, self.waits.policy)
+        for _ in poller:
+            try:
+                snap = UiSnapshot.capture(self.driver)
+            except WebDriverException:
+                continue
+            self.session.note_package(snap.package)
+            node = self._tab_node(snap, name)
+            if node is None or snap.clickable_ancestor(node).bounds != bounds:
+                continue
+            if self._is_selected(snap, node) or not self._bar_reports_selection(snap):
+                poller.stats(True, f"bottom_nav {name}")
+                return True
+        poller.stats(False, f"bottom_nav {name}")
+        return False
+
+    @staticmethod
+    def _is_selected(snap: UiSnapshot, node: UiNode) -> bool:
+        tab = snap.clickable_ancestor(node)
+        return tab.selected or node.selected or any(n.selected for n in snap.descendants(tab))
+
+    @classmethod
+    def selected_in(cls, snap: UiSnapshot, height: int) -> Optional[str]:
+        """
+        Выбранная вкладка по снимку (height — высота окна). None — панели на экране нет;
+        "" — панель есть, но selected не отдаёт.
+        """
+        seen = False
+        for name in cls.TABS:
+            node = cls._tab_node_in(snap, name, height)
+            if node:
+                seen = True
+                if cls._is_selected(snap, node):
+                    return name
+        return "" if seen else None
+
+    def _bar_reports_selection(self, snap: UiSnapshot) -> bool:
+        for name in self.TABS:
+            node = self._tab_node(snap, name)
+            if node and self._is_selected(snap, node):
+                return True
+        return False
+
     # ---------- helpers ----------
 
+    def _click_by_accessibility_id(self, name: str, timeout: int | None) -> bool:
+        locator = getattr(self, f"TAB_{name.upper()}", None)
+        if not locator:
+            return False
+        element = self.waits.clickable(*locator, timeout=timeout)
+        if not element:
+            return False
+        element.click()
+        return True
+
     def _click_from_map(self, name: str) -> bool:
         strat, query = self._fallbacks.get(name, (None, None))
         if not strat:
@@ -70,7 +219,7 @@ class BottomNav(BaseScreen):
             return False
 
     def _click_by_text_platform(self, name: str) -> bool:
-        plat = (self.driver.capabilities.get("platformName") or "").lower()
+        plat = self.session.platform
 
         if plat.startswith("android"):
             q = name.replace('"', r'\"')
@@ -103,8 +252,7 @@ class BottomNav(BaseScreen):
         return False
 
     def _click_via_textfinder(self, name: str, timeout: int | None) -> bool:
-        # если в BaseScreen ты хранишь TextFinder как self.texts
-        finder = getattr(self, "texts", None)
+        finder = getattr(self, "text", None)
         if not finder:
             return False
         try:
@@ -8,13 +8,16 @@ from dotenv import load_dotenv
 import subprocess
 import time
 import requests
-import uuid
+from concurrent.futures import Future
 from selenium.common.exceptions import WebDriverException
 
 from screens.login_screen import LoginScreen
-from core.qr_generator import QrGenerator
-from core.device_media import push_png_via_driver
-from core.gallery_cleaner import clean_gallery
+from core.qr_album import QrAlbum
+from core.background import BackgroundJobs
+from core.device_shell import DeviceShell
+from core.gallery_cleaner import clean_pushed
+from core.session import DeviceSession
+from core.transfer import export_stats, import_stats, transfer_report
 
 BASE_DIR = Path(__file__).resolve().parent
 ENV_PATH = BASE_DIR / "config" / ".env"
@@ -220,6 +223,25 @@ def pytest_configure(config):
     )
 
 
+def pytest_sessionfinish(session):
+    # воркер xdist: статистика передач уходит контроллеру
+    workeroutput = getattr(session.config, "workeroutput", None)
+    if workeroutput is not None:
+        workeroutput["transfer_stats"] = export_stats()
+
+
+@pytest.hookimpl(optionalhook=True)
+def pytest_testnodedown(node, error):
+    import_stats(getattr(node, "workeroutput", {}).get("transfer_stats", []))
+
+
+def pytest_terminal_summary(terminalreporter):
+    report = transfer_report()
+    if report:
+        terminalreporter.write_sep("-", "передача медиа на устройство")
+        terminalreporter.write_line(report)
+
+
 @pytest.hookimpl(tryfirst=True)
 def pytest_runtest_setup(item):
     m = item.get_closest_marker("delayed")
@@ -349,6 +371,7 @@ def driver(request, appium_service, multi_platform):
             print(f"🔄 Подключение к Appium: {appium_url} ({platform}) - попытка {attempt + 1}/{max_retries}")
             driver = webdriver.Remote(appium_url, options=options)
             driver.test_platform = platform
+            DeviceSession.attach(driver)
             print(f"✅ Успешное подключение к Appium ({platform})")
             yield driver
             driver.quit()
@@ -365,13 +388,13 @@ def driver(request, appium_service, multi_platform):
                 print(f"⏳ Повтор через {retry_delay} секунд...")
                 time.sleep(retry_delay)
 
-                # Попытка перезапуска приложения через ADB (только Android)
+                # Попытка перезапуска приложения через ADB (только Android): сессии нет,
+                # поэтому локальный adb на устройство этого воркера, одним вызовом shell
                 if platform == "android":
                     try:
-                        subprocess.run(
-                            ["adb", "shell", "am", "force-stop", "kz.halyk.onlinebank.stage"],
-                            timeout=10
-                        )
+                        DeviceShell.for_adb(options.get_capability("udid"), timeout=10) \
+                            .add("am force-stop kz.halyk.onlinebank.stage") \
+                            .run()
                         time.sleep(2)
                     except:
                         pass
@@ -390,6 +413,7 @@ def android_driver(request, appium_service):
 
     driver = webdriver.Remote(appium_url, options=options)
     driver.test_platform = "android"
+    DeviceSession.attach(driver)
     yield driver
     driver.quit()
 
@@ -408,6 +432,7 @@ def ios_driver(request, appium_service):
 
     driver = webdriver.Remote(appium_url, options=options)
     driver.test_platform = "ios"
+    DeviceSession.attach(driver)
     yield driver
     driver.quit()
 
@@ -436,36 +461,66 @@ def login(driver):
     return login_screen
 
 
-# ============ Function fixtures ============
+# ============ Фоновая подготовка медиа ============
 def _worker_album(request) -> str:
     return f"OnlineDuken_{worker_id(request.config)}"
 
 
-@pytest.fixture
-def qr_png_on_device(driver, request):
-    """Генерация и загрузка QR-кода на устройство"""
-    kind = getattr(getattr(request.node, "callspec", None), "params", {}).get("kind")
-    album = _worker_album(request)
-    gen = QrGenerator()
-    name = f"{kind}_{uuid.uuid4().hex[:6]}"
-    path = gen.png(kind, filename=f"{name}.png")
+class PendingMedia:
+    """Результат фоновой подготовки медиа; ошибки загрузки превращаются в skip, как раньше."""
 
-    try:
-        device_dir = f"/sdcard/Pictures/{album}"
-        device_path = push_png_via_driver(driver, path, device_dir=device_dir)
-    except NotImplementedError as exc:
-        pytest.skip(str(exc))
-    except RuntimeError as exc:
-        pytest.skip(f"Не удалось загрузить QR на устройство: {exc}")
+    def __init__(self, future: Future, key=None):
+        self.future = future
+        self.key = key      # результат — словарь, тесту нужен один элемент
+
+    def result(self, timeout: float = 120):
+        try:
+            value = self.future.result(timeout)
+            return value if self.key is None else value[self.key]
+        except NotImplementedError as exc:
+            pytest.skip(str(exc))
+        except RuntimeError as exc:
+            pytest.skip(f"Не удалось загрузить QR на устройство: {exc}")
 
-    return {"album": album, "name": name, "local": path, "device": device_path}
 
+@pytest.fixture(scope="module")
+def media_jobs(driver, request):
+    """
+    Очередь фоновой подготовки медиа на модуль (один поток, по порядку отправки).
+    Сама ничего не ставит: тест, запросивший фикстуру-загрузку раньше login, получает
+    загрузку параллельно логину. При завершении модуля удаляется то, что тесты модуля
+    загрузили в альбом воркера (core.media_ledger); ничего не загружали — ни одного вызова.
+    """
+    jobs = BackgroundJobs("media")
+    yield jobs
+    jobs.submit(clean_pushed, driver, only_test_album=_worker_album(request))
+    jobs.shutdown()
+
+
+def _param_kinds(items) -> set:
+    return {
+        item.callspec.params["kind"]
+        for item in items
+        if "kind" in getattr(getattr(item, "callspec", None), "params", {})
+    }
 
+
+@pytest.fixture(scope="session")
+def qr_album(request):
+    """
+    Все варианты QR собранных тестов (параметр kind) — один альбом на сессию.
+    Каталог <альбом воркера>_qr остаётся на устройстве намеренно (см. core.qr_album).
+    """
+    return QrAlbum(_param_kinds(request.session.items), album=f"{_worker_album(request)}_qr")
+
+
+# ============ Function fixtures ============
 @pytest.fixture
-def clean_gallery_before_test(driver, request):
-    """Очистка галереи с учетом платформы"""
-    platform = getattr(driver, 'test_platform', 'android')
-    ios_udid = os.getenv("IOS_SIM_UDID") if platform == 'ios' else None
-    album = _worker_album(request)
-    clean_gallery(driver, ios_udid=ios_udid, only_test_album=album)
-    yield
\ No newline at end of file
+def seeded_qr(driver, request, media_jobs, qr_album):
+    """
+    QR текущего случая из альбома на сессию (core.qr_album): загрузка идёт в фоне
+    один раз на устройство, без очистки галереи на каждый случай.
+    .result() → SeededQr с именем файла и позицией в «Недавних».
+    """
+    kind = getattr(getattr(request.node, "callspec", None), "params", {}).get("kind")
+    return PendingMedia(qr_album.seed(driver, media_jobs), key=kind)
@@ -0,0 +1,50 @@
+# core/background.py
+"""
+Фоновые задачи подготовки окружения (медиа на устройстве и т.п.).
+
+Одна очередь — один поток: задачи выполняются строго по порядку отправки
+(очистка альбома → рендер → загрузка), а тест ждёт Future только там, где
+результат действительно нужен. Appium выполняет команды одной сессии по
+очереди, так что shell/push из фона безопасно чередуются с UI-командами.
+"""
+from __future__ import annotations
+
+import logging
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Hashable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class BackgroundJobs:
+    def __init__(self, name: str = "jobs"):
+        self.name = name
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=name)
+        self._pending: Dict[Hashable, Future] = {}
+
+    def submit(self, fn: Callable[..., Any], *args, key: Optional[Hashable] = None, **kwargs) -> Future:
+        """Поставить задачу в очередь; с key её можно забрать позже через take()."""
+        what = getattr(fn, "__name__", repr(fn))
+        queued = time.monotonic()
+
+        def run():
+            start = time.monotonic()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                logger.debug(f"{self.name}: {what} — {time.monotonic() - start:.2f}s "
+                             f"(в очереди {start - queued:.2f}s)")
+
+        future = self._executor.submit(run)
+        if key is not None:
+            self._pending[key] = future
+        return future
+
+    def take(self, key: Hashable) -> Optional[Future]:
+        """Заранее запущенная задача по ключу (один раз) или None."""
+        return self._pending.pop(key, None)
+
+    def shutdown(self, wait: bool = True) -> None:
+        self._pending.clear()
+        self._executor.shutdown(wait=wait)
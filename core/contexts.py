@@ -0,0 +1,130 @@
+# core/contexts.py
+"""
+Учёт контекстов (NATIVE_APP / WEBVIEW_*) на стороне клиента.
+
+Текущий контекст хранится локально, список контекстов кэшируется и
+сбрасывается при смене приложения/активити, после клика или по TTL.
+Переключение в уже активный контекст не отправляется на сервер.
+"""
+from __future__ import annotations
+
+import logging
+import time
+from contextlib import contextmanager
+from typing import List, Optional
+
+from selenium.common.exceptions import WebDriverException
+
+logger = logging.getLogger(__name__)
+
+NATIVE = "NATIVE_APP"
+
+
+class ContextCache:
+    """Один экземпляр на сессию драйвера: ContextCache.for_driver(driver)."""
+
+    _ATTR = "_od_context_cache"
+
+    def __init__(self, driver, ttl: float = 3.0):
+        self.driver = driver
+        self.ttl = ttl
+        self._current: Optional[str] = None
+        self._contexts: Optional[List[str]] = None
+        self._fetched_at = 0.0
+        self._screen_key: Optional[str] = None
+        self.stats = {"switch": 0, "switch_skipped": 0, "contexts": 0, "contexts_cached": 0}
+
+    @classmethod
+    def for_driver(cls, driver) -> "ContextCache":
+        cache = getattr(driver, cls._ATTR, None)
+        if cache is None:
+            cache = cls(driver)
+            try:
+                setattr(driver, cls._ATTR, cache)
+            except AttributeError:
+                pass
+        return cache
+
+    # ---------- текущий контекст ----------
+
+    @property
+    def current(self) -> str:
+        """Текущий контекст; на сервер идём, только если он ещё неизвестен."""
+        if self._current is None:
+            try:
+                self._current = self.driver.current_context or NATIVE
+            except WebDriverException as e:
+                if "session" in str(e).lower():
+                    raise
+                return NATIVE
+        return self._current
+
+    def switch(self, ctx: str) -> bool:
+        """Переключиться в ctx. Возвращает True, если запрос реально отправлялся."""
+        if ctx == self.current:
+            self.stats["switch_skipped"] += 1
+            return False
+        try:
+            self.driver.switch_to.context(ctx)
+        except WebDriverException:
+            # состояние на сервере неизвестно, контекст мог исчезнуть
+            self._current = None
+            self.invalidate()
+            raise
+        self._current = ctx
+        self.stats["switch"] += 1
+        return True
+
+    @contextmanager
+    def within(self, ctx: str, strict: bool = True):
+        """Выполнить блок в ctx и вернуться назад, если переключение было."""
+        prev = self.current
+        try:
+            self.switch(ctx)
+        except WebDriverException as e:
+            if strict:
+                raise
+            logger.warning(f"Не удалось переключиться в контекст {ctx}: {e}")
+        try:
+            yield
+        finally:
+            if self._current != prev:
+                try:
+                    self.switch(prev)
+                except WebDriverException as e:
+                    logger.warning(f"Не удалось вернуться в исходный контекст {prev}: {e}")
+
+    # ---------- список контекстов ----------
+
+    def contexts(self) -> List[str]:
+        fresh = self._contexts is not None and time.monotonic() - self._fetched_at < self.ttl
+        if fresh:
+            self.stats["contexts_cached"] += 1
+            return list(self._contexts)
+        try:
+            self._contexts = list(self.driver.contexts or [NATIVE])
+        except WebDriverException:
+            self._contexts = [NATIVE]
+        self._fetched_at = time.monotonic()
+        self.stats["contexts"] += 1
+        return list(self._contexts)
+
+    def webviews(self) -> List[str]:
+        return [c for c in self.contexts() if str(c).startswith("WEBVIEW")]
+
+    def invalidate(self) -> None:
+        """Сбросить список контекстов (текущий контекст остаётся известным)."""
+        self._contexts = None
+
+    def note_screen(self, key: Optional[str]) -> None:
+        """Сообщить о приложении/активити; при смене кэш контекстов сбрасывается."""
+        if key and key != self._screen_key:
+            if self._screen_key is not None:
+                self.invalidate()
+            self._screen_key = key
+
+    def reset(self) -> None:
+        """Полный сброс, например после переподключения сессии."""
+        self._current = None
+        self._contexts = None
+        self._screen_key = None
@@ -1,27 +1,160 @@
-import base64
+import io
+import logging
 import os
 import subprocess
+import tarfile
+import tempfile
+import time
+import uuid
 from pathlib import Path
+from typing import Iterable, List, Optional, Tuple
 
+from core.device_shell import DeviceShell
+from core.media_ledger import MediaLedger
+from core.transfer import push_bytes
 
-def push_png_via_driver(driver, local_path: Path, device_dir="/sdcard/Pictures/OnlineDuken") -> str:
-    """Переносит PNG на устройство."""
-    local_path = Path(local_path)
+logger = logging.getLogger(__name__)
+
+# локальный файл или (имя, байты) из памяти
+MediaFile = Path | Tuple[str, bytes]
+
+# сюда файлы передаются до переноса в альбом: каталог есть всегда, доступен shell
+STAGING_DIR = "/data/local/tmp"
+
+
+def rescan_dir(path: str) -> str:
+    """Команда перескана каталога — общая для загрузки и очистки галереи."""
+    # Начиная с новых Android есть команда cmd media rescan. Если не сработает — fallback
+    # прямо в том же вызове, без второго запроса.
+    return (
+        f'cmd media rescan "{path}" || '
+        f'am broadcast -a android.intent.action.MEDIA_SCANNER_SCAN_DIR -d "file://{path}"'
+    )
+
+
+def _finish(shell: DeviceShell) -> None:
+    """Пакет команд после передачи; ошибка размещения файла — RuntimeError (тест пропустится)."""
+    placed, *others = shell.run()
+    if not placed.ok:
+        raise RuntimeError(f"Не удалось разместить файл на устройстве: {placed}")
+    for result in others:
+        if not result.ok:
+            logger.warning(f"Медиа на устройстве: {result}")
+
+
+def push_png_via_driver(driver, png: Path | bytes, device_dir="/sdcard/Pictures/OnlineDuken",
+                        name: Optional[str] = None, b64: Optional[str] = None,
+                        transfer: Optional[str] = None) -> str:
+    """
+    Переносит PNG на устройство.
+    png — путь или готовые байты (тогда нужен name); b64 — уже закодированные байты, если есть.
+    transfer — способ передачи (core.transfer): appium | adb | auto; по умолчанию MEDIA_TRANSFER.
+    """
+    if isinstance(png, (bytes, bytearray)):
+        if not name:
+            raise ValueError("Для PNG из памяти нужно имя файла")
+        data = bytes(png)
+    else:
+        png = Path(png)
+        name = name or png.name
+        data = None
     platform = driver.capabilities.get("platformName", "").lower()
 
     if platform == "android":
-        device_path = f"{device_dir}/{local_path.name}"
-        driver.execute_script("mobile: shell", {"command": "mkdir", "args": ["-p", device_dir]})
-        driver.push_file(device_path, base64.b64encode(local_path.read_bytes()).decode())
-        driver.execute_script("mobile: shell", {
-            "command": "am",
-            "args": ["broadcast", "-a", "android.intent.action.MEDIA_SCANNER_SCAN_FILE", "-d", f"file://{device_path}"],
-        })
+        device_path = f"{device_dir}/{name}"
+        if data is None:
+            data = png.read_bytes()
+        # передача в /data/local/tmp (каталог всегда есть), затем mkdir, перенос в альбом
+        # и перескан файла — одним вызовом shell
+        staged = f"{STAGING_DIR}/od_{uuid.uuid4().hex[:8]}_{name}"
+        push_bytes(driver, staged, data, transfer, b64=b64)
+        _finish(DeviceShell.for_driver(driver)
+                .add(f'mkdir -p "{device_dir}" && mv -f "{staged}" "{device_path}"')
+                .add(f'am broadcast -a android.intent.action.MEDIA_SCANNER_SCAN_FILE -d "file://{device_path}"'))
+        MediaLedger.of(driver).record([device_path])
         return device_path
 
     if platform == "ios":
         udid = driver.capabilities.get("udid", "booted")
-        subprocess.run(["xcrun", "simctl", "addmedia", udid, str(local_path)], check=True)
-        return f"photos://{local_path.name}"
+        if data is None:
+            subprocess.run(["xcrun", "simctl", "addmedia", udid, str(png)], check=True)
+            return f"photos://{name}"
+        # simctl принимает только файл — временный, с нужным именем
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, name)
+            Path(path).write_bytes(data)
+            subprocess.run(["xcrun", "simctl", "addmedia", udid, path], check=True)
+        return f"photos://{name}"
+
+    raise ValueError(f"Неподдерживаемая платформа: {platform}")
+
+
+def _named(files: Iterable[MediaFile]) -> List[Tuple[str, bytes]]:
+    out = []
+    for f in files:
+        if isinstance(f, tuple):
+            out.append((f[0], bytes(f[1])))
+        else:
+            f = Path(f)
+            out.append((f.name, f.read_bytes()))
+    return out
+
+
+def _tar(files: List[Tuple[str, bytes]], newest_first: bool = False) -> bytes:
+    """Несжатый tar в памяти: PNG уже сжаты, gzip только потратит время."""
+    buf = io.BytesIO()
+    now = int(time.time())
+    with tarfile.open(fileobj=buf, mode="w", format=tarfile.USTAR_FORMAT) as tar:
+        for i, (name, data) in enumerate(files):
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            info.mode = 0o644
+            # время файла после распаковки — по нему пикер сортирует «Недавние»
+            info.mtime = now - i if newest_first else now
+            tar.addfile(info, io.BytesIO(data))
+    return buf.getvalue()
+
+
+def push_files_via_driver(driver, files: Iterable[MediaFile], device_dir="/sdcard/Pictures/OnlineDuken",
+                          transfer: Optional[str] = None, newest_first: bool = False) -> List[str]:
+    """
+    Переносит набор файлов на устройство за постоянное число вызовов.
+
+    Android: один tar → одна передача во временный каталог (способ — transfer,
+    см. core.transfer) → один mobile: shell (mkdir, распаковка, удаление архива,
+    перескан каталога). iOS: один simctl addmedia.
+    newest_first (Android) — время файлов убывает по порядку files (шаг секунда), так что
+    в «Недавних» пикера они идут в том же порядке.
+    Возвращает пути на устройстве в порядке files.
+    """
+    named = _named(files)
+    if not named:
+        return []
+    platform = driver.capabilities.get("platformName", "").lower()
+
+    if platform == "android":
+        archive = f"{STAGING_DIR}/od_media_{uuid.uuid4().hex[:8]}.tar"
+        push_bytes(driver, archive, _tar(named, newest_first), transfer)
+        # перескан всего каталога — одна команда вместо одной на файл, тем же способом,
+        # что и после очистки (gallery_cleaner)
+        _finish(DeviceShell.for_driver(driver)
+                .add(f'mkdir -p "{device_dir}" && tar -xf "{archive}" -C "{device_dir}"')
+                .add(f'rm -f "{archive}"')
+                .add(rescan_dir(device_dir)))
+        paths = [f"{device_dir}/{name}" for name, _ in named]
+        MediaLedger.of(driver).record(paths)
+        return paths
+
+    if platform == "ios":
+        udid = driver.capabilities.get("udid", "booted")
+        # addmedia принимает несколько файлов за раз
+        with tempfile.TemporaryDirectory() as tmp:
+            paths = []
+            for name, data in named:
+                path = os.path.join(tmp, name)
+                Path(path).write_bytes(data)
+                paths.append(path)
+            subprocess.run(["xcrun", "simctl", "addmedia", udid, *paths], check=True)
+        return [f"photos://{name}" for name, _ in named]
 
-    raise ValueError(f"Неподдерживаемая платформа: {platform}")
\ No newline at end of file
+    raise ValueError(f"Неподдерживаемая платформа: {platform}")
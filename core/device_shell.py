@@ -0,0 +1,128 @@
+# core/device_shell.py
+"""
+Пакетный shell на устройстве: несколько команд — один вызов.
+
+    shell = DeviceShell.for_driver(driver)
+    shell.add('rm -rf "/sdcard/Pictures/x"/*')
+    shell.add('cmd media rescan /sdcard/Pictures/x')
+    results = shell.run()          # один mobile: shell
+    results[1].ok, results[1].output
+
+Команды склеиваются в один `sh -c`; вывод каждой обрамляется маркерами с
+кодом возврата, так что результаты разбираются по отдельности. Каждая
+команда выполняется в подоболочке: exit или ошибка одной не обрывает
+остальные. Тот же пакет можно выполнить через локальный adb — когда сессии
+Appium нет (восстановление при подключении).
+"""
+from __future__ import annotations
+
+import logging
+import re
+import shlex
+import subprocess
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Callable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+Runner = Callable[[str], str]
+
+
+@dataclass(frozen=True)
+class ShellResult:
+    command: str
+    code: Optional[int]     # None — маркер конца не найден (оборвался весь пакет)
+    output: str             # stdout и stderr вместе
+
+    @property
+    def ok(self) -> bool:
+        return self.code == 0
+
+    def __str__(self) -> str:
+        return f"[{self.code}] {self.command}" + (f"\n{self.output}" if self.output else "")
+
+
+class DeviceShellError(RuntimeError):
+    def __init__(self, failed: List[ShellResult]):
+        self.failed = failed
+        super().__init__("; ".join(f"{r.command} → {r.code}: {r.output[:200]}" for r in failed))
+
+
+def _mobile_shell(driver) -> Runner:
+    def run(script: str) -> str:
+        # adb склеивает аргументы через пробел без экранирования — скрипт одним
+        # экранированным аргументом, иначе sh -c получит только первое слово
+        out = driver.execute_script("mobile: shell", {"command": "sh", "args": ["-c", shlex.quote(script)]})
+        # с includeStderr Appium возвращает dict — у нас stderr уже слит в stdout
+        return out.get("stdout", "") if isinstance(out, dict) else (out or "")
+    return run
+
+
+def _adb_shell(udid: str, timeout: float) -> Runner:
+    def run(script: str) -> str:
+        cmd = ["adb"] + (["-s", udid] if udid else []) + ["shell", script]
+        out = subprocess.run(cmd, capture_output=True, text=True, timeout=timeout)
+        return out.stdout
+    return run
+
+
+class DeviceShell:
+    def __init__(self, runner: Runner):
+        self._run = runner
+        self._queue: List[str] = []
+
+    @classmethod
+    def for_driver(cls, driver) -> "DeviceShell":
+        return cls(_mobile_shell(driver))
+
+    @classmethod
+    def for_adb(cls, udid: str = "", timeout: float = 30) -> "DeviceShell":
+        return cls(_adb_shell(udid, timeout))
+
+    def add(self, command: str) -> "DeviceShell":
+        self._queue.append(command)
+        return self
+
+    def __len__(self) -> int:
+        return len(self._queue)
+
+    @staticmethod
+    def _script(token: str, commands: List[str]) -> str:
+        parts = []
+        for i, command in enumerate(commands):
+            parts.append(
+                f"echo '<<{token}:{i}'; ( {command} ) 2>&1; rc=$?; echo; echo \"{token}:{i}>> $rc\""
+            )
+        return "\n".join(parts)
+
+    @staticmethod
+    def _parse(token: str, commands: List[str], raw: str) -> List[ShellResult]:
+        results = []
+        for i, command in enumerate(commands):
+            m = re.search(
+                rf"<<{token}:{i}\n(.*?)\n?{token}:{i}>> (\d+)", raw, flags=re.S,
+            )
+            if m:
+                results.append(ShellResult(command, int(m.group(2)), m.group(1).rstrip("\n")))
+            else:
+                results.append(ShellResult(command, None, ""))
+        return results
+
+    def run(self, check: bool = False) -> List[ShellResult]:
+        """Выполнить очередь одним вызовом и очистить её; check — исключение при ненулевом коде."""
+        commands, self._queue = self._queue, []
+        if not commands:
+            return []
+        token = f"OD{uuid.uuid4().hex[:8]}"
+        start = time.monotonic()
+        raw = self._run(self._script(token, commands))
+        results = self._parse(token, commands, raw or "")
+        logger.debug(f"Shell: {len(commands)} команд(ы) одним вызовом за {time.monotonic() - start:.2f}s")
+        failed = [r for r in results if not r.ok]
+        if failed:
+            logger.debug("Shell: ошибки\n" + "\n".join(map(str, failed)))
+            if check:
+                raise DeviceShellError(failed)
+        return results
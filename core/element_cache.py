@@ -0,0 +1,87 @@
+# core/element_cache.py
+"""
+Кэш найденных элементов по локатору в пределах «поколения» экрана.
+
+Запись действительна, пока не сменились DeviceSession.generation (смена
+пакета/активити) и ориентация окна. Ошибка stale element при действии
+выбрасывает запись, элемент ищется заново и действие повторяется один раз.
+Повторные клики по одному контролу переиспользуют id элемента вместо
+нового поиска.
+"""
+from __future__ import annotations
+
+import logging
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+from selenium.common.exceptions import StaleElementReferenceException
+
+from core.session import DeviceSession
+
+logger = logging.getLogger(__name__)
+
+
+class ElementCache:
+    _ATTR = "_od_element_cache"
+
+    def __init__(self, session: DeviceSession):
+        self.session = session
+        self._items: Dict[Hashable, Tuple[Tuple[int, str], Any]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def of(cls, driver) -> "ElementCache":
+        cache = getattr(driver, cls._ATTR, None)
+        if cache is None:
+            cache = cls(DeviceSession.of(driver))
+            try:
+                setattr(driver, cls._ATTR, cache)
+            except AttributeError:
+                pass
+        return cache
+
+    def _stamp(self) -> Tuple[int, str]:
+        return self.session.generation, self.session.orientation
+
+    def get(self, key: Hashable, resolve: Callable[[], Any],
+            cacheable: Callable[[Any], bool] = bool) -> Optional[Any]:
+        """Элемент из кэша текущего поколения или resolve(); пустой результат не кэшируется."""
+        stamp = self._stamp()
+        entry = self._items.get(key)
+        if entry and entry[0] == stamp:
+            self.hits += 1
+            return entry[1]
+
+        self.misses += 1
+        value = resolve()
+        if value is not None and cacheable(value):
+            self._items[key] = (stamp, value)
+        else:
+            self._items.pop(key, None)
+        return value
+
+    def act(self, key: Hashable, resolve: Callable[[], Any], action: Callable[[Any], Any],
+            cacheable: Callable[[Any], bool] = bool) -> bool:
+        """
+        action(элемент) с элементом из кэша. Stale — запись сбрасывается, элемент
+        ищется заново, действие повторяется один раз. False — элемент не найден.
+        """
+        for attempt in range(2):
+            value = self.get(key, resolve, cacheable)
+            if value is None:
+                return False
+            try:
+                action(value)
+                return True
+            except StaleElementReferenceException:
+                if attempt:
+                    raise
+                logger.debug(f"Кэш элементов: {key} устарел, ищем заново")
+                self.invalidate(key)
+        return False
+
+    def invalidate(self, key: Optional[Hashable] = None) -> None:
+        if key is None:
+            self._items.clear()
+        else:
+            self._items.pop(key, None)
@@ -0,0 +1,84 @@
+# core/fingerprint.py
+"""
+Отпечаток экрана — компактный набор якорей, по которому экран узнаётся
+из одного снимка иерархии: пакет/активити, resource-id, выбранная вкладка
+нижней панели и тексты.
+
+Все условия отпечатка должны выполняться; из нескольких подошедших
+экранов побеждает тот, у кого совпало больше якорей (более конкретный).
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+from core.ui_snapshot import UiSnapshot
+
+
+@dataclass(frozen=True)
+class Fingerprint:
+    packages: Tuple[str, ...] = ()    # префикс текущего пакета — хотя бы один
+    activity: str = ""                # подстрока текущей активити
+    ids: Tuple[str, ...] = ()         # все resource-id (полные или 'id/x')
+    any_ids: Tuple[str, ...] = ()     # хотя бы один из resource-id
+    texts: Tuple[str, ...] = ()       # все тексты (native или innerText webview)
+    any_texts: Tuple[str, ...] = ()   # хотя бы один из текстов
+    absent: Tuple[str, ...] = ()      # тексты, которых на экране быть не должно
+    tab: str = ""                     # выбранная вкладка нижней панели (BottomNav.TABS)
+
+    @property
+    def needs_activity(self) -> bool:
+        return bool(self.activity)
+
+    @property
+    def needs_text(self) -> bool:
+        return bool(self.texts or self.any_texts or self.absent)
+
+    @property
+    def needs_tab(self) -> bool:
+        return bool(self.tab)
+
+    def score(self, snap: UiSnapshot, web_text: str = "", package: str = "", activity: str = "",
+              tab: Optional[str] = None) -> int:
+        """
+        0 — экран не подходит; иначе число совпавших якорей.
+        web_text — innerText webview в нижнем регистре (если его снимали);
+        tab — выбранная вкладка нижней панели в снимке (BottomNav.selected_in): None —
+        панели нет, "" — панель не отдаёт selected (тогда якорь не проверяется).
+        """
+        def has_text(t: str) -> bool:
+            return snap.has_text(t) or (bool(web_text) and t.casefold() in web_text)
+
+        score = 0
+        if self.packages:
+            pkg = package or snap.package
+            if not any(pkg.startswith(p) for p in self.packages):
+                return 0
+            score += 1
+        if self.activity:
+            if self.activity not in activity:
+                return 0
+            score += 1
+        if self.tab:
+            if tab is None or (tab and tab != self.tab):
+                return 0
+            score += 1 if tab else 0
+        for rid in self.ids:
+            if not snap.has_id(rid):
+                return 0
+            score += 1
+        if self.any_ids:
+            if not any(snap.has_id(rid) for rid in self.any_ids):
+                return 0
+            score += 1
+        for t in self.texts:
+            if not has_text(t):
+                return 0
+            score += 1
+        if self.any_texts:
+            if not any(has_text(t) for t in self.any_texts):
+                return 0
+            score += 1
+        if any(has_text(t) for t in self.absent):
+            return 0
+        return score + (1 if self.absent else 0)
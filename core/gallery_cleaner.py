@@ -1,8 +1,16 @@
 # core/gallery_cleaner.py
 from __future__ import annotations
+import logging
 import os
 import subprocess
 
+from core.device_media import rescan_dir
+from core.device_shell import DeviceShell
+from core.media_ledger import MediaLedger
+
+logger = logging.getLogger(__name__)
+
+
 def clean_gallery(driver, *, ios_udid: str | None = None, only_test_album: str | None = None) -> None:
     """
     Универсальная очистка медиагалереи перед тестом.
@@ -44,19 +52,48 @@ def _clean_android(driver, *, only_test_album: str | None) -> None:
         )
         rescan_targets = ["/sdcard/DCIM", "/sdcard/Pictures"]
 
-    # 1) удаляем файлы
-    driver.execute_script("mobile: shell", {"command": "sh", "args": ["-c", sh]})
+    # удаление и перескан — один вызов mobile: shell
+    shell = DeviceShell.for_driver(driver)
+    shell.add(sh)
+    for path in rescan_targets:
+        shell.add(rescan_dir(path))
+    _run(shell)
 
-    # 2) перескан медиатеки
-    # Начиная с новых Android есть команда cmd media rescan. Если не сработает — fallback.
+    ledger = MediaLedger.of(driver)
     for path in rescan_targets:
-        try:
-            driver.execute_script("mobile: shell", {"command": "cmd", "args": ["media", "rescan", path]})
-        except Exception:
-            driver.execute_script("mobile: shell", {
-                "command": "am",
-                "args": ["broadcast", "-a", "android.intent.action.MEDIA_SCANNER_SCAN_DIR", "-d", f"file://{path}"]
-            })
+        ledger.forget_dir(path)
+    if not only_test_album:
+        ledger.forget([p for p in ledger.pending() if p.startswith(("/sdcard/DCIM/", "/sdcard/Pictures/"))])
+
+
+def clean_pushed(driver, *, only_test_album: str | None = None) -> int:
+    """
+    Удалить только то, что прогон сам загрузил (core.media_ledger), и пересканировать
+    затронутые каталоги. Ничего не загружали — ни одного вызова. Возвращает число файлов.
+    """
+    platform = (driver.capabilities.get("platformName") or "").lower()
+    if not platform.startswith("android"):
+        # iOS: фото из медиатеки симулятора по одному не удаляются — остаётся clean_gallery
+        return 0
+
+    ledger = MediaLedger.of(driver)
+    paths = ledger.pending(f"/sdcard/Pictures/{only_test_album}" if only_test_album else None)
+    if not paths:
+        return 0
+
+    shell = DeviceShell.for_driver(driver)
+    shell.add("rm -f " + " ".join(f'"{p}"' for p in paths))
+    for directory in sorted({p.rsplit("/", 1)[0] for p in paths}):
+        shell.add(rescan_dir(directory))
+    _run(shell)
+    ledger.forget(paths)
+    return len(paths)
+
+
+def _run(shell: DeviceShell) -> None:
+    for result in shell.run():
+        if not result.ok:
+            logger.warning(f"Очистка галереи: {result}")
 
 
 def _clean_ios_simulator(udid: str | None) -> None:
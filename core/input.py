@@ -0,0 +1,259 @@
+# core/input.py
+"""
+Пакетный ввод через W3C actions: PIN-клавиатура и поля кодов.
+
+Вместо «найти кнопку → клик» на каждую цифру координаты клавиш берутся из
+снимка иерархии (разбор раскладки хранится в сессии по ориентации), а весь
+PIN уходит одним POST /actions. Код из СМС вводится тапом по полю и нажатиями
+клавиш в том же payload. После ввода снимок подтверждает результат. Итог:
+3–4 запроса вместо ~10.
+"""
+from __future__ import annotations
+
+import logging
+from typing import Dict, Iterable, Optional, Tuple
+
+from selenium.common.exceptions import WebDriverException
+from selenium.webdriver.common.actions import interaction
+from selenium.webdriver.common.actions.action_builder import ActionBuilder
+from selenium.webdriver.common.actions.key_input import KeyInput
+from selenium.webdriver.common.actions.pointer_input import PointerInput
+
+from core.contexts import NATIVE
+from core.polling import Poller
+from core.session import DeviceSession
+from core.ui_snapshot import Bounds, UiNode, UiSnapshot
+
+logger = logging.getLogger(__name__)
+
+Point = Tuple[int, int]
+
+TAP_HOLD = 0.05   # удержание пальца, сек
+TAP_GAP = 0.08    # пауза между касаниями — клавиатура успевает отрисовать нажатие
+CHECK_TIMEOUT = 2  # сколько ждать, пока код появится в поле, сек
+KEYPAD_SETTLE = 10  # сколько ждать закрытия клавиатуры после PIN (переход экрана), сек
+
+
+def _center(bounds: Bounds) -> Point:
+    l, t, r, b = bounds
+    return (l + r) // 2, (t + b) // 2
+
+
+class TouchInput:
+    def __init__(self, driver):
+        self.driver = driver
+        self.session = DeviceSession.of(driver)
+
+    def _builder(self) -> ActionBuilder:
+        return ActionBuilder(
+            self.driver,
+            mouse=PointerInput(interaction.POINTER_TOUCH, "finger"),
+            keyboard=KeyInput("keyboard"),
+            duration=0,   # перемещение «пальца» к точке мгновенное, это не жест
+        )
+
+    @staticmethod
+    def _tap(builder: ActionBuilder, point: Point) -> int:
+        """Касание в payload; возвращает число тиков (для выравнивания клавиатуры)."""
+        finger = builder.pointer_action
+        finger.move_to_location(*point)
+        finger.pointer_down()
+        finger.pause(TAP_HOLD)
+        finger.pointer_up()
+        return 4
+
+    def tap_points(self, points: Iterable[Point]) -> None:
+        """Серия касаний одним запросом."""
+        builder = self._builder()
+        for i, point in enumerate(points):
+            if i:
+                builder.pointer_action.pause(TAP_GAP)
+            self._tap(builder, point)
+        self._perform(builder)
+
+    def tap_and_type(self, point: Point, text: str) -> None:
+        """Фокус тапом по полю и ввод текста клавишами — один payload."""
+        builder = self._builder()
+        ticks = self._tap(builder, point)
+        keys = builder.key_action
+        for _ in range(ticks):
+            keys.pause(0)
+        keys.pause(TAP_GAP)
+        for ch in text:
+            keys.key_down(ch)
+            keys.key_up(ch)
+        self._perform(builder)
+
+    def _perform(self, builder: ActionBuilder) -> None:
+        try:
+            with self.session.contexts.within(NATIVE):
+                builder.perform()
+        finally:
+            self.session.invalidate_screen()
+
+
+class Keypad:
+    """
+    Цифровая клавиатура приложения (не системная IME).
+
+    Клавиши ищутся в снимке по тексту цифры внутри контейнера; если подписи
+    нет (иконки, картинки), цифры раскладываются по детям контейнера в
+    порядке order — для нашей клавиатуры: 1–9, затем 0 десятым.
+
+    Раскладка кэшируется в сессии вместе с bounds контейнера и перед вводом
+    сверяется со свежим снимком: сдвинулась клавиатура — раскладка снимается
+    заново. Ввод засчитывается по результату: клавиатура закрылась или (если
+    задан dots_id) заполненных точек столько же, сколько введено цифр.
+    """
+
+    def __init__(self, driver, container_id: str, order: str = "1234567890",
+                 dots_id: Optional[str] = None):
+        self.driver = driver
+        self.container_id = container_id
+        self.order = order
+        self.dots_id = dots_id
+        self.session = DeviceSession.of(driver)
+        self.touch = TouchInput(driver)
+
+    @property
+    def _layout_key(self) -> tuple:
+        return "keypad", self.container_id, self.session.orientation
+
+    def keys(self, timeout: float = 10) -> Dict[str, Bounds]:
+        """Цифра → bounds по свежему снимку; разбор раскладки — из кэша сессии, если совпал контейнер."""
+        snap = self._snapshot(timeout)
+        return self._keys_in(snap) if snap else {}
+
+    def _snapshot(self, timeout: float) -> Optional[UiSnapshot]:
+        poller = Poller(timeout)
+        for _ in poller:
+            snap = _capture(self.driver)
+            if snap and self._container(snap):
+                poller.stats(True, f"keypad {self.container_id}")
+                return snap
+        poller.stats(False, f"keypad {self.container_id}")
+        return None
+
+    def _container(self, snap: UiSnapshot) -> Optional[UiNode]:
+        return next((n for n in snap.by_id(self.container_id) if n.has_area), None)
+
+    def _keys_in(self, snap: UiSnapshot) -> Dict[str, Bounds]:
+        container = self._container(snap)
+        if container is None:
+            return {}
+        cached = self.session.layouts.get(self._layout_key)
+        if cached and cached[0] == container.bounds:
+            return cached[1]
+        keys = self._resolve(snap, container)
+        if keys:
+            self.session.layouts[self._layout_key] = (container.bounds, keys)
+        return keys
+
+    def _resolve(self, snap: UiSnapshot, container: UiNode) -> Dict[str, Bounds]:
+        keys: Dict[str, Bounds] = {}
+        for node in snap.descendants(container):
+            label = node.text.strip() or node.desc.strip()
+            if len(label) == 1 and label in self.order and label not in keys:
+                tap = snap.clickable_ancestor(node)
+                if tap.has_area:
+                    keys[label] = tap.bounds
+        children = [n for n in snap.children(container) if n.has_area]
+        for digit, child in zip(self.order, children):
+            keys.setdefault(digit, child.bounds)
+        return keys
+
+    def enter(self, digits: str, timeout: float = 10) -> bool:
+        """
+        Весь набор цифр одним W3C actions. False — клавиатура не найдена или ввод
+        не подтвердился (клавиатура осталась, точек не столько, сколько цифр).
+        """
+        snap = self._snapshot(timeout)
+        keys = self._keys_in(snap) if snap else {}
+        if not keys or any(d not in keys for d in digits):
+            return False
+        try:
+            self.touch.tap_points(_center(keys[d]) for d in digits)
+        except WebDriverException as e:
+            # раскладка могла устареть (поворот, другая клавиатура) — снимем заново
+            self.session.layouts.pop(self._layout_key, None)
+            logger.warning(f"Ввод на клавиатуре {self.container_id} не удался: {e}")
+            return False
+        if not self._entered(len(digits)):
+            self.session.layouts.pop(self._layout_key, None)
+            logger.warning(f"Клавиатура {self.container_id}: ввод {len(digits)} цифр не подтвердился")
+            return False
+        return True
+
+    def _entered(self, count: int, timeout: float = KEYPAD_SETTLE) -> bool:
+        poller = Poller(timeout)
+        for _ in poller:
+            snap = _capture(self.driver)
+            if snap is None:
+                continue
+            if self._container(snap) is None or (self.dots_id and self._filled(snap) == count):
+                poller.stats(True, f"keypad {self.container_id} entered")
+                return True
+        poller.stats(False, f"keypad {self.container_id} entered")
+        return False
+
+    def _filled(self, snap: UiSnapshot) -> int:
+        """Заполненные точки индикатора — отмеченные selected дети контейнера dots_id."""
+        dots = next((n for n in snap.by_id(self.dots_id) if n.has_area), None)
+        return sum(1 for n in snap.children(dots) if n.selected) if dots else -1
+
+
+def _capture(driver) -> Optional[UiSnapshot]:
+    try:
+        with DeviceSession.of(driver).contexts.within(NATIVE):
+            return UiSnapshot.capture(driver)
+    except WebDriverException:
+        return None
+
+
+def field_bounds(driver, rid: str, timeout: float = 10) -> Optional[Bounds]:
+    """Bounds поля по resource-id из снимков иерархии (один page_source на опрос)."""
+    poller = Poller(timeout)
+    for _ in poller:
+        snap = _capture(driver)
+        if snap is None:
+            continue
+        node: Optional[UiNode] = next((n for n in snap.by_id(rid) if n.has_area and n.enabled), None)
+        if node:
+            poller.stats(True, f"field {rid}")
+            return node.bounds
+    poller.stats(False, f"field {rid}")
+    return None
+
+
+def _field_has(driver, rid: str, code: str, timeout: float = CHECK_TIMEOUT) -> bool:
+    """В поле код (текст поля и его потомков, без пробелов) или поля уже нет — экран ушёл дальше."""
+    poller = Poller(timeout)
+    for _ in poller:
+        snap = _capture(driver)
+        if snap is None:
+            continue
+        node = next((n for n in snap.by_id(rid) if n.has_area), None)
+        if node is None or code in "".join("".join(n.text.split()) for n in [node, *snap.descendants(node)]):
+            poller.stats(True, f"field {rid} typed")
+            return True
+    poller.stats(False, f"field {rid} typed")
+    return False
+
+
+def type_code(driver, rid: str, code: str, timeout: float = 10) -> bool:
+    """
+    Код в поле: снимок до появления поля + один payload «тап + клавиши», затем
+    проверка текста поля. False — ввод не прошёл или прошёл не целиком.
+    """
+    bounds = field_bounds(driver, rid, timeout)
+    if not bounds:
+        return False
+    try:
+        TouchInput(driver).tap_and_type(_center(bounds), code)
+    except WebDriverException as e:
+        logger.warning(f"Пакетный ввод кода в {rid} не удался: {e}")
+        return False
+    if not _field_has(driver, rid, code):
+        logger.warning(f"Пакетный ввод кода в {rid}: в поле не тот текст")
+        return False
+    return True
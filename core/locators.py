@@ -0,0 +1,262 @@
+# core/locators.py
+"""
+Декларативные локаторы и их компиляция в самую дешёвую нативную форму.
+
+    ZERO_KEY = Locator(parent=Locator(id="...:id/keyboard"), cls="android.widget.FrameLayout", index=9)
+    by, value = compile_locator(ZERO_KEY, "android")
+
+Порядок выбора: resource-id → accessibility id → UiSelector (Android, с
+childSelector для вложенности) / class chain (iOS) → XPath. XPath
+используется только если ничего дешевле не выражает локатор: UiAutomator2
+для XPath сериализует в XML всю иерархию на каждый запрос.
+"""
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass, fields
+from typing import Iterable, List, Optional, Tuple
+
+from appium.webdriver.common.appiumby import AppiumBy as By
+
+
+@dataclass(frozen=True)
+class Locator:
+    id: str = ""                      # resource-id, полный или 'id/x'
+    desc: str = ""                    # content-desc / accessibility id
+    text: str = ""                    # точный текст
+    text_contains: str = ""
+    cls: str = ""                     # класс (android.widget.X / XCUIElementTypeX)
+    clickable: Optional[bool] = None
+    focusable: Optional[bool] = None
+    index: Optional[int] = None       # позиция среди детей родителя, с 0
+    instance: Optional[int] = None    # n-е совпадение по всему экрану, с 0
+    parent: Optional["Locator"] = None
+    xpath: str = ""                   # запасной вариант, если структура не выражается
+    name: str = ""                    # для отчёта
+    platform: str = ""                # 'android' | 'ios' | '' — для любой платформы
+
+    def chain(self) -> List["Locator"]:
+        """От корня к листу."""
+        out, cur = [], self
+        while cur is not None:
+            out.append(cur)
+            cur = cur.parent
+        return out[::-1]
+
+    @property
+    def structural(self) -> bool:
+        return any(
+            getattr(self, f.name) not in ("", None)
+            for f in fields(self) if f.name not in _META
+        )
+
+
+@dataclass(frozen=True)
+class Compiled:
+    by: str
+    value: str
+    strategy: str   # 'id' | 'accessibility_id' | 'uiautomator' | 'class_chain' | 'predicate' | 'xpath'
+
+    def __iter__(self):
+        # распаковка как у кортежа-локатора: by, value = compiled
+        return iter((self.by, self.value))
+
+    @property
+    def cost_ms(self) -> int:
+        return COST_MS[self.strategy]
+
+
+# ориентировочная стоимость одного поиска на типичном экране, мс
+COST_MS = {"id": 30, "accessibility_id": 30, "uiautomator": 60, "class_chain": 80, "predicate": 80, "xpath": 600}
+
+
+class LocatorError(ValueError):
+    pass
+
+
+# поля, не участвующие в поиске
+_META = ("xpath", "name", "parent", "platform")
+
+
+def _q(s: str) -> str:
+    return s.replace("\\", "\\\\").replace('"', '\\"')
+
+
+def _only(loc: Locator, *names: str) -> bool:
+    """Заданы только перечисленные поля (и нет родителя)."""
+    if loc.parent is not None:
+        return False
+    for f in fields(loc):
+        if f.name in _META:
+            continue
+        if (getattr(loc, f.name) not in ("", None)) != (f.name in names):
+            return False
+    return True
+
+
+def _ui_selector(loc: Locator) -> str:
+    s = "new UiSelector()"
+    if loc.id:
+        s += f'.resourceId("{_q(loc.id)}")' if ":" in loc.id else f'.resourceIdMatches(".*:{_q(loc.id)}")'
+    if loc.desc:
+        s += f'.description("{_q(loc.desc)}")'
+    if loc.text:
+        s += f'.text("{_q(loc.text)}")'
+    if loc.text_contains:
+        s += f'.textContains("{_q(loc.text_contains)}")'
+    if loc.cls:
+        s += f'.className("{_q(loc.cls)}")'
+    if loc.clickable is not None:
+        s += f".clickable({str(loc.clickable).lower()})"
+    if loc.focusable is not None:
+        s += f".focusable({str(loc.focusable).lower()})"
+    if loc.index is not None:
+        s += f".index({loc.index})"
+    if loc.instance is not None:
+        s += f".instance({loc.instance})"
+    return s
+
+
+def _android(loc: Locator) -> Optional[Compiled]:
+    if _only(loc, "id") and ":" in loc.id:
+        return Compiled(By.ID, loc.id, "id")
+    if _only(loc, "desc"):
+        return Compiled(By.ACCESSIBILITY_ID, loc.desc, "accessibility_id")
+    chain = loc.chain()
+    if not all(node.structural for node in chain):
+        return None
+    # instance у вложенного селектора ведёт себя неочевидно — только у корня
+    if any(node.instance is not None for node in chain[1:]):
+        return None
+    selector = _ui_selector(chain[-1])
+    for node in reversed(chain[:-1]):
+        selector = f"{_ui_selector(node)}.childSelector({selector})"
+    return Compiled(By.ANDROID_UIAUTOMATOR, selector, "uiautomator")
+
+
+def _class_chain_step(loc: Locator, first: bool) -> Optional[str]:
+    conds = []
+    if loc.id or loc.desc:
+        conds.append(f'name == "{_q(loc.id or loc.desc)}"')
+    if loc.text:
+        conds.append(f'label == "{_q(loc.text)}"')
+    if loc.text_contains:
+        conds.append(f'label CONTAINS "{_q(loc.text_contains)}"')
+    if loc.clickable or loc.focusable:
+        # hittable в class chain недоступен — ближайшее выражаемое
+        conds.append("enabled == 1")
+    step = ("**/" if first or loc.index is None else "") + (loc.cls or "*")
+    if conds:
+        step += "[`" + " AND ".join(conds) + "`]"
+    if loc.index is not None:
+        step += f"[{loc.index + 1}]"
+    if loc.instance is not None:
+        if not first:
+            return None
+        step += f"[{loc.instance + 1}]"
+    return step
+
+
+def _ios(loc: Locator) -> Optional[Compiled]:
+    if _only(loc, "id") or _only(loc, "desc"):
+        return Compiled(By.ACCESSIBILITY_ID, loc.id or loc.desc, "accessibility_id")
+    chain = loc.chain()
+    if not all(node.structural for node in chain):
+        return None
+    steps = []
+    for i, node in enumerate(chain):
+        step = _class_chain_step(node, first=i == 0)
+        if step is None:
+            return None
+        steps.append(step)
+    return Compiled(By.IOS_CLASS_CHAIN, "/".join(steps), "class_chain")
+
+
+def compile_locator(loc: Locator, platform: str) -> Compiled:
+    """Самая дешёвая форма локатора для платформы; XPath — только если иначе никак."""
+    family = "ios" if platform.lower().startswith("ios") else "android"
+    if loc.platform and loc.platform != family:
+        raise LocatorError(f"Локатор {loc.name or loc} только для {loc.platform}")
+    compiled = _ios(loc) if family == "ios" else _android(loc)
+    if compiled:
+        return compiled
+    if loc.xpath:
+        return Compiled(By.XPATH, loc.xpath, "xpath")
+    raise LocatorError(f"Локатор {loc.name or loc} не выражается для {platform} и не имеет xpath")
+
+
+# ---------- отчёт ----------
+
+@dataclass(frozen=True)
+class ReportRow:
+    owner: str
+    attr: str
+    platform: str
+    strategy: str
+    cost_ms: float
+    measured: bool
+    value: str
+
+
+_BY_STRATEGY = {
+    By.ID: "id",
+    By.ACCESSIBILITY_ID: "accessibility_id",
+    By.ANDROID_UIAUTOMATOR: "uiautomator",
+    By.IOS_CLASS_CHAIN: "class_chain",
+    By.IOS_PREDICATE: "predicate",
+    By.XPATH: "xpath",
+}
+
+
+def _screen_locators(screen) -> Iterable[Tuple[str, object]]:
+    """Атрибуты экрана, похожие на локаторы: Locator, (by, value), *_ID и *_XPATH строки."""
+    for attr in dir(screen):
+        if attr.startswith("_"):
+            continue
+        value = getattr(screen, attr, None)
+        if isinstance(value, Locator):
+            yield attr, value
+        elif isinstance(value, tuple) and len(value) == 2 and value[0] in _BY_STRATEGY:
+            yield attr, value
+        elif isinstance(value, str) and attr.endswith("_XPATH"):
+            yield attr, (By.XPATH, value)
+        elif isinstance(value, str) and attr.endswith("_ID") and ":id/" in value:
+            yield attr, Locator(id=value, platform="android")
+
+
+def locator_report(screens, platforms=("android", "ios"), driver=None) -> List[ReportRow]:
+    """
+    Для каждого локатора экранов — во что он компилируется и сколько стоит.
+    С driver стоимость измеряется одним find_elements, без него — оценка COST_MS.
+    """
+    rows: List[ReportRow] = []
+    for screen in screens:
+        for attr, loc in _screen_locators(screen):
+            for platform in platforms:
+                if isinstance(loc, Locator):
+                    try:
+                        compiled = compile_locator(loc, platform)
+                    except LocatorError:
+                        continue
+                else:
+                    compiled = Compiled(loc[0], loc[1], _BY_STRATEGY[loc[0]])
+                cost, measured = float(compiled.cost_ms), False
+                if driver is not None:
+                    start = time.monotonic()
+                    try:
+                        driver.find_elements(compiled.by, compiled.value)
+                        cost, measured = (time.monotonic() - start) * 1000, True
+                    except Exception:
+                        pass
+                rows.append(ReportRow(screen.__name__, attr, platform, compiled.strategy, cost, measured, compiled.value))
+    return rows
+
+
+def format_report(rows: List[ReportRow]) -> str:
+    xpath = [r for r in rows if r.strategy == "xpath"]
+    lines = [f"{'экран.атрибут':45} {'платф.':8} {'стратегия':16} {'мс':>7}"]
+    for r in sorted(rows, key=lambda r: (r.strategy != "xpath", -r.cost_ms)):
+        mark = "" if r.measured else "~"
+        lines.append(f"{r.owner + '.' + r.attr:45} {r.platform:8} {r.strategy:16} {mark}{r.cost_ms:>6.0f}")
+    lines.append(f"\nНа XPath осталось: {len(xpath)} из {len(rows)} (~ — оценка, без устройства)")
+    return "\n".join(lines)
@@ -0,0 +1,63 @@
+# core/media_ledger.py
+"""
+Учёт медиафайлов, которые прогон положил на устройство.
+
+Загрузка (core.device_media) записывает сюда пути, очистка
+(gallery_cleaner.clean_pushed) удаляет только их и перескан делает, только
+если что-то удалила. Учёт — на драйвер (устройство), по каталогам альбомов.
+"""
+from __future__ import annotations
+
+import posixpath
+import threading
+from typing import Dict, Iterable, List, Optional, Set
+
+
+class MediaLedger:
+    _ATTR = "_od_media_ledger"
+
+    def __init__(self):
+        self._dirs: Dict[str, Set[str]] = {}
+        self._lock = threading.Lock()   # записи идут из фоновой очереди media_jobs
+
+    @classmethod
+    def of(cls, driver) -> "MediaLedger":
+        ledger = getattr(driver, cls._ATTR, None)
+        if ledger is None:
+            ledger = cls()
+            try:
+                setattr(driver, cls._ATTR, ledger)
+            except AttributeError:
+                pass
+        return ledger
+
+    def record(self, paths: Iterable[str]) -> None:
+        with self._lock:
+            for path in paths:
+                if path.startswith("/"):   # photos:// (iOS) не удаляется по одному — не учитываем
+                    directory, name = posixpath.split(path)
+                    self._dirs.setdefault(directory, set()).add(name)
+
+    def pending(self, directory: Optional[str] = None) -> List[str]:
+        """Учтённые пути (в каталоге directory или во всех), по порядку имён."""
+        with self._lock:
+            dirs = [directory] if directory else list(self._dirs)
+            return [
+                posixpath.join(d, name)
+                for d in dirs for name in sorted(self._dirs.get(d, ()))
+            ]
+
+    def forget(self, paths: Iterable[str]) -> None:
+        with self._lock:
+            for path in paths:
+                directory, name = posixpath.split(path)
+                names = self._dirs.get(directory)
+                if names:
+                    names.discard(name)
+                    if not names:
+                        del self._dirs[directory]
+
+    def forget_dir(self, directory: str) -> None:
+        """Каталог очищен целиком — учёт по нему больше не нужен."""
+        with self._lock:
+            self._dirs.pop(directory, None)
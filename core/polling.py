@@ -0,0 +1,124 @@
+# core/polling.py
+"""
+Общая политика опроса для Waits, TextFinder и экранов.
+
+Первые проверки идут почти без пауз (простые ожидания завершаются за
+миллисекунды), дальше интервал растёт экспоненциально до потолка, а
+jitter разводит по времени параллельных воркеров на одном Appium.
+"""
+from __future__ import annotations
+
+import logging
+import os
+import random
+import time
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class PollingPolicy:
+    initial: float = 0.05       # пауза после первых быстрых проверок, сек
+    factor: float = 1.7         # рост интервала
+    max_interval: float = 1.0   # потолок интервала, сек
+    jitter: float = 0.15        # разброс ±15% от интервала
+    fast_probes: int = 2        # сколько проверок подряд с паузой initial
+
+    @classmethod
+    def from_env(cls) -> "PollingPolicy":
+        """Переопределение через POLL_INITIAL / POLL_FACTOR / POLL_MAX / POLL_JITTER."""
+        base = cls()
+        return cls(
+            initial=float(os.getenv("POLL_INITIAL", base.initial)),
+            factor=float(os.getenv("POLL_FACTOR", base.factor)),
+            max_interval=float(os.getenv("POLL_MAX", base.max_interval)),
+            jitter=float(os.getenv("POLL_JITTER", base.jitter)),
+            fast_probes=base.fast_probes,
+        )
+
+    @classmethod
+    def fixed(cls, interval: float) -> "PollingPolicy":
+        """Постоянный интервал без jitter (для совместимости со старым poll=...)."""
+        return cls(initial=interval, factor=1.0, max_interval=interval, jitter=0.0, fast_probes=0)
+
+    def intervals(self) -> Iterator[float]:
+        n = 0
+        interval = self.initial
+        while True:
+            n += 1
+            if n > self.fast_probes:
+                interval = min(self.max_interval, interval * self.factor)
+            base = self.initial if n <= self.fast_probes else interval
+            spread = base * self.jitter
+            yield max(0.0, base + random.uniform(-spread, spread))
+
+    def poll(self, timeout: float) -> "Poller":
+        return Poller(timeout, self)
+
+
+@lru_cache(maxsize=1)
+def default_policy() -> PollingPolicy:
+    """Политика из окружения; строится при первом опросе — после load_dotenv в conftest."""
+    return PollingPolicy.from_env()
+
+
+@dataclass(frozen=True)
+class PollStats:
+    polls: int
+    elapsed: float
+    ok: bool
+
+    def __str__(self) -> str:
+        state = "успех" if self.ok else "таймаут"
+        return f"{state}: {self.polls} опрос(ов) за {self.elapsed:.2f}s"
+
+
+class Poller:
+    """
+    Итератор попыток под одним дедлайном:
+
+        poller = Poller(timeout)
+        for _ in poller:
+            if check():
+                break
+        poller.stats(ok)
+
+    Первая попытка выполняется сразу, пауза между попытками не выходит за дедлайн,
+    последняя попытка делается ровно на дедлайне.
+    """
+
+    def __init__(self, timeout: float, policy: Optional[PollingPolicy] = None):
+        self.timeout = max(0.0, float(timeout or 0))
+        self.policy = policy or default_policy()
+        self.polls = 0
+        self.start = time.monotonic()
+        self.deadline = self.start + self.timeout
+
+    def __iter__(self) -> Iterator[int]:
+        self.start = time.monotonic()
+        self.deadline = self.start + self.timeout
+        intervals = self.policy.intervals()
+        while True:
+            self.polls += 1
+            yield self.polls
+            remaining = self.deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            time.sleep(min(next(intervals), remaining))
+
+    @property
+    def remaining(self) -> float:
+        return max(0.0, self.deadline - time.monotonic())
+
+    @property
+    def elapsed(self) -> float:
+        return time.monotonic() - self.start
+
+    def stats(self, ok: bool, what: str = "") -> PollStats:
+        st = PollStats(self.polls, self.elapsed, ok)
+        if what:
+            logger.debug(f"{what}: {st}")
+        return st
@@ -0,0 +1,100 @@
+# core/qr_album.py
+"""
+Альбом заранее загруженных QR-кодов на прогон.
+
+Вместо очистки галереи, рендера и загрузки одного QR на каждый случай
+параметризации все варианты (по одному на kind) загружаются на устройство
+один раз за сессию — одним архивом (device_media.push_files_via_driver).
+Имена детерминированы и сортируются в порядке загрузки:
+
+    qr_01_megapolis.png, qr_02_universal.png, ...
+
+Время файлов убывает по тому же порядку, поэтому в «Недавних» пикера
+qr_01 — первый (index 0), qr_02 — второй и т.д. Тест выбирает свой QR по
+имени (видно в DocumentsUI) или по index (media.module, Google Photos —
+сетка без подписей): PickerScreen.select_image.
+
+Позиция надёжна, только пока альбом — самые новые изображения на
+устройстве: любое более новое фото (другой тест, камера, расхождение часов
+хоста и устройства — время файлов берётся с хоста) сдвигает все index.
+В DocumentsUI поэтому выбор только по имени; в сетках без подписей имя
+проверить нельзя.
+
+Каждый kind получает один счёт на сессию — тест одного kind оплачивает его
+один раз.
+
+Каталог альбома остаётся на устройстве после прогона намеренно: имена
+постоянные, следующая сессия перезаписывает файлы. Очистка в конце модуля
+(gallery_cleaner.clean_pushed по альбому воркера) его не касается, хотя
+загрузка и учтена в MediaLedger.
+"""
+from __future__ import annotations
+
+import logging
+import threading
+from concurrent.futures import Future
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional
+
+from core.device_media import push_files_via_driver
+from core.qr_generator import QrGenerator, QrImage
+from core.session import DeviceSession
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class SeededQr:
+    kind: str
+    name: str       # имя файла на устройстве
+    index: int      # позиция в «Недавних» пикера, 0 — самый новый (см. ограничение выше)
+    image: QrImage
+    device: str     # путь на устройстве (photos://… на iOS)
+
+
+class QrAlbum:
+    def __init__(self, kinds: Iterable[str], album: str, generator: Optional[QrGenerator] = None):
+        self.kinds: List[str] = sorted({k.lower() for k in kinds})
+        self.album = album
+        self._generator = generator
+        self._images: Optional[Dict[str, QrImage]] = None
+        self._seeded: Dict[str, Future] = {}     # устройство → загрузка
+        self._lock = threading.Lock()
+
+    @property
+    def device_dir(self) -> str:
+        return f"/sdcard/Pictures/{self.album}"
+
+    def name(self, kind: str) -> str:
+        return f"qr_{self.kinds.index(kind.lower()) + 1:02d}_{kind.lower()}.png"
+
+    def images(self) -> Dict[str, QrImage]:
+        """QR на сессию: рендерятся один раз, счета общие для всех устройств прогона."""
+        with self._lock:
+            if self._images is None:
+                generator = self._generator or QrGenerator()
+                self._images = {kind: generator.image(kind) for kind in self.kinds}
+            return self._images
+
+    def seed(self, driver, jobs) -> Future:
+        """
+        Загрузка альбома на устройство драйвера — один раз за сессию: файлы переживают
+        смену драйвера между модулями. jobs — очередь BackgroundJobs; повтор после
+        ошибки ставит загрузку заново.
+        """
+        device = DeviceSession.of(driver).udid
+        future = self._seeded.get(device)
+        if future is None or (future.done() and future.exception() is not None):
+            future = jobs.submit(self._push, driver)
+            self._seeded[device] = future
+        return future
+
+    def _push(self, driver) -> Dict[str, SeededQr]:
+        images = self.images()
+        files = [(self.name(kind), images[kind].data) for kind in self.kinds]
+        paths = push_files_via_driver(driver, files, device_dir=self.device_dir, newest_first=True)
+        logger.info(f"Альбом QR: {len(files)} файл(ов) в {self.device_dir}")
+        return {
+            kind: SeededQr(kind, name, i, images[kind], path)
+            for i, (kind, (name, _), path) in enumerate(zip(self.kinds, files, paths))
+        }
@@ -1,17 +1,312 @@
 # core/qr_gen.py
+"""
+Генерация QR-кодов для оплаты.
+
+PNG хранится в кэше по содержимому: ключ — sha256 от URL и параметров
+рендера. Память (LRU: байты + base64) → диск (config/qr_codes/cache, до
+DISK_ITEMS файлов) → рендер. Готовые байты идут на устройство напрямую
+(device_media), без записи и перечитывания файла.
+
+Рендер: выбор маски и матрица модулей считаются NumPy (module_matrix),
+пиксели получаются repeat по осям и сохраняются PIL одним вызовом — без
+отрисовки каждого модуля. Для тысяч
+счетов — QrGenerator.batch, при workers > 1 рендер идёт в пуле процессов.
+"""
+from __future__ import annotations
+
+import base64
+import hashlib
+import io
+import logging
+import os
+import random
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import suppress
+from dataclasses import dataclass
+from functools import cached_property, lru_cache
 from pathlib import Path
-import os, random
+from typing import Dict, Iterable, List, Optional, Tuple
 from urllib.parse import quote
+
 from dotenv import load_dotenv
+import numpy as np
+from PIL import Image
 import qrcode
 from qrcode.constants import ERROR_CORRECT_M
+from qrcode.util import create_data
+
+logger = logging.getLogger(__name__)
+
+ROOT = Path(__file__).resolve().parents[1]
+QR_DIR = ROOT / "config" / "qr_codes"
+
+# размер модуля как был (10 px): меньший сканером приложения не проверялся —
+# уменьшать только после проверки распознавания из галереи на устройстве
+BOX_SIZE = 10
+BORDER = 4
+MEMORY_ITEMS = 64
+# счета со случайным id почти не повторяются — диск держит только последние
+DISK_ITEMS = 256
+
+
+@lru_cache(maxsize=1)
+def _load_env() -> None:
+    # фикстура создаёт генератор на каждый тест — .env читаем один раз на процесс
+    load_dotenv(dotenv_path=ROOT / "config" / ".env")
+
+
+@dataclass
+class QrImage:
+    url: str
+    id: str
+    kind: str
+    data: bytes        # PNG
+    key: str           # ключ кэша (sha256)
+
+    @property
+    def name(self) -> str:
+        return f"{self.kind}_{self.id}.png"
+
+    @cached_property
+    def b64(self) -> str:
+        return base64.b64encode(self.data).decode()
+
+
+class QrCache:
+    """LRU в памяти поверх каталога на диске; общий на процесс — QrCache.shared()."""
+
+    _shared: Optional["QrCache"] = None
+    _shared_lock = threading.Lock()
+
+    def __init__(self, disk_dir: Path | str = QR_DIR / "cache", max_items: int = MEMORY_ITEMS,
+                 max_disk_items: int = DISK_ITEMS):
+        self.disk_dir = Path(disk_dir)
+        self.max_items = max_items
+        self.max_disk_items = max_disk_items
+        self._items: "OrderedDict[str, Tuple[bytes, Optional[str]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = self.disk_hits = self.misses = 0
+
+    @classmethod
+    def shared(cls) -> "QrCache":
+        with cls._shared_lock:
+            if cls._shared is None:
+                cls._shared = cls()
+            return cls._shared
+
+    @staticmethod
+    def key(url: str, box_size: int = BOX_SIZE, border: int = BORDER, ec: int = ERROR_CORRECT_M) -> str:
+        return hashlib.sha256(f"{url}|{box_size}|{border}|{ec}".encode()).hexdigest()
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._items.get(key)
+            if entry:
+                self._items.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+        path = self.disk_dir / f"{key}.png"
+        try:
+            data = path.read_bytes()
+        except OSError:
+            self.misses += 1
+            return None
+        with suppress(OSError):
+            os.utime(path)      # время файла — порядок вытеснения с диска
+        self.disk_hits += 1
+        self._remember(key, data)
+        return data
+
+    def b64(self, key: str, data: bytes) -> str:
+        """base64 PNG; считается один раз на запись."""
+        with self._lock:
+            entry = self._items.get(key)
+            if entry and entry[1] is not None:
+                return entry[1]
+        encoded = base64.b64encode(data).decode()
+        self._remember(key, data, encoded)
+        return encoded
+
+    def put(self, key: str, data: bytes) -> None:
+        self._remember(key, data)
+        try:
+            self.disk_dir.mkdir(parents=True, exist_ok=True)
+            tmp = self.disk_dir / f"{key}.{os.getpid()}.tmp"
+            tmp.write_bytes(data)
+            os.replace(tmp, self.disk_dir / f"{key}.png")
+        except OSError as e:
+            logger.warning(f"Не удалось сохранить QR в кэш на диске: {e}")
+            return
+        self._prune_disk()
+
+    def _prune_disk(self) -> None:
+        """Дисковый уровень — не больше max_disk_items файлов, давно не читанные удаляются."""
+        with suppress(OSError):
+            files = list(self.disk_dir.glob("*.png"))
+            if len(files) <= self.max_disk_items:
+                return
+            by_age = sorted(files, key=lambda f: f.stat().st_mtime)
+            for old in by_age[: len(files) - self.max_disk_items]:
+                # соседний воркер мог удалить его раньше
+                with suppress(OSError):
+                    old.unlink()
+
+    def _remember(self, key: str, data: bytes, encoded: Optional[str] = None) -> None:
+        with self._lock:
+            old = self._items.get(key)
+            self._items[key] = (data, encoded or (old[1] if old else None))
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_items:
+                self._items.popitem(last=False)
+
+
+def _qr(url: str, box_size: int, border: int) -> qrcode.QRCode:
+    qr = qrcode.QRCode(error_correction=ERROR_CORRECT_M, box_size=box_size, border=border)
+    qr.add_data(url)
+    qr.make(fit=True)
+    return qr
+
+
+# ---------- матрица модулей на NumPy ----------
+#
+# qrcode.make() выбирает маску перебором: 8 раз раскладывает данные по матрице
+# и 8 раз считает штраф циклами Python — это ~85% времени генерации. Здесь
+# порядок раскладки считается один раз на версию, биты данных ставятся в
+# матрицу одним присваиванием, 8 вариантов маски получаются XOR'ом массивов,
+# штрафы (те же правила, что util.lost_point) считаются для всех восьми сразу.
+# Результат совпадает с qrcode модуль в модуль.
+
+_P1 = np.array([1, 0, 1, 1, 1, 0, 1, 0, 0, 0, 0], dtype=bool)
+_P2 = _P1[::-1]
+
+
+@lru_cache(maxsize=64)
+def _masks(n: int) -> np.ndarray:
+    """Все 8 масок (util.mask_func) для матрицы n×n: (8, n, n)."""
+    i, j = np.indices((n, n))
+    return np.stack([
+        (i + j) % 2 == 0,
+        i % 2 == 0,
+        j % 3 == 0,
+        (i + j) % 3 == 0,
+        (i // 2 + j // 3) % 2 == 0,
+        (i * j) % 2 + (i * j) % 3 == 0,
+        ((i * j) % 2 + (i * j) % 3) % 2 == 0,
+        ((i * j) % 3 + (i + j) % 2) % 2 == 0,
+    ])
+
+
+@lru_cache(maxsize=None)
+def _function_layer(version: int, test: bool, mask: int) -> Tuple[np.ndarray, np.ndarray]:
+    """(клетки данных, значения служебных узоров) — как makeImpl до map_data."""
+    qr = qrcode.QRCode(version=version, error_correction=ERROR_CORRECT_M)
+    n = qr.modules_count = version * 4 + 17
+    qr.modules = [[None] * n for _ in range(n)]
+    qr.setup_position_probe_pattern(0, 0)
+    qr.setup_position_probe_pattern(n - 7, 0)
+    qr.setup_position_probe_pattern(0, n - 7)
+    qr.setup_position_adjust_pattern()
+    qr.setup_timing_pattern()
+    qr.setup_type_info(test, mask)
+    if version >= 7:
+        qr.setup_type_number(test)
+    free = np.array([[c is None for c in row] for row in qr.modules])
+    fixed = np.array([[bool(c) for c in row] for row in qr.modules])
+    return free, fixed
+
+
+@lru_cache(maxsize=None)
+def _placement(version: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Координаты клеток данных в порядке обхода map_data (змейкой по парам столбцов)."""
+    free, _ = _function_layer(version, True, 0)
+    n = free.shape[0]
+    order: List[Tuple[int, int]] = []
+    inc, row = -1, n - 1
+    for col in range(n - 1, 0, -2):
+        if col <= 6:
+            col -= 1
+        while True:
+            for c in (col, col - 1):
+                if free[row, c]:
+                    order.append((row, c))
+            row += inc
+            if row < 0 or row >= n:
+                row -= inc
+                inc = -inc
+                break
+    rows, cols = np.array(order).T
+    return rows, cols
+
+
+def _lost_points(x: np.ndarray) -> np.ndarray:
+    """Штраф util.lost_point для стопки матриц (k, n, n)."""
+    k, n, _ = x.shape
+    # правило 1: серии одного цвета длиной >= 5 в строках и столбцах
+    lines = np.concatenate([x, x.transpose(0, 2, 1)]).reshape(-1, n)
+    edges = np.ones((lines.shape[0], n + 1), dtype=bool)
+    edges[:, 1:n] = lines[:, 1:] != lines[:, :-1]
+    pos = np.flatnonzero(edges)
+    runs = np.diff(pos)   # на стыке строк выходит серия длины 1 — штрафа не даёт
+    owner = (pos[:-1] // (n + 1)) % (k * n) // n
+    score = np.bincount(owner, weights=np.where(runs >= 5, runs - 2, 0), minlength=k)
+    # правило 2: одноцветные блоки 2×2
+    tl = x[:, :-1, :-1]
+    same = (tl == x[:, 1:, :-1]) & (tl == x[:, :-1, 1:]) & (tl == x[:, 1:, 1:])
+    score += 3 * same.sum(axis=(1, 2))
+    # правило 3: узор 1:1:3:1:1 со светлой зоной в 4 модуля
+    for m in (x, x.transpose(0, 2, 1)):
+        win = np.lib.stride_tricks.sliding_window_view(m, 11, axis=2)
+        score += 40 * ((win == _P1).all(-1) | (win == _P2).all(-1)).sum(axis=(1, 2))
+    # правило 4: отклонение доли тёмных от 50% — в float, как в qrcode
+    dark = x.sum(axis=(1, 2))
+    score += [int(abs(float(d) / (n ** 2) * 100 - 50) / 5) * 10 for d in dark]
+    return score
+
+
+def module_matrix(url: str, border: int = BORDER) -> np.ndarray:
+    """Матрица модулей QR (True — тёмный) с тихой зоной."""
+    qr = qrcode.QRCode(error_correction=ERROR_CORRECT_M)
+    qr.add_data(url)
+    version = qr.best_fit()
+    codewords = create_data(version, qr.error_correction, qr.data_list)
+
+    free, fixed_test = _function_layer(version, True, 0)
+    rows, cols = _placement(version)
+    bits = np.unpackbits(np.asarray(codewords, dtype=np.uint8))[:len(rows)].astype(bool)
+    data = np.zeros_like(free)
+    data[rows[:len(bits)], cols[:len(bits)]] = bits   # оставшиеся клетки — светлые до маски
+
+    masks = _masks(free.shape[0])
+    candidates = np.where(free, data ^ masks, fixed_test)
+    best = int(np.argmin(_lost_points(candidates)))   # первый минимум, как в best_mask_pattern
+    _, fixed = _function_layer(version, False, best)
+    return np.pad(np.where(free, data ^ masks[best], fixed), border)
+
+
+def render_png(url: str, box_size: int = BOX_SIZE, border: int = BORDER) -> bytes:
+    """Матрица модулей (с тихой зоной) → пиксели повтором по осям → 1-битный PNG."""
+    modules = module_matrix(url, border)
+    # тёмный модуль — чёрный пиксель: в режиме '1' это False
+    pixels = ~modules.repeat(box_size, axis=0).repeat(box_size, axis=1)
+    buf = io.BytesIO()
+    Image.fromarray(pixels).save(buf, format="PNG")
+    return buf.getvalue()
+
+
+def render_png_pil(url: str, box_size: int = BOX_SIZE, border: int = BORDER) -> bytes:
+    """Штатный путь qrcode (рисование по модулю) — для сравнения в бенчмарке."""
+    buf = io.BytesIO()
+    _qr(url, box_size, border).make_image().save(buf)
+    return buf.getvalue()
+
 
 class QrGenerator:
-    def __init__(self, out_dir: Path | str = Path("config/qr_codes")):
-        # загрузка .env (один раз — ок)
-        load_dotenv(dotenv_path=Path(__file__).resolve().parents[1] / "config" / ".env")
+    def __init__(self, out_dir: Path | str = QR_DIR, cache: Optional[QrCache] = None):
+        _load_env()
         self.out_dir = Path(out_dir)
-        self.out_dir.mkdir(parents=True, exist_ok=True)
+        self.cache = cache or QrCache.shared()
 
         # шаблоны
         self.tmpl_mega = os.getenv("QR_MEGA_TMPL")
@@ -55,17 +350,54 @@ class QrGenerator:
 
         raise ValueError(f"Неизвестный kind: {kind}")
 
-    def png(self, kind: str, **overrides) -> Path:
+    def image(self, kind: str, **overrides) -> QrImage:
+        """PNG в памяти; повторный запрос того же URL — из кэша, без рендера."""
+        info = self.build_url(kind, **overrides)
+        key = QrCache.key(info["url"])
+        data = self.cache.get(key)
+        if data is None:
+            data = render_png(info["url"])
+            self.cache.put(key, data)
+        image = QrImage(info["url"], info["id"], info["kind"], data, key)
+        # base64 тоже общий на процесс
+        image.b64 = self.cache.b64(key, data)
+        return image
+
+    def batch(self, kind: str, overrides_iter: Iterable[Dict], workers: int = 0,
+              use_cache: bool = True, chunksize: int = 32) -> List[QrImage]:
+        """
+        Много QR одним вызовом, в порядке overrides_iter.
+        workers > 1 — рендер промахов кэша в пуле процессов; use_cache=False — без
+        чтения и записи кэша (тысячи одноразовых счетов не вытесняют рабочие записи).
+        """
+        infos = [self.build_url(kind, **overrides) for overrides in overrides_iter]
+        keys = [QrCache.key(info["url"]) for info in infos]
+        data: List[Optional[bytes]] = [self.cache.get(k) if use_cache else None for k in keys]
+        todo = [i for i, d in enumerate(data) if d is None]
+        urls = [infos[i]["url"] for i in todo]
+
+        if workers > 1 and len(urls) > chunksize:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                rendered = list(pool.map(render_png, urls, chunksize=chunksize))
+        else:
+            rendered = [render_png(url) for url in urls]
+
+        for i, png in zip(todo, rendered):
+            data[i] = png
+            if use_cache:
+                self.cache.put(keys[i], png)
+        return [
+            QrImage(info["url"], info["id"], info["kind"], png, key)
+            for info, key, png in zip(infos, keys, data)
+        ]
+
+    def png(self, kind: str, filename: Optional[str] = None, **overrides) -> Path:
         """
         Сгенерировать PNG для нужного kind, вернуть путь до файла.
         Имя файла включает kind и id (для удобного выбора из галереи).
         """
-        info = self.build_url(kind, **overrides)
-        name = f"{info['kind']}_{info['id']}.png"
-        path = self.out_dir / name
-
-        qr = qrcode.QRCode(error_correction=ERROR_CORRECT_M, box_size=10, border=4)
-        qr.add_data(info["url"])
-        qr.make(fit=True)
-        qr.make_image().save(path)
+        image = self.image(kind, **overrides)
+        self.out_dir.mkdir(parents=True, exist_ok=True)
+        path = self.out_dir / (filename or image.name)
+        path.write_bytes(image.data)
         return path
@@ -0,0 +1,274 @@
+# core/session.py
+"""
+Локальное состояние сессии драйвера.
+
+Implicit wait, размер окна, платформа, capabilities и текущие
+package/activity хранятся на клиенте и запрашиваются у сервера только
+если ещё неизвестны или были сброшены. Экземпляр создаётся в фикстуре
+`driver` (DeviceSession.attach) и достаётся через DeviceSession.of(driver).
+"""
+from __future__ import annotations
+
+import logging
+import os
+import re
+from contextlib import contextmanager
+from typing import Any, Dict, Optional, Tuple
+
+from selenium.common.exceptions import WebDriverException
+
+from core.contexts import ContextCache, NATIVE
+
+logger = logging.getLogger(__name__)
+
+_VERSION_RE = re.compile(r"(versionName|versionCode)=(\S+)")
+
+
+class DeviceSession:
+    _ATTR = "_od_session"
+
+    def __init__(self, driver, implicit_wait: Optional[float] = None):
+        self.driver = driver
+        self._caps: Optional[dict] = None
+        self._implicit: Optional[float] = implicit_wait
+        self._window: Optional[Dict[str, int]] = None
+        self._package: Optional[str] = None
+        self._activity: Optional[str] = None
+        self._package_stale = False
+        self._activity_stale = False
+        self._app_build: Optional[str] = None
+        self._settings: Optional[Dict[str, Any]] = None   # зеркало настроек драйвера (get_settings)
+        # ориентация → {вкладка нижней навигации → bounds}; панель в сессии не двигается
+        self.nav_bounds: Dict[str, Dict[str, Tuple[int, int, int, int]]] = {}
+        # прочие раскладки, неизменные в пределах сессии (клавиатура PIN и т.п.): ключ → данные
+        self.layouts: Dict[tuple, Any] = {}
+        # растёт при каждой замеченной смене приложения/активити
+        self.generation = 0
+
+    @classmethod
+    def attach(cls, driver, implicit_wait: Optional[float] = 0) -> "DeviceSession":
+        """Для свежей сессии: implicit wait по W3C равен 0, запрашивать его не нужно."""
+        session = cls(driver, implicit_wait=implicit_wait)
+        setattr(driver, cls._ATTR, session)
+        return session
+
+    @classmethod
+    def of(cls, driver) -> "DeviceSession":
+        session = getattr(driver, cls._ATTR, None)
+        if session is None:
+            session = cls(driver)
+            try:
+                setattr(driver, cls._ATTR, session)
+            except AttributeError:
+                pass
+        return session
+
+    # ---------- capabilities / платформа ----------
+
+    @property
+    def capabilities(self) -> dict:
+        if self._caps is None:
+            self._caps = dict(getattr(self.driver, "capabilities", None) or {})
+        return self._caps
+
+    @property
+    def platform(self) -> str:
+        """'android' | 'ios' | '' — в нижнем регистре."""
+        return (self.capabilities.get("platformName") or "").lower()
+
+    @property
+    def is_android(self) -> bool:
+        return self.platform.startswith("android")
+
+    @property
+    def is_ios(self) -> bool:
+        return self.platform.startswith("ios")
+
+    @property
+    def udid(self) -> str:
+        return str(self.capabilities.get("udid") or self.capabilities.get("deviceUDID") or "")
+
+    @property
+    def contexts(self) -> ContextCache:
+        return ContextCache.for_driver(self.driver)
+
+    # ---------- implicit wait ----------
+
+    @property
+    def implicit_wait(self) -> float:
+        """Текущий implicit wait, сек; сервер опрашивается один раз."""
+        if self._implicit is None:
+            try:
+                self._implicit = (self.driver.get_settings().get("implicitWaitMs") or 0) / 1000
+            except Exception:
+                self._implicit = 0.0
+        return self._implicit
+
+    def set_implicit_wait(self, seconds: float) -> None:
+        if self._implicit is not None and self._implicit == seconds:
+            return
+        self.driver.implicitly_wait(seconds)
+        self._implicit = seconds
+
+    @contextmanager
+    def implicit_wait_as(self, seconds: float):
+        """Временно сменить implicit wait; если он уже такой — ни одного запроса."""
+        previous = self.implicit_wait
+        try:
+            self.set_implicit_wait(seconds)
+        except Exception:
+            yield
+            return
+        try:
+            yield
+        finally:
+            try:
+                self.set_implicit_wait(previous)
+            except Exception:
+                self._implicit = None
+
+    # ---------- настройки драйвера (UiAutomator2 / XCUITest settings) ----------
+
+    @property
+    def settings(self) -> Dict[str, Any]:
+        """Текущие настройки; сервер опрашивается один раз, дальше — локальное зеркало."""
+        if self._settings is None:
+            try:
+                self._settings = dict(self.driver.get_settings() or {})
+            except WebDriverException as e:
+                logger.debug(f"get_settings недоступен: {e}")
+                self._settings = {}
+        return self._settings
+
+    def update_settings(self, values: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Отправить только отличающиеся значения, одним запросом.
+        Возвращает прежние значения изменённых ключей (для восстановления).
+        """
+        current = self.settings
+        diff = {k: v for k, v in values.items() if k not in current or current[k] != v}
+        if not diff:
+            return {}
+        previous = {k: current[k] for k in diff if k in current}
+        self.driver.update_settings(diff)
+        current.update(diff)
+        logger.debug(f"update_settings {diff}")
+        return previous
+
+    @contextmanager
+    def settings_as(self, values: Dict[str, Any]):
+        """Временно применить настройки; на входе и выходе — не больше одного запроса."""
+        try:
+            previous = self.update_settings(values)
+        except WebDriverException as e:
+            logger.warning(f"Не удалось применить настройки {values}: {e}")
+            yield
+            return
+        try:
+            yield
+        finally:
+            if previous:
+                try:
+                    self.update_settings(previous)
+                except WebDriverException as e:
+                    # зеркало могло разойтись с сервером — перечитаем при следующем обращении
+                    self._settings = None
+                    logger.warning(f"Не удалось восстановить настройки {previous}: {e}")
+
+    # ---------- окно ----------
+
+    def window_size(self) -> Dict[str, int]:
+        if self._window is None:
+            self._window = dict(self.driver.get_window_size())
+        return self._window
+
+    @property
+    def orientation(self) -> str:
+        size = self.window_size()
+        return "LANDSCAPE" if size.get("width", 0) > size.get("height", 0) else "PORTRAIT"
+
+    def invalidate_window(self) -> None:
+        self._window = None
+
+    def tap(self, x: int, y: int) -> None:
+        """Тап по экранным координатам одним запросом (всегда в NATIVE_APP)."""
+        script = "mobile: tap" if self.is_ios else "mobile: clickGesture"
+        try:
+            with self.contexts.within(NATIVE):
+                self.driver.execute_script(script, {"x": int(x), "y": int(y)})
+        finally:
+            self.invalidate_screen()
+
+    # ---------- приложение / активити ----------
+
+    def current_package(self, refresh: bool = False) -> str:
+        if refresh or self._package is None or self._package_stale:
+            try:
+                self.note_package(self.driver.current_package or "")
+            except WebDriverException:
+                return self._package or ""
+        return self._package or ""
+
+    def current_activity(self, refresh: bool = False) -> str:
+        if refresh or self._activity is None or self._activity_stale:
+            try:
+                activity = self.driver.current_activity or ""
+            except WebDriverException:
+                return self._activity or ""
+            if self._activity is not None and activity != self._activity:
+                self._bump(f"activity {self._activity} → {activity}")
+            self._activity = activity
+            self._activity_stale = False
+        return self._activity or ""
+
+    def note_package(self, package: str) -> None:
+        """Пакет, увиденный без отдельного запроса (например, в снимке иерархии)."""
+        if not package:
+            return
+        if self._package is not None and package != self._package:
+            self._activity = None
+            self._bump(f"package {self._package} → {package}")
+        self._package = package
+        self._package_stale = False
+        self.contexts.note_screen(package)
+
+    def invalidate_screen(self) -> None:
+        """
+        После действий, которые могли сменить экран: package/activity перечитываются
+        при следующем обращении. Последние известные значения остаются для сравнения —
+        смена будет замечена и поднимет generation.
+        """
+        self._package_stale = self._activity_stale = True
+        self.contexts.invalidate()
+
+    def _bump(self, why: str) -> None:
+        self.generation += 1
+        self.contexts.invalidate()
+        logger.debug(f"Сессия: поколение экрана {self.generation} ({why})")
+
+    # ---------- версия приложения ----------
+
+    @property
+    def app_build(self) -> str:
+        """
+        Версия тестируемого приложения, определяется один раз за сессию.
+        APP_VERSION из окружения > dumpsys package (Android) > CFBundleVersion из caps (iOS).
+        """
+        if self._app_build:
+            return self._app_build
+
+        build = os.getenv("APP_VERSION", "").strip()
+        caps = self.capabilities
+        if not build and self.is_android:
+            pkg = caps.get("appPackage") or caps.get("appium:appPackage")
+            if pkg:
+                try:
+                    out = self.driver.execute_script("mobile: shell", {"command": "dumpsys", "args": ["package", pkg]})
+                    found = dict(_VERSION_RE.findall(str(out or "")))
+                    build = "+".join(v for v in (found.get("versionName"), found.get("versionCode")) if v)
+                except WebDriverException as e:
+                    logger.debug(f"Версия приложения не получена: {e}")
+        if not build:
+            build = str(caps.get("CFBundleVersion") or caps.get("appVersion") or "unknown")
+        self._app_build = build
+        return build
@@ -0,0 +1,84 @@
+# core/settings_profiles.py
+"""
+Именованные профили настроек драйвера (Appium settings API).
+
+Экран объявляет SETTINGS_PROFILE, BaseScreen.settings_profile() применяет его
+на время шага и восстанавливает прежние значения. Отправляются только
+отличающиеся ключи, одним update_settings на вход и одним на выход.
+
+Ключевое для скорости — waitForIdleTimeout: по умолчанию UiAutomator2 перед
+каждым запросом ждёт до 10 s, пока UI «успокоится». На экранах со спиннерами,
+анимацией и webview этого не происходит никогда, и каждый поиск платит полный
+таймаут. Мы опрашиваем сами (core.polling), поэтому waitForSelectorTimeout тоже 0.
+"""
+from __future__ import annotations
+
+import logging
+from contextlib import contextmanager
+from typing import Any, Dict, Optional
+
+from core.session import DeviceSession
+
+logger = logging.getLogger(__name__)
+
+Settings = Dict[str, Any]
+
+PROFILES: Dict[str, Dict[str, Settings]] = {
+    # webview и анимированные экраны: idle не наступает, ждать его бессмысленно;
+    # важные для DOM узлы не отбрасываем
+    "animated-webview": {
+        "android": {
+            "waitForIdleTimeout": 0,
+            "waitForSelectorTimeout": 0,
+            "ignoreUnimportantViews": False,
+            "allowInvisibleElements": False,
+        },
+        "ios": {
+            "waitForIdleTimeout": 0,
+            "animationCoolOffTimeout": 0,
+        },
+    },
+    # системный пикер: сетка превью с подгрузкой; иерархия глубокая — snapshotMaxDepth
+    # не трогаем, иначе превью пропадут из снимков
+    "picker": {
+        "android": {
+            "waitForIdleTimeout": 0,
+            "waitForSelectorTimeout": 0,
+            "ignoreUnimportantViews": True,
+        },
+        "ios": {
+            "waitForIdleTimeout": 0,
+            "animationCoolOffTimeout": 0,
+        },
+    },
+    # «Платеж в обработке»: спиннер крутится, пока ждём его исчезновения
+    "payment-processing": {
+        "android": {
+            "waitForIdleTimeout": 0,
+            "waitForSelectorTimeout": 0,
+            "allowInvisibleElements": False,
+        },
+        "ios": {
+            "waitForIdleTimeout": 0,
+            "animationCoolOffTimeout": 0,
+        },
+    },
+}
+
+
+def profile_settings(name: str, platform: str) -> Settings:
+    if name not in PROFILES:
+        raise ValueError(f"Неизвестный профиль настроек: {name}")
+    family = "ios" if platform.startswith("ios") else "android"
+    return dict(PROFILES[name].get(family, {}))
+
+
+@contextmanager
+def use_profile(driver, name: Optional[str]):
+    """Применить профиль на время блока; None — ничего не делать."""
+    if not name:
+        yield
+        return
+    session = DeviceSession.of(driver)
+    with session.settings_as(profile_settings(name, session.platform)):
+        yield
@@ -0,0 +1,159 @@
+# core/strategy_cache.py
+"""
+Запоминание успешной стратегии поиска между вызовами и прогонами.
+
+Ключ — (платформа, версия приложения, экран, текст). Для ключа хранится
+стратегия, которая нашла элемент, её время и число попаданий; при
+следующем вызове она пробуется первой. Кэш лежит в config/locator_cache.json,
+записи другой сборки приложения выбрасываются при загрузке.
+
+Файл общий для воркеров xdist: запись идёт под файловой блокировкой и
+сливает свои изменённые записи с тем, что уже на диске, — чужие записи не
+теряются, а после записи в памяти видны и победители соседей.
+"""
+from __future__ import annotations
+
+import atexit
+import fcntl
+import json
+import logging
+import os
+import threading
+from pathlib import Path
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Sequence, Set
+
+from core.session import DeviceSession
+
+logger = logging.getLogger(__name__)
+
+CACHE_PATH = Path(__file__).resolve().parents[1] / "config" / "locator_cache.json"
+
+
+class StrategyCache:
+    """Общий на процесс кэш; экземпляр по пути — StrategyCache.shared()."""
+
+    _instances: Dict[Path, "StrategyCache"] = {}
+    _lock = threading.Lock()
+
+    def __init__(self, path: Path = CACHE_PATH):
+        self.path = Path(path)
+        self._entries: Dict[str, dict] = {}
+        self._changed: Set[str] = set()           # ключи, изменённые с последней записи
+        self._builds: Dict[str, str] = {}          # платформа → текущая сборка (для слияния)
+        self._dirty = False
+        self._entries = self._read()
+
+    @classmethod
+    def shared(cls, path: Path = CACHE_PATH) -> "StrategyCache":
+        with cls._lock:
+            inst = cls._instances.get(Path(path))
+            if inst is None:
+                inst = cls._instances[Path(path)] = cls(path)
+                atexit.register(inst.flush)
+            return inst
+
+    @staticmethod
+    def key(driver, screen: str, text: str) -> str:
+        session = DeviceSession.of(driver)
+        return "|".join((session.platform, session.app_build, screen or "-", text))
+
+    # ---------- чтение/запись ----------
+
+    def _read(self) -> Dict[str, dict]:
+        try:
+            return json.loads(self.path.read_text(encoding="utf-8")).get("entries", {})
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            logger.warning(f"Кэш стратегий повреждён, начинаем заново: {e}")
+            return {}
+
+    @contextmanager
+    def _file_lock(self):
+        """Блокировка между процессами (воркерами xdist) на время чтения-слияния-записи."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path.with_suffix(".lock"), "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    @staticmethod
+    def _stale(key: str, builds: Dict[str, str]) -> bool:
+        platform, _, rest = key.partition("|")
+        return platform in builds and rest.split("|", 1)[0] != builds[platform]
+
+    def flush(self) -> None:
+        """Слить свои изменения с файлом на диске и записать; в памяти — результат слияния."""
+        if not self._dirty:
+            return
+        with self._lock:
+            try:
+                with self._file_lock():
+                    merged = self._read()
+                    merged.update({k: self._entries[k] for k in self._changed if k in self._entries})
+                    merged = {k: v for k, v in merged.items() if not self._stale(k, self._builds)}
+                    tmp = self.path.with_suffix(f".{os.getpid()}.tmp")
+                    tmp.write_text(json.dumps({"entries": merged}, ensure_ascii=False, indent=1), encoding="utf-8")
+                    os.replace(tmp, self.path)
+                self._entries = merged
+                self._changed.clear()
+                self._dirty = False
+            except OSError as e:
+                logger.warning(f"Не удалось сохранить кэш стратегий: {e}")
+
+    def evict_build(self, platform: str, build: str) -> int:
+        """Удалить записи платформы, собранные на другой версии приложения."""
+        self._builds[platform] = build
+        stale = [k for k in self._entries if self._stale(k, self._builds)]
+        for k in stale:
+            del self._entries[k]
+        if stale:
+            self._dirty = True
+            self.flush()
+            logger.info(f"Кэш стратегий: сборка сменилась на {build}, удалено {len(stale)} записей")
+        return len(stale)
+
+    # ---------- использование ----------
+
+    def order(self, key: str, strategies: Sequence[str]) -> List[str]:
+        """Стратегии в порядке проб: известный победитель первым, остальные как были."""
+        entry = self._entries.get(key)
+        winner = entry.get("strategy") if entry else None
+        if winner not in strategies:
+            return list(strategies)
+        return [winner] + [s for s in strategies if s != winner]
+
+    def record(self, key: str, strategy: str, elapsed: float) -> None:
+        ms = round(elapsed * 1000)
+        entry = self._entries.get(key)
+        if entry and entry.get("strategy") == strategy:
+            entry["hits"] = entry.get("hits", 0) + 1
+            entry["ms"] = round((entry.get("ms", ms) + ms) / 2)
+            self._changed.add(key)
+            self._dirty = True
+            return
+        self._entries[key] = {"strategy": strategy, "ms": ms, "hits": 1}
+        self._changed.add(key)
+        self._dirty = True
+        # победитель сменился — сохраняем сразу (со слиянием): соседний воркер увидит
+        # его при своей следующей записи, новый прогон — при загрузке
+        self.flush()
+
+    def get(self, key: str) -> Optional[dict]:
+        return self._entries.get(key)
+
+
+def strategy_cache_for(driver) -> StrategyCache:
+    """Кэш с уже выброшенными записями прежних сборок для платформы драйвера."""
+    cache = StrategyCache.shared()
+    if not getattr(driver, "_od_strategy_evicted", False):
+        session = DeviceSession.of(driver)
+        cache.evict_build(session.platform, session.app_build)
+        try:
+            setattr(driver, "_od_strategy_evicted", True)
+        except AttributeError:
+            pass
+    return cache
@@ -1,12 +1,20 @@
-from contextlib import suppress, contextmanager
-from dataclasses import dataclass
+from contextlib import suppress
+from dataclasses import dataclass, replace
+import os
 import time
 import logging
 from appium.webdriver.common.appiumby import AppiumBy as By
 from selenium.common.exceptions import WebDriverException, StaleElementReferenceException, NoSuchElementException
 from appium.webdriver.webdriver import WebDriver as AppiumWebDriver
 from appium.webdriver.webelement import WebElement as AppiumWebElement
-from typing import Optional
+from typing import Dict, Iterable, List, Optional
+
+from core.contexts import ContextCache, NATIVE
+from core.session import DeviceSession
+from core.polling import Poller, PollingPolicy, PollStats, default_policy
+from core.strategy_cache import StrategyCache, strategy_cache_for
+from core.ui_snapshot import UiSnapshot, UiNode, Bounds
+from core.webview_js import find_in_page
 
 # Настройка логирования
 logger = logging.getLogger(__name__)
@@ -14,14 +22,15 @@ logger = logging.getLogger(__name__)
 
 @dataclass
 class Found:
-    element: AppiumWebElement
+    element: Optional[AppiumWebElement]
     context: str
     driver: AppiumWebDriver
+    bounds: Optional[Bounds] = None  # из снимка иерархии; без element клик идёт тапом по центру
 
     def __post_init__(self):
         """Валидация входных параметров"""
-        if not self.element:
-            raise ValueError("element не может быть None")
+        if not self.element and not self.bounds:
+            raise ValueError("нужен element или bounds")
         if not self.context:
             raise ValueError("context не может быть пустым")
         if not self.driver:
@@ -29,101 +38,168 @@ class Found:
 
     def click(self):
         """Умный клик с переключением контекста и fallback стратегиями"""
+        if self.element is None:
+            self._tap_bounds()
+            return
+
+        ctxs = ContextCache.for_driver(self.driver)
         try:
-            orig = self.driver.current_context
+            ctxs.current
         except WebDriverException as e:
-            if "session" in str(e).lower():
-                raise Exception("WebDriver session закрыта") from e
+            raise Exception("WebDriver session закрыта") from e
+
+        try:
+            with ctxs.within(self.context, strict=False):
+                self._click_element()
+        finally:
+            # клик мог открыть другой экран со своими webview
+            DeviceSession.of(self.driver).invalidate_screen()
+
+    def _click_element(self):
+        try:
+            self.element.click()
+            return
+
+        except StaleElementReferenceException:
+            # элемент пересоздан — предок и rect у него тоже недоступны;
+            # решает вызывающий (например, кэш элементов ищет заново)
             raise
 
-        context_switched = False
+        except WebDriverException:
+            pass
 
-        if orig != self.context:
+        if self.context != NATIVE:
+            # webview: в DOM нет атрибута clickable, а rect — в CSS-пикселях, жест по нему
+            # промахнётся; ближайший кликабельный предок ищем и кликаем через JS
             try:
-                self.driver.switch_to.context(self.context)
-                context_switched = True
-            except WebDriverException as e:
-                logger.warning(f"Не удалось переключиться в контекст {self.context}: {e}")
+                self.driver.execute_script(
+                    "var el = arguments[0];"
+                    "(el.closest('a,button,input,label,select,[role=button],[onclick],[tabindex]') || el).click();",
+                    self.element,
+                )
+                return
+            except WebDriverException as js_error:
+                logger.error(f"Все способы клика провалились: {js_error}")
+                raise Exception("Элемент стал недоступен или все способы клика провалились") from js_error
+
+        # Fallback 1: клик по кликабельному предку
+        with suppress(WebDriverException):
+            self.element.find_element(By.XPATH, "./ancestor::*[@clickable='true'][1]").click()
+            return
+
+        # Fallback 2: жест по центру элемента (в native rect — в пикселях экрана)
+        try:
+            r = self.element.rect
+            x = int(r["x"] + r["width"] / 2)
+            y = int(r["y"] + r["height"] / 2)
 
+            self.driver.execute_script("mobile: clickGesture", {"x": x, "y": y})
+
+        except (StaleElementReferenceException, WebDriverException) as gesture_error:
+            logger.error(f"Все способы клика провалились: {gesture_error}")
+            raise Exception("Элемент стал недоступен или все способы клика провалились") from gesture_error
+
+    def _tap_bounds(self):
+        """Тап по центру bounds из снимка (элемент не резолвился)."""
+        l, t, r, b = self.bounds
         try:
-            self.element.click()
+            DeviceSession.of(self.driver).tap((l + r) // 2, (t + b) // 2)
+        except WebDriverException as e:
+            raise Exception(f"Не удалось тапнуть по координатам {self.bounds}") from e
 
-        except (WebDriverException, StaleElementReferenceException):
-            # Fallback 1: клик по кликабельному предку
-            try:
-                anc = self.element.find_element(By.XPATH, "./ancestor::*[@clickable='true'][1]")
-                anc.click()
 
-            except (Exception, StaleElementReferenceException):
-                # Fallback 2: жест по центру элемента
-                try:
-                    r = self.element.rect
-                    x = int(r["x"] + r["width"] / 2)
-                    y = int(r["y"] + r["height"] / 2)
+@dataclass
+class ExpectResult:
+    """Итог пакетной проверки текстов: карта текст → найден ли он за время ожидания."""
+    mode: str                          # 'all' | 'any' | 'none'
+    results: Dict[str, bool]
+    ok: bool
+    elapsed: float = 0.0
+    polls: int = 0
 
-                    self.driver.execute_script("mobile: clickGesture", {"x": x, "y": y})
+    def __bool__(self) -> bool:
+        return self.ok
 
-                except (StaleElementReferenceException, WebDriverException) as gesture_error:
-                    logger.error(f"Все способы клика провалились: {gesture_error}")
-                    raise Exception("Элемент стал недоступен или все способы клика провалились") from gesture_error
+    @property
+    def found(self) -> List[str]:
+        return [t for t, hit in self.results.items() if hit]
 
-        finally:
-            if context_switched:
-                try:
-                    current_context = self.driver.current_context
-                    if current_context != orig:
-                        self.driver.switch_to.context(orig)
-                except WebDriverException as e:
-                    logger.warning(f"Не удалось вернуться в исходный контекст {orig}: {e}")
+    @property
+    def missing(self) -> List[str]:
+        return [t for t, hit in self.results.items() if not hit]
+
+
+@dataclass
+class GoneResult:
+    """Итог wait_gone: исчез ли текст и сколько это заняло."""
+    text: str
+    ok: bool
+    seen: bool                  # был ли текст на экране хоть раз
+    elapsed: float = 0.0        # от вызова до момента, когда текста не стало
+    visible_for: float = 0.0    # от первого появления до исчезновения
+    polls: int = 0
+    frames: int = 0             # сколько раз снимок действительно менялся
+
+    def __bool__(self) -> bool:
+        return self.ok
 
 
 class TextFinder:
-    def __init__(self, driver, waits, default_timeout: int = 10, poll: float = 0.5):
+    # selector — UiSelector/predicate запросы на каждый опрос (как было);
+    # snapshot — один page_source на опрос, поиск по локальному индексу
+    MODES = ("selector", "snapshot")
+
+    def __init__(self, driver, waits, default_timeout: int = 10, poll: Optional[float] = None,
+                 mode: Optional[str] = None, policy: Optional[PollingPolicy] = None, screen: str = ""):
         self.driver = driver
+        self.screen = screen  # имя экрана — часть ключа в кэше стратегий
         self.waits = waits
         self.default_timeout = default_timeout
-        self.poll = poll
+        # poll=... — фиксированный интервал как раньше; по умолчанию общая политика с backoff
+        self.policy = policy or (PollingPolicy.fixed(poll) if poll else getattr(waits, "policy", None) or default_policy())
+        self.last_stats: Optional[PollStats] = None
+        self.mode = (mode or os.getenv("TEXTFINDER_MODE", "selector")).lower()
+        if self.mode not in self.MODES:
+            raise ValueError(f"Неизвестный режим TextFinder: {self.mode}")
+        self.session = DeviceSession.of(driver)
+        self.contexts = self.session.contexts
+        self.strategies = strategy_cache_for(driver)
+
+    def find_anywhere(self, text: str, timeout: Optional[int] = None, resolve: bool = True) -> Optional[Found]:
+        """
+        Поиск текста в любом доступном контексте (native app или webview).
 
-    def find_anywhere(self, text: str, timeout: Optional[int] = None) -> Optional[Found]:
-        """Поиск текста в любом доступном контексте (native app или webview)"""
+        resolve=False в режиме snapshot не запрашивает WebElement для нативного
+        совпадения — достаточно для проверок присутствия.
+        """
         if not text or not text.strip():
             logger.warning("Пустой текст для поиска")
             return None
 
         t = timeout or self.default_timeout
-        deadline = time.monotonic() + t
-        platform = (self.driver.capabilities.get("platformName") or "").lower()
-
-        try:
-            original_context = getattr(self.driver, "current_context", "NATIVE_APP")
-        except WebDriverException:
-            original_context = "NATIVE_APP"
-
-        while time.monotonic() < deadline:
-            slice_timeout = min(self.poll, max(0.1, deadline - time.monotonic()))
+        platform = self.session.platform
+        use_snapshot = self.mode == "snapshot" and self.contexts.current == NATIVE
 
+        poller = Poller(t, self.policy)
+        for _ in poller:
             # 1) Native поиск
-            if platform.startswith("android"):
-                el = self._find_native_android(text, slice_timeout)
-                if el:
-                    return Found(el, "NATIVE_APP", self.driver)
-            elif platform.startswith("ios"):
-                el = self._find_native_ios(text, slice_timeout)
-                if el:
-                    return Found(el, "NATIVE_APP", self.driver)
+            if use_snapshot:
+                found = self._find_in_snapshot(text, platform, resolve)
             else:
-                el = self._find_native_android(text, slice_timeout) or self._find_native_ios(text, slice_timeout)
-                if el:
-                    return Found(el, "NATIVE_APP", self.driver)
+                el = self._find_native(text, platform)
+                found = Found(el, NATIVE, self.driver) if el else None
 
             # 2) WebView поиск
-            ctx, el = self._find_in_webview(text, slice_timeout, original_context=original_context)
-            if el:
-                return Found(el, ctx, self.driver)
+            if not found:
+                ctx, el = self._find_in_webview(text)
+                found = Found(el, ctx, self.driver) if el else None
 
-            time.sleep(self.poll)
+            if found:
+                self.last_stats = poller.stats(True, f"find_anywhere '{text}'")
+                return found
 
-        logger.warning(f"Элемент не найден за {t}s: '{text}'")
+        self.last_stats = poller.stats(False)
+        logger.warning(f"Элемент не найден за {t}s: '{text}' ({self.last_stats})")
         return None
 
     def find_all_anywhere(self, text: str, timeout=10):
@@ -141,225 +217,447 @@ class TextFinder:
             logger.warning("Пустой текст для поиска")
             return []
 
-        end = time.time() + timeout
         found_elements = []
-        platform = (self.driver.capabilities.get("platformName") or "").lower()
+        platform = self.session.platform
+        original_context = self.contexts.current
 
+        poller = Poller(timeout, self.policy)
         try:
-            original_context = getattr(self.driver, "current_context", "NATIVE_APP")
-        except WebDriverException:
-            original_context = "NATIVE_APP"
+            for _ in poller:
+                # NATIVE_APP первым: переключение в уже активный контекст не отправляется
+                contexts = sorted(self.contexts.contexts(), key=lambda c: c != NATIVE)
+
+                for ctx in contexts:
+                    try:
+                        self.contexts.switch(ctx)
+                    except WebDriverException as e:
+                        logger.warning(f"Не удалось переключиться в контекст {ctx}: {e}")
+                        continue
+
+                    # Ищем элементы в зависимости от контекста
+                    try:
+                        if ctx == NATIVE:
+                            if self.mode == "snapshot":
+                                # все совпадения из одного снимка; элементы не резолвим — клик по bounds
+                                snap = UiSnapshot.capture(self.driver)
+                                found_elements.extend(
+                                    Found(None, ctx, self.driver, bounds=snap.clickable_ancestor(n).bounds)
+                                    for n in snap.find_text(text) if n.has_area
+                                )
+                                continue
+                            # Для Android
+                            if platform.startswith("android"):
+                                q = text.replace('"', r'\"')
+                                ui = f'new UiSelector().textContains("{q}")'
+                                elements = self.driver.find_elements("-android uiautomator", ui)
+                            # Для iOS
+                            elif platform.startswith("ios"):
+                                p = text.replace("'", "\\'")
+                                predicate = f"label CONTAINS[c] '{p}' OR name CONTAINS[c] '{p}' OR value CONTAINS[c] '{p}'"
+                                elements = self.driver.find_elements("-ios predicate string", predicate)
+                            else:
+                                elements = []
+                        else:
+                            # WebView: самые глубокие видимые совпадения одним execute_script
+                            found_elements.extend(Found(m.element, ctx, self.driver) for m in find_in_page(self.driver, text))
+                            continue
 
-        while time.time() < end:
-            # Получаем все доступные контексты
-            try:
-                contexts = list(self.driver.contexts)
-            except WebDriverException:
-                contexts = ["NATIVE_APP"]
+                        # Добавляем только видимые элементы
+                        for element in elements:
+                            try:
+                                if element.is_displayed():
+                                    found_elements.append(Found(element, ctx, self.driver))
+                            except (StaleElementReferenceException, WebDriverException):
+                                continue
 
-            for ctx in contexts:
-                try:
-                    self.driver.switch_to.context(ctx)
-                except WebDriverException as e:
-                    logger.warning(f"Не удалось переключиться в контекст {ctx}: {e}")
-                    continue
+                    except (NoSuchElementException, StaleElementReferenceException, WebDriverException) as e:
+                        logger.debug(f"Ошибка при поиске в контексте {ctx}: {e}")
+                        continue
 
-                # Ищем элементы в зависимости от контекста
-                try:
-                    if ctx == "NATIVE_APP":
-                        # Для Android
-                        if platform.startswith("android"):
-                            q = text.replace('"', r'\"')
-                            ui = f'new UiSelector().textContains("{q}")'
-                            elements = self.driver.find_elements("-android uiautomator", ui)
-                        # Для iOS
-                        elif platform.startswith("ios"):
-                            p = text.replace("'", "\\'")
-                            predicate = f"label CONTAINS[c] '{p}' OR name CONTAINS[c] '{p}' OR value CONTAINS[c] '{p}'"
-                            elements = self.driver.find_elements("-ios predicate string", predicate)
-                        else:
-                            elements = []
-                    else:
-                        # WebView контекст
-                        lit = self._xpath_literal(text)
-                        elements = self.driver.find_elements(By.XPATH, f"//*[contains(normalize-space(), {lit})]")
-
-                    # Добавляем только видимые элементы
-                    for element in elements:
-                        try:
-                            if element.is_displayed():
-                                found_elements.append(Found(element, ctx, self.driver))
-                        except (StaleElementReferenceException, WebDriverException):
-                            continue
+                # Если нашли элементы, возвращаем их
+                if found_elements:
+                    self.last_stats = poller.stats(True, f"find_all_anywhere '{text}'")
+                    return found_elements
 
-                except (NoSuchElementException, StaleElementReferenceException, WebDriverException) as e:
-                    logger.debug(f"Ошибка при поиске в контексте {ctx}: {e}")
-                    continue
+            self.last_stats = poller.stats(False, f"find_all_anywhere '{text}'")
+            return []
+        finally:
+            # Восстанавливаем оригинальный контекст
+            with suppress(WebDriverException):
+                self.contexts.switch(original_context)
 
-            # Если нашли элементы, возвращаем их
-            if found_elements:
-                # Восстанавливаем оригинальный контекст
+    def click_anywhere(self, text: str, timeout: Optional[int] = None) -> bool:
+        """
+        Найти и кликнуть текст. В WEBVIEW поиск и клик выполняются одним
+        execute_script, без отдельного запроса элемента и click.
+        """
+        if not text or not text.strip():
+            return False
+        t = timeout or self.default_timeout
+        platform = self.session.platform
+
+        poller = Poller(t, self.policy)
+        for _ in poller:
+            if self.contexts.current == NATIVE:
+                if self.mode == "snapshot":
+                    found = self._find_in_snapshot(text, platform, resolve=False)
+                else:
+                    el = self._find_native(text, platform)
+                    found = Found(el, NATIVE, self.driver) if el else None
+                if found:
+                    found.click()
+                    self.last_stats = poller.stats(True, f"click_anywhere '{text}'")
+                    return True
+
+            for ctx in self.contexts.webviews():
                 try:
-                    if self.driver.current_context != original_context:
-                        self.driver.switch_to.context(original_context)
+                    with self.contexts.within(ctx):
+                        clicked = find_in_page(self.driver, text, limit=1, click=True)
                 except WebDriverException:
-                    pass
-                return found_elements
-
-            time.sleep(self.poll)
-
-        # Восстанавливаем оригинальный контекст
-        try:
-            if self.driver.current_context != original_context:
-                self.driver.switch_to.context(original_context)
-        except WebDriverException:
-            pass
+                    continue
+                if clicked:
+                    self.session.invalidate_screen()
+                    self.last_stats = poller.stats(True, f"click_anywhere '{text}'")
+                    return True
 
-        return []
+        self.last_stats = poller.stats(False)
+        logger.warning(f"Не удалось кликнуть '{text}' за {t}s")
+        return False
 
     def present_anywhere(self, text: str, timeout: Optional[int] = None) -> bool:
         """Проверка присутствия текста без сохранения ссылки на элемент"""
         original_context = None
         try:
-            original_context = getattr(self.driver, "current_context", "NATIVE_APP")
-            return self.find_anywhere(text, timeout) is not None
+            original_context = self.contexts.current
+            return self.find_anywhere(text, timeout, resolve=False) is not None
         except Exception as e:
             logger.warning(f"Ошибка при проверке присутствия '{text}': {e}")
             return False
         finally:
             if original_context:
                 try:
-                    current = getattr(self.driver, "current_context", None)
-                    if current and current != original_context:
-                        self.driver.switch_to.context(original_context)
+                    self.contexts.switch(original_context)
                 except Exception as e:
                     logger.warning(f"Не удалось восстановить контекст {original_context}: {e}")
 
-    def _find_native_android(self, text: str, timeout: float):
-        end = time.monotonic() + timeout
-        q = (text or "").replace('"', r'\"')
+    EXPECT_MODES = ("all", "any", "none")
+    GONE_MAX_INTERVAL = 0.25
 
-        with self._temporary_implicit_wait(0):
-            while time.monotonic() < end:
-                try:
-                    # Объединённый поиск
-                    ui = f'new UiSelector().textContains("{q}")'
-                    els = self.driver.find_elements("-android uiautomator", ui)
-                    if els:
-                        return els[0]
-
-                    # Запасной регистронезависимый поиск
-                    ui = f'new UiSelector().textMatches("(?i).*{q}.*")'
-                    els = self.driver.find_elements("-android uiautomator", ui)
-                    if els:
-                        return els[0]
+    def expect(self, texts: Iterable[str], mode: str = "all", timeout: Optional[int] = None) -> ExpectResult:
+        """
+        Проверка нескольких текстов в одном цикле опроса с общим таймаутом.
 
-                except WebDriverException:
-                    pass
-                time.sleep(self.poll)
-        return None
+        mode:
+            all  — ждём, пока каждый текст хотя бы раз появится;
+            any  — ждём первый найденный текст;
+            none — ждём, пока ни одного текста не останется на экране.
 
-    def _find_native_ios(self, text: str, timeout: float):
-        """Поиск в нативном iOS UI через предикаты и цепочки классов"""
-        end = time.monotonic() + timeout
-        q = (text or "").strip()
-        if not q:
-            return None
+        За опрос: один снимок native (или по запросу на текст в режиме selector)
+        и один innerText на каждый WEBVIEW. В худшем случае — один таймаут, а не N.
+        """
+        mode = mode.lower()
+        if mode not in self.EXPECT_MODES:
+            raise ValueError(f"Неизвестный режим expect: {mode}")
+        queries = [t for t in dict.fromkeys(texts) if t and t.strip()]
+        results = {t: False for t in queries}
+        if not queries:
+            return ExpectResult(mode, results, ok=mode == "none")
 
-        p = q.replace("'", "\\'")
-        predicate = (
-            f"label CONTAINS[c] '{p}' OR "
-            f"name CONTAINS[c] '{p}'  OR "
-            f"value CONTAINS[c] '{p}'"
-        )
-        class_chain = f"**/XCUIElementTypeAny[`{predicate}`]"
+        t = timeout or self.default_timeout
+        platform = self.session.platform
+
+        poller = Poller(t, self.policy)
+        for _ in poller:
+            # для all/any найденное запоминаем; для none нужен текущий кадр
+            pending = [q for q in queries if mode == "none" or not results[q]]
+            present = self._present_native(pending, platform)
+            rest = [q for q in pending if q not in present]
+            if rest:
+                present |= self._present_in_webviews(rest)
+            for q in pending:
+                results[q] = q in present
+
+            if mode == "all":
+                ok = all(results.values())
+            elif mode == "any":
+                ok = any(results.values())
+            else:
+                ok = not any(results.values())
 
-        while time.monotonic() < end:
-            try:
-                els = self.driver.find_elements(By.ACCESSIBILITY_ID, q)
-                if els:
-                    return els[0]
+            if ok:
+                break
 
-                els = self.driver.find_elements("-ios predicate string", predicate)
-                if els:
-                    return els[0]
+        self.last_stats = poller.stats(ok, f"expect_{mode}")
+        if not ok:
+            logger.warning(f"expect_{mode} не выполнено за {t}s: {results}")
+        return ExpectResult(mode, results, ok, elapsed=self.last_stats.elapsed, polls=self.last_stats.polls)
 
-                els = self.driver.find_elements("-ios class chain", class_chain)
-                if els:
-                    return els[0]
+    def expect_all(self, texts: Iterable[str], timeout: Optional[int] = None) -> ExpectResult:
+        return self.expect(texts, "all", timeout)
 
-            except WebDriverException:
-                pass
+    def expect_any(self, texts: Iterable[str], timeout: Optional[int] = None) -> ExpectResult:
+        return self.expect(texts, "any", timeout)
 
-            time.sleep(self.poll)
-        return None
+    def expect_none(self, texts: Iterable[str], timeout: Optional[int] = None) -> ExpectResult:
+        return self.expect(texts, "none", timeout)
 
-    @contextmanager
-    def _temporary_implicit_wait(self, seconds: float):
-        """Временно меняет implicit wait, чтобы обходные поиски не зависали на секунды."""
-        original_ms = None
-        driver = self.driver
-        try:
-            original_ms = driver.get_settings().get("implicitWaitMs")
-        except Exception:
-            pass
+    def wait_gone(self, text: str, timeout: Optional[int] = None, appear_timeout: float = 0) -> GoneResult:
+        """
+        Ждёт, пока текст перестанет отображаться (спиннеры, «Платеж в обработке»).
 
-        try:
-            driver.implicitly_wait(seconds)
-        except Exception:
-            yield
+        За опрос — один page_source (если драйвер в NATIVE_APP) и один innerText на
+        WEBVIEW. Снимок сравнивается с предыдущим: если он не изменился, текст
+        заведомо на месте и повторный разбор не нужен. Возврат — на первом кадре
+        без текста.
+
+        appear_timeout > 0: сначала до этого времени ждём появления текста;
+        если он так и не появился — считаем, что уже исчез.
+        """
+        q = (text or "").strip()
+        if not q:
+            return GoneResult(text, ok=True, seen=False)
+
+        t = timeout or self.default_timeout
+        needle = q.casefold()
+        frames: Dict[str, tuple] = {}  # контекст → (hash снимка, был ли в нём текст)
+        seen_at: Optional[float] = None
+        changed = 0
+        gone = False
+
+        # неизменившийся кадр не разбирается, поэтому опрашиваем чаще обычного:
+        # момент исчезновения замечается с задержкой не больше GONE_MAX_INTERVAL
+        policy = replace(self.policy, max_interval=min(self.policy.max_interval, self.GONE_MAX_INTERVAL))
+        poller = Poller(t + appear_timeout, policy)
+        for _ in poller:
+            present, n = self._rendered(q, needle, frames)
+            changed += n
+            if present:
+                if seen_at is None:
+                    seen_at = poller.elapsed
+                continue
+            if seen_at is not None or poller.elapsed >= appear_timeout:
+                # исчез, либо так и не появился за appear_timeout
+                gone = True
+                break
+
+        self.last_stats = poller.stats(gone, f"wait_gone '{q}'")
+        elapsed = self.last_stats.elapsed
+        result = GoneResult(
+            text, gone, seen=seen_at is not None, elapsed=elapsed,
+            visible_for=elapsed - seen_at if seen_at is not None else 0.0,
+            polls=self.last_stats.polls, frames=changed,
+        )
+        if gone:
+            logger.info(f"'{q}' исчез через {elapsed:.2f}s ({result.polls} опрос(ов), {result.frames} кадр(ов))")
         else:
+            logger.warning(f"'{q}' не исчез за {t}s ({self.last_stats})")
+        return result
+
+    def _rendered(self, text: str, needle: str, frames: Dict[str, tuple]) -> tuple[bool, int]:
+        """
+        Есть ли текст на экране сейчас. Для каждого контекста берётся сырой снимок
+        (page_source / innerText); если его hash совпал с прошлым опросом, берём
+        прошлый ответ без разбора. Возвращает (есть ли текст, сколько кадров изменилось).
+        """
+        changed = 0
+
+        def check(ctx: str, raw: str, test) -> bool:
+            nonlocal changed
+            h = hash(raw)
+            prev = frames.get(ctx)
+            if prev and prev[0] == h:
+                return prev[1]
+            hit = test(raw)
+            frames[ctx] = (h, hit)
+            changed += 1
+            return hit
+        try:
+            native = self.contexts.current == NATIVE
+        except WebDriverException:
+            native = False
+        if native:
+            try:
+                source = self.driver.page_source or ""
+            except WebDriverException as e:
+                logger.debug(f"page_source недоступен: {e}")
+            else:
+                def in_source(raw: str) -> bool:
+                    snap = UiSnapshot.parse(raw)
+                    self.session.note_package(snap.package)
+                    return snap.has_text(text)
+                if check(NATIVE, source, in_source):
+                    return True, changed
+
+        for ctx in self.contexts.webviews():
             try:
-                yield
-            finally:
-                restore = (original_ms or 0) / 1000 if original_ms is not None else 0
-                with suppress(Exception):
-                    driver.implicitly_wait(restore)
+                with self.contexts.within(ctx):
+                    inner = self.driver.execute_script("return document.body?.innerText || '';") or ""
+            except WebDriverException:
+                continue
+            if check(ctx, inner, lambda raw: needle in raw.casefold()):
+                return True, changed
+        return False, changed
+
+    def present_now(self, texts: Iterable[str]) -> set:
+        """Какие из текстов на экране в этот момент — одна проверка без ожидания (для Waits.any_of)."""
+        queries = [t for t in dict.fromkeys(texts) if t and t.strip()]
+        present = self._present_native(queries, self.session.platform)
+        rest = [q for q in queries if q not in present]
+        if rest:
+            present |= self._present_in_webviews(rest)
+        return present
+
+    def _present_native(self, texts: List[str], platform: str) -> set:
+        """Какие из текстов есть в нативном UI прямо сейчас (без ожидания)."""
+        if not texts:
+            return set()
+        try:
+            if self.contexts.current != NATIVE:
+                return set()
+        except WebDriverException:
+            return set()
 
-    @staticmethod
-    def _xpath_literal(s: str) -> str:
-        if "'" not in s:
-            return f"'{s}'"
-        if '"' not in s:
-            return f'"{s}"'
-        parts = s.split("'")
-        return "concat(" + ", \"'\", ".join(f"'{p}'" for p in parts) + ")"
+        if self.mode == "snapshot":
+            try:
+                snap = UiSnapshot.capture(self.driver)
+            except WebDriverException:
+                return set()
+            return {t for t in texts if snap.has_text(t)}
 
-    def _find_in_webview(self, text: str, timeout: float, original_context: str | None = None) -> tuple[
-        Optional[str], Optional[AppiumWebElement]]:
+        present = set()
+        with self.session.implicit_wait_as(0):
+            for t in texts:
+                try:
+                    if platform.startswith("ios"):
+                        p = t.strip().replace("'", "\\'")
+                        predicate = f"label CONTAINS[c] '{p}' OR name CONTAINS[c] '{p}' OR value CONTAINS[c] '{p}'"
+                        hit = self.driver.find_elements("-ios predicate string", predicate)
+                    else:
+                        q = t.replace('"', r'\"')
+                        hit = self.driver.find_elements("-android uiautomator", f'new UiSelector().textContains("{q}")') \
+                            or self.driver.find_elements("-android uiautomator", f'new UiSelector().textMatches("(?i).*{q}.*")')
+                except WebDriverException:
+                    hit = None
+                if hit:
+                    present.add(t)
+        return present
+
+    def _present_in_webviews(self, texts: List[str]) -> set:
+        """Один innerText на каждый WEBVIEW-контекст, проверка всех текстов локально."""
+        present = set()
+        for ctx in self.contexts.webviews():
+            try:
+                with self.contexts.within(ctx):
+                    inner = (self.driver.execute_script("return document.body?.innerText || '';") or "").casefold()
+            except WebDriverException:
+                continue
+            present |= {t for t in texts if t.strip().casefold() in inner}
+            if len(present) == len(texts):
+                break
+        return present
+
+    def _find_in_snapshot(self, text: str, platform: str, resolve: bool = True) -> Optional[Found]:
+        """Один page_source на опрос; WebElement запрашивается только при совпадении."""
+        try:
+            snap = UiSnapshot.capture(self.driver)
+        except WebDriverException as e:
+            logger.debug(f"page_source недоступен: {e}")
+            return None
+        self.session.note_package(snap.package)
 
-        driver = self.driver
-        orig = getattr(driver, "current_context", "NATIVE_APP")
-        deadline = time.monotonic() + timeout
-        q = text.strip()
+        nodes = [n for n in snap.find_text(text) if n.has_area]
+        if not nodes:
+            return None
+        node = nodes[0]
+        target = snap.clickable_ancestor(node)
+        el = self._resolve_node(snap, node, platform) if resolve else None
+        return Found(el, "NATIVE_APP", self.driver, bounds=target.bounds)
 
+    def _resolve_node(self, snap: UiSnapshot, node: UiNode, platform: str) -> Optional[AppiumWebElement]:
+        """Точечный запрос элемента по атрибутам узла из снимка (один find_elements)."""
         try:
-            contexts = list(driver.contexts)
+            if platform.startswith("ios"):
+                if node.desc:
+                    els = self.driver.find_elements(By.ACCESSIBILITY_ID, node.desc)
+                else:
+                    p = node.text.replace("'", "\\'")
+                    els = self.driver.find_elements("-ios predicate string", f"label == '{p}' OR value == '{p}'")
+                return els[0] if els else None
+
+            # instance() считаем по тем же атрибутам, что попали в селектор
+            attr, value, sel = ("text", node.text, "text") if node.text else ("desc", node.desc, "description")
+            ui = f'new UiSelector().{sel}("{self._ui_escape(value)}")'
+            if node.rid:
+                ui += f'.resourceId("{self._ui_escape(node.rid)}")'
+            key = lambda n: (getattr(n, attr), n.rid if node.rid else None)
+            ui += f".instance({snap.instance_of(node, key)})"
+            with self.session.implicit_wait_as(0):
+                els = self.driver.find_elements("-android uiautomator", ui)
+            return els[0] if els else None
+        except WebDriverException as e:
+            logger.debug(f"Не удалось получить элемент для узла снимка: {e}")
+            return None
 
-            for ctx in contexts:
-                if not str(ctx).startswith("WEBVIEW"):
+    @staticmethod
+    def _ui_escape(s: str) -> str:
+        return s.replace("\\", "\\\\").replace('"', r'\"')
+
+    def _find_native(self, text: str, platform: str):
+        """
+        Одна проверка native UI (без ожидания); паузы между проверками задаёт Poller.
+        Стратегии пробуются в порядке из кэша: прошлый победитель для этого текста — первым.
+        """
+        strategies = self._native_strategies(text, platform)
+        if not strategies:
+            return None
+        key = StrategyCache.key(self.driver, self.screen, text)
+        with self.session.implicit_wait_as(0):
+            for name in self.strategies.order(key, list(strategies)):
+                by, value = strategies[name]
+                start = time.monotonic()
+                try:
+                    els = self.driver.find_elements(by, value)
+                except WebDriverException:
                     continue
+                if els:
+                    self.strategies.record(key, name, time.monotonic() - start)
+                    return els[0]
+        return None
 
-                driver.switch_to.context(ctx)
+    def _native_strategies(self, text: str, platform: str) -> Dict[str, tuple]:
+        strategies: Dict[str, tuple] = {}
+        if not platform.startswith("ios"):
+            q = (text or "").replace('"', r'\"')
+            # Объединённый поиск, затем запасной регистронезависимый
+            strategies["textContains"] = ("-android uiautomator", f'new UiSelector().textContains("{q}")')
+            strategies["textMatches"] = ("-android uiautomator", f'new UiSelector().textMatches("(?i).*{q}.*")')
+        if not platform.startswith("android"):
+            # iOS: accessibility id → предикат → цепочка классов
+            q = (text or "").strip()
+            if q:
+                p = q.replace("'", "\\'")
+                predicate = (
+                    f"label CONTAINS[c] '{p}' OR "
+                    f"name CONTAINS[c] '{p}'  OR "
+                    f"value CONTAINS[c] '{p}'"
+                )
+                strategies["accessibility_id"] = (By.ACCESSIBILITY_ID, q)
+                strategies["predicate"] = ("-ios predicate string", predicate)
+                strategies["class_chain"] = ("-ios class chain", f"**/XCUIElementTypeAny[`{predicate}`]")
+        return strategies
+
+    def _find_in_webview(self, text: str) -> tuple[Optional[str], Optional[AppiumWebElement]]:
+        driver = self.driver
+        q = text.strip()
 
-                try:
-                    inner = driver.execute_script("return document.body?.innerText || '';")
-                    if q.casefold() in inner.casefold():
-                        lit = self._xpath_literal(q)
-                        els = driver.find_elements(By.XPATH, f"//*[contains(normalize-space(), {lit})]")
-                        if els:
-                            found_ctx = driver.current_context
-                            driver.switch_to.context(orig)
-                            return found_ctx, els[0]
-                except Exception:
-                    pass
-
-                if time.monotonic() > deadline:
-                    break
-
-            return None, None
+        # список webview берётся из кэша; нет webview — нет и переключений
+        for ctx in self.contexts.webviews():
+            try:
+                with self.contexts.within(ctx):
+                    matches = find_in_page(driver, q, limit=1)
+                if matches:
+                    return ctx, matches[0].element
+            except Exception:
+                pass
 
-        finally:
-            if getattr(driver, "current_context", None) != orig:
-                with suppress(Exception):
-                    driver.switch_to.context(orig)
+        return None, None
@@ -0,0 +1,193 @@
+# core/transfer.py
+"""
+Передача файлов на устройство: подключаемые способы.
+
+    appium — driver.push_file: base64 в JSON (+~33% к объёму) через сервер Appium;
+             работает всегда, в том числе с удалённым Appium.
+    adb    — локальный `adb -s <udid> push`: байты как есть, без сервера.
+    auto   — adb, если он есть и видит устройство, а файл не меньше AUTO_MIN_BYTES;
+             иначе appium (для мелочи запуск процесса adb дороже base64).
+
+QR-коды (единицы КБ) и архив альбома из пары PNG меньше порога — auto для
+них всегда выбирает appium; adb окупается только на крупных медиа.
+
+Способ по умолчанию — переменная MEDIA_TRANSFER (auto). Каждая передача
+пишется в лог и в TRANSFER_STATS с пропускной способностью. Под xdist
+статистика живёт в воркерах: export_stats/import_stats передают её
+контроллеру через workeroutput.
+"""
+from __future__ import annotations
+
+import base64
+import logging
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+from contextlib import suppress
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import List
+
+from core.session import DeviceSession
+
+logger = logging.getLogger(__name__)
+
+AUTO_MIN_BYTES = 64 * 1024
+ADB_TIMEOUT = 60
+
+
+@dataclass(frozen=True)
+class TransferStat:
+    backend: str
+    path: str
+    size: int
+    elapsed: float
+
+    @property
+    def mb_per_s(self) -> float:
+        return self.size / 1e6 / self.elapsed if self.elapsed > 0 else 0.0
+
+    def __str__(self) -> str:
+        return f"{self.backend:6} {self.size / 1024:8.1f} KB  {self.elapsed:6.3f}s  {self.mb_per_s:6.2f} MB/s  {self.path}"
+
+
+TRANSFER_STATS: List[TransferStat] = []
+_stats_lock = threading.Lock()
+
+
+class TransferError(RuntimeError):
+    pass
+
+
+def worker_udid() -> str:
+    """Запись ANDROID_UDIDS для текущего воркера xdist (gw0 → первая)."""
+    udids = [u.strip() for u in os.getenv("ANDROID_UDIDS", "").split(",") if u.strip()]
+    worker = os.getenv("PYTEST_XDIST_WORKER", "gw0")
+    idx = int(worker[2:]) if worker[2:].isdigit() else 0
+    return udids[idx] if idx < len(udids) else ""
+
+
+@lru_cache(maxsize=None)
+def _adb_sees(udid: str) -> bool:
+    """Один раз на устройство: есть ли adb и отвечает ли устройство."""
+    if not udid or not shutil.which("adb"):
+        return False
+    try:
+        out = subprocess.run(["adb", "-s", udid, "get-state"], capture_output=True, text=True, timeout=10)
+    except (OSError, subprocess.TimeoutExpired):
+        return False
+    return out.returncode == 0 and out.stdout.strip() == "device"
+
+
+class AppiumTransfer:
+    name = "appium"
+
+    def __init__(self, driver):
+        self.driver = driver
+
+    def push(self, device_path: str, data: bytes, b64: str | None = None) -> None:
+        self.driver.push_file(device_path, b64 or base64.b64encode(data).decode())
+
+
+class AdbTransfer:
+    name = "adb"
+
+    def __init__(self, udid: str):
+        if not udid:
+            raise TransferError("Для adb не известен udid устройства")
+        self.udid = udid
+
+    def push(self, device_path: str, data: bytes, b64: str | None = None) -> None:
+        # adb push читает только файл — временный, рядом с байтами из памяти
+        fd, tmp = tempfile.mkstemp(suffix=os.path.splitext(device_path)[1])
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            out = subprocess.run(
+                ["adb", "-s", self.udid, "push", tmp, device_path],
+                capture_output=True, text=True, timeout=ADB_TIMEOUT,
+            )
+        except (OSError, subprocess.TimeoutExpired) as e:
+            raise TransferError(f"adb push {device_path}: {e}") from e
+        finally:
+            with suppress(OSError):
+                os.unlink(tmp)
+        if out.returncode != 0:
+            raise TransferError(f"adb push {device_path}: {(out.stderr or out.stdout).strip()[:300]}")
+
+
+def _udid(driver) -> str:
+    return DeviceSession.of(driver).udid or worker_udid()
+
+
+def _mode(mode: str | None) -> str:
+    return (mode or os.getenv("MEDIA_TRANSFER", "auto")).strip().lower()
+
+
+def backend_for(driver, size: int, mode: str | None = None):
+    """Способ передачи для файла размера size: appium | adb | auto."""
+    mode = _mode(mode)
+    if mode == "appium":
+        return AppiumTransfer(driver)
+    if mode == "adb":
+        return AdbTransfer(_udid(driver))
+    if mode != "auto":
+        raise ValueError(f"Неизвестный способ передачи: {mode}")
+    udid = _udid(driver)
+    if size >= AUTO_MIN_BYTES and _adb_sees(udid):
+        return AdbTransfer(udid)
+    return AppiumTransfer(driver)
+
+
+def push_bytes(driver, device_path: str, data: bytes, mode: str | None = None,
+               b64: str | None = None) -> TransferStat:
+    """
+    Передать байты выбранным способом; в auto при ошибке adb — повтор через Appium.
+    b64 — уже закодированные данные (из кэша), пригодятся, если выбран Appium.
+    """
+    mode = _mode(mode)
+    backend = backend_for(driver, len(data), mode)
+    start = time.monotonic()
+    try:
+        backend.push(device_path, data, b64)
+    except TransferError as e:
+        if mode != "auto":
+            raise
+        logger.warning(f"Передача через adb не удалась, повтор через Appium: {e}")
+        backend = AppiumTransfer(driver)
+        start = time.monotonic()
+        backend.push(device_path, data, b64)
+    stat = TransferStat(backend.name, device_path, len(data), time.monotonic() - start)
+    with _stats_lock:
+        TRANSFER_STATS.append(stat)
+    logger.info(f"Передача: {stat}")
+    return stat
+
+
+def export_stats() -> List[tuple]:
+    """Статистика процесса простыми кортежами — для передачи из воркера xdist."""
+    with _stats_lock:
+        return [(s.backend, s.path, s.size, s.elapsed) for s in TRANSFER_STATS]
+
+
+def import_stats(rows: List[tuple]) -> None:
+    """Добавить статистику, полученную от воркера."""
+    with _stats_lock:
+        TRANSFER_STATS.extend(TransferStat(*row) for row in rows)
+
+
+def transfer_report() -> str:
+    """Сводка по способам: число передач, объём, средняя пропускная способность."""
+    with _stats_lock:
+        stats = list(TRANSFER_STATS)
+    lines = []
+    for name in sorted({s.backend for s in stats}):
+        rows = [s for s in stats if s.backend == name]
+        size = sum(s.size for s in rows)
+        elapsed = sum(s.elapsed for s in rows)
+        rate = size / 1e6 / elapsed if elapsed > 0 else 0.0
+        lines.append(f"{name:6} {len(rows):4d} передач  {size / 1024:9.1f} KB  {elapsed:7.2f}s  {rate:6.2f} MB/s")
+    return "\n".join(lines)
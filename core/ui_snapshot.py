@@ -0,0 +1,252 @@
+# core/ui_snapshot.py
+"""
+Снимок нативной иерархии (page_source), разобранный локально.
+
+Один HTTP-запрос `GET /source` на опрос вместо нескольких UiSelector/predicate
+запросов: дерево разбирается потоковым парсером, по text / content-desc /
+resource-id строится индекс, и все поиски внутри опроса отвечаются из памяти.
+Поддерживаются форматы UiAutomator2 (Android) и XCUITest (iOS).
+"""
+from __future__ import annotations
+
+import io
+import logging
+import re
+import time
+import xml.etree.ElementTree as ET
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+Bounds = Tuple[int, int, int, int]  # left, top, right, bottom
+
+_BOUNDS_RE = re.compile(r"\[(-?\d+),(-?\d+)\]\[(-?\d+),(-?\d+)\]")
+
+
+@dataclass(frozen=True)
+class UiNode:
+    """Один узел иерархии с нужными для поиска и тапа атрибутами."""
+    idx: int
+    parent: int          # индекс родителя в UiSnapshot.nodes, -1 для корня
+    depth: int
+    cls: str
+    text: str
+    desc: str
+    rid: str
+    package: str
+    bounds: Optional[Bounds]
+    clickable: bool
+    enabled: bool
+    selected: bool
+    displayed: bool
+
+    @property
+    def center(self) -> Optional[Tuple[int, int]]:
+        if not self.bounds:
+            return None
+        l, t, r, b = self.bounds
+        return (l + r) // 2, (t + b) // 2
+
+    @property
+    def has_area(self) -> bool:
+        return bool(self.bounds) and self.bounds[2] > self.bounds[0] and self.bounds[3] > self.bounds[1]
+
+
+def _flag(attrs: dict, name: str, default: bool = False) -> bool:
+    v = attrs.get(name)
+    if v is None:
+        return default
+    return v.strip().lower() in ("true", "1")
+
+
+def _android_bounds(raw: Optional[str]) -> Optional[Bounds]:
+    if not raw:
+        return None
+    m = _BOUNDS_RE.match(raw)
+    return tuple(int(g) for g in m.groups()) if m else None
+
+
+def _ios_bounds(attrs: dict) -> Optional[Bounds]:
+    try:
+        x, y = int(float(attrs["x"])), int(float(attrs["y"]))
+        w, h = int(float(attrs["width"])), int(float(attrs["height"]))
+    except (KeyError, ValueError):
+        return None
+    return x, y, x + w, y + h
+
+
+class UiSnapshot:
+    """Разобранная иерархия + индекс text/content-desc/resource-id → узлы."""
+
+    def __init__(self, nodes: List[UiNode], source_len: int = 0, elapsed: float = 0.0):
+        self.nodes = nodes
+        self.source_len = source_len
+        self.elapsed = elapsed   # время GET /source + разбора, сек
+        self._by_text: Dict[str, List[int]] = {}
+        self._by_desc: Dict[str, List[int]] = {}
+        self._by_rid: Dict[str, List[int]] = {}
+        for n in nodes:
+            if n.text:
+                self._by_text.setdefault(n.text.casefold(), []).append(n.idx)
+            if n.desc:
+                self._by_desc.setdefault(n.desc.casefold(), []).append(n.idx)
+            if n.rid:
+                self._by_rid.setdefault(n.rid, []).append(n.idx)
+
+    # ---------- построение ----------
+
+    @classmethod
+    def capture(cls, driver) -> "UiSnapshot":
+        """Один GET /source и локальный разбор. Драйвер должен быть в NATIVE_APP."""
+        start = time.monotonic()
+        source = driver.page_source or ""
+        snap = cls.parse(source)
+        snap.elapsed = time.monotonic() - start
+        logger.debug(f"Снимок иерархии: {len(snap.nodes)} узлов, {len(source)} симв., {snap.elapsed:.3f}s")
+        return snap
+
+    @classmethod
+    def parse(cls, source: str) -> "UiSnapshot":
+        """Потоковый разбор XML: элементы очищаются сразу после обработки."""
+        nodes: List[UiNode] = []
+        stack: List[int] = []
+        data = source.encode("utf-8") if isinstance(source, str) else source
+        try:
+            for event, elem in ET.iterparse(io.BytesIO(data), events=("start", "end")):
+                if event == "end":
+                    if stack:
+                        stack.pop()
+                    elem.clear()
+                    continue
+
+                attrs = elem.attrib
+                if elem.tag != "hierarchy" and ("bounds" in attrs or "class" in attrs):
+                    node = cls._android_node(len(nodes), stack, attrs, elem.tag)
+                elif "type" in attrs and ("x" in attrs or "name" in attrs or "label" in attrs):
+                    node = cls._ios_node(len(nodes), stack, attrs)
+                else:
+                    # служебный узел (<hierarchy>, <AppiumAUT>) — в индекс не попадает
+                    stack.append(-1)
+                    continue
+                nodes.append(node)
+                stack.append(node.idx)
+        except ET.ParseError as e:
+            logger.warning(f"Не удалось разобрать page_source: {e}")
+        return cls(nodes, source_len=len(data))
+
+    @staticmethod
+    def _parent(stack: List[int]) -> int:
+        for i in reversed(stack):
+            if i >= 0:
+                return i
+        return -1
+
+    @classmethod
+    def _android_node(cls, idx: int, stack: List[int], a: dict, tag: str) -> UiNode:
+        return UiNode(
+            idx=idx,
+            parent=cls._parent(stack),
+            depth=len(stack),
+            cls=a.get("class") or tag,
+            text=a.get("text") or "",
+            desc=a.get("content-desc") or "",
+            rid=a.get("resource-id") or "",
+            package=a.get("package") or "",
+            bounds=_android_bounds(a.get("bounds")),
+            clickable=_flag(a, "clickable"),
+            enabled=_flag(a, "enabled", True),
+            selected=_flag(a, "selected") or _flag(a, "checked"),
+            displayed=_flag(a, "displayed", True),
+        )
+
+    @classmethod
+    def _ios_node(cls, idx: int, stack: List[int], a: dict) -> UiNode:
+        return UiNode(
+            idx=idx,
+            parent=cls._parent(stack),
+            depth=len(stack),
+            cls=a.get("type") or "",
+            text=a.get("label") or a.get("value") or "",
+            desc=a.get("name") or "",
+            rid=a.get("name") or "",
+            package="",
+            bounds=_ios_bounds(a),
+            clickable=_flag(a, "accessible") or _flag(a, "hittable"),
+            enabled=_flag(a, "enabled", True),
+            selected=_flag(a, "selected"),
+            displayed=_flag(a, "visible", True),
+        )
+
+    # ---------- поиск ----------
+
+    @property
+    def package(self) -> str:
+        for n in self.nodes:
+            if n.package:
+                return n.package
+        return ""
+
+    def _lookup(self, index: Dict[str, List[int]], q: str, exact: bool) -> Iterator[int]:
+        if exact:
+            yield from index.get(q, ())
+            return
+        # перебираем уникальные строки, а не все узлы
+        for key, ids in index.items():
+            if q in key:
+                yield from ids
+
+    def find_text(self, text: str, exact: bool = False, include_desc: bool = True) -> List[UiNode]:
+        """
+        Узлы, у которых text (или content-desc) содержит строку, без учёта регистра.
+        Совпадения по text идут первыми, внутри — в порядке документа.
+        """
+        q = (text or "").strip().casefold()
+        if not q:
+            return []
+        ids = sorted(set(self._lookup(self._by_text, q, exact)))
+        if include_desc:
+            seen = set(ids)
+            ids += sorted(i for i in set(self._lookup(self._by_desc, q, exact)) if i not in seen)
+        return [self.nodes[i] for i in ids if self.nodes[i].displayed]
+
+    def has_text(self, text: str, include_desc: bool = True) -> bool:
+        return bool(self.find_text(text, include_desc=include_desc))
+
+    def by_id(self, rid: str) -> List[UiNode]:
+        """Узлы по resource-id: полный 'pkg:id/x' или короткий 'id/x'."""
+        if rid in self._by_rid:
+            return [self.nodes[i] for i in self._by_rid[rid]]
+        suffix = rid if rid.startswith(":") else f":{rid}"
+        out: List[int] = []
+        for key, ids in self._by_rid.items():
+            if key.endswith(suffix):
+                out.extend(ids)
+        return [self.nodes[i] for i in sorted(out)]
+
+    def has_id(self, rid: str) -> bool:
+        return bool(self.by_id(rid))
+
+    def children(self, node: UiNode) -> List[UiNode]:
+        return [n for n in self.nodes[node.idx + 1:] if n.parent == node.idx]
+
+    def descendants(self, node: UiNode) -> List[UiNode]:
+        out: List[UiNode] = []
+        for n in self.nodes[node.idx + 1:]:
+            if n.depth <= node.depth:
+                break
+            out.append(n)
+        return out
+
+    def clickable_ancestor(self, node: UiNode) -> UiNode:
+        """Ближайший кликабельный предок (или сам узел) — в него и стоит тапать."""
+        cur = node
+        while cur is not None:
+            if cur.clickable and cur.has_area:
+                return cur
+            cur = self.nodes[cur.parent] if cur.parent >= 0 else None
+        return node
+
+    def instance_of(self, node: UiNode, key) -> int:
+        """Порядковый номер узла среди узлов с тем же ключом (для UiSelector.instance)."""
+        return sum(1 for n in self.nodes[:node.idx] if key(n) == key(node))
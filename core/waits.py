@@ -1,72 +1,173 @@
-from selenium.webdriver.support.ui import WebDriverWait
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Optional
+
 from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException, NoSuchElementException
+from selenium.common.exceptions import (
+    ElementNotInteractableException,
+    NoSuchElementException,
+    StaleElementReferenceException,
+)
+
+from core.contexts import ContextCache
+from core.polling import Poller, PollingPolicy, PollStats, default_policy
+from core.session import DeviceSession
+
+logger = logging.getLogger(__name__)
+
+Condition = Callable[[Any], Any]
+
+
+# ---------- условия: callable(driver) -> truthy-значение ----------
+
+def visible(by, value) -> Condition:
+    return EC.visibility_of_element_located((by, value))
+
+
+def clickable(by, value) -> Condition:
+    return EC.element_to_be_clickable((by, value))
+
+
+def stale(element) -> Condition:
+    """Элемент пропал из DOM/иерархии (перерисовка, закрытие экрана)."""
+    def check(_):
+        try:
+            element.is_enabled()
+            return False
+        except StaleElementReferenceException:
+            return True
+    return check
+
+
+def invisible(element) -> Condition:
+    """Узел жив, но скрыт."""
+    def check(_):
+        try:
+            return not element.is_displayed()
+        except StaleElementReferenceException:
+            return False
+    return check
+
+
+def text_present(finder, text: str) -> Condition:
+    """Текст есть на экране прямо сейчас (native или webview); finder — TextFinder."""
+    return lambda _: text in finder.present_now([text])
+
+
+def text_absent(finder, text: str) -> Condition:
+    return lambda _: text not in finder.present_now([text])
+
+
+def package_changed(from_package: str) -> Condition:
+    """Текущий пакет отличается от from_package (ушли в пикер, браузер и т.п.)."""
+    def check(driver):
+        pkg = DeviceSession.of(driver).current_package(refresh=True)
+        return pkg if pkg and pkg != from_package else None
+    return check
+
+
+@dataclass
+class WaitResult:
+    """Чем закончилось ожидание: какое условие сработало и с каким значением."""
+    ok: bool
+    fired: Optional[str]
+    value: Any
+    values: Dict[str, Any] = field(default_factory=dict)
+    stats: Optional[PollStats] = None
+
+    def __bool__(self) -> bool:
+        return self.ok
 
 
 class Waits:
-    def __init__(self, driver, timeout=10, poll=0.5):
+    def __init__(self, driver, timeout=10, poll=None, policy: PollingPolicy | None = None):
         self.driver = driver
         self.timeout = timeout
-        self.poll = poll
+        # poll=... — фиксированный интервал как раньше; по умолчанию общая политика с backoff
+        self.policy = policy or (PollingPolicy.fixed(poll) if poll else default_policy())
+        self.last_stats: PollStats | None = None
+        self.last_result: WaitResult | None = None
 
-    def el_visible(self, by, value, timeout=None):
-        """Возвращает видимый элемент или ``None``."""
-        wait_timeout = timeout or self.timeout
+    # ---------- движок ----------
+
+    def _evaluate(self, condition: Condition):
         try:
-            return WebDriverWait(self.driver, wait_timeout).until(
-                EC.visibility_of_element_located((by, value))
-            )
-        except (TimeoutException, NoSuchElementException):
+            return condition(self.driver)
+        except (NoSuchElementException, StaleElementReferenceException, ElementNotInteractableException):
+            # элемента ещё нет или он пересоздаётся — опрашиваем дальше; прочие ошибки
+            # (потеря сессии, неверный селектор) поднимаются сразу, как у WebDriverWait
             return None
 
+    def _finish(self, poller: Poller, result: WaitResult, what: str) -> WaitResult:
+        result.stats = self.last_stats = poller.stats(result.ok, what)
+        self.last_result = result
+        return result
+
+    def any_of(self, conditions: Dict[str, Condition], timeout=None, what: str = "") -> WaitResult:
+        """
+        Все условия проверяются в одном цикле под одним дедлайном; возвращается
+        первое сработавшее (в порядке словаря) — fired/value в результате.
+        """
+        poller = Poller(timeout or self.timeout, self.policy)
+        for _ in poller:
+            for name, condition in conditions.items():
+                value = self._evaluate(condition)
+                if value:
+                    return self._finish(poller, WaitResult(True, name, value, {name: value}), what or f"any_of {name}")
+        return self._finish(poller, WaitResult(False, None, None), what or f"any_of {list(conditions)}")
+
+    def all_of(self, conditions: Dict[str, Condition], timeout=None, what: str = "") -> WaitResult:
+        """Ждёт опроса, в котором выполнены все условия сразу; values — значения каждого."""
+        poller = Poller(timeout or self.timeout, self.policy)
+        values: Dict[str, Any] = {}
+        for _ in poller:
+            values = {}
+            for name, condition in conditions.items():
+                value = self._evaluate(condition)
+                if not value:
+                    break
+                values[name] = value
+            else:
+                last = next(reversed(values), None)
+                return self._finish(poller, WaitResult(True, last, values.get(last), values), what or "all_of")
+        return self._finish(poller, WaitResult(False, None, None, values), what or f"all_of {list(conditions)}")
+
+    def until(self, condition, timeout=None, what: str = ""):
+        """
+        Опрос condition(driver) по политике до truthy-результата или таймаута.
+        Возвращает результат condition или ``None``; число опросов — в last_stats.
+        """
+        return self.any_of({"condition": condition}, timeout, what).value
+
+    # ---------- обёртки ----------
+
+    def el_visible(self, by, value, timeout=None):
+        """Возвращает видимый элемент или ``None``."""
+        return self.any_of({"visible": visible(by, value)}, timeout, f"visible {value}").value
+
     def el_clickable(self, by, value, timeout=None):
         """Возвращает кликабельный элемент или ``None``."""
-        wait_timeout = timeout or self.timeout
-        try:
-            return WebDriverWait(self.driver, wait_timeout).until(
-                EC.element_to_be_clickable((by, value))
-            )
-        except (TimeoutException, NoSuchElementException):
-            return None
+        return self.any_of({"clickable": clickable(by, value)}, timeout, f"clickable {value}").value
 
     # публичные обёртки, чтобы вызывать единообразно из экранов/компонентов
     def visible(self, by, value, timeout=None):
         return self.el_visible(by, value, timeout=timeout)
 
-
     def clickable(self, by, value, timeout=None):
-        t = timeout or self.timeout
-        try:
-            return WebDriverWait(self.driver, t, poll_frequency=self.poll)\
-                   .until(EC.element_to_be_clickable((by, value)))
-        except (TimeoutException, NoSuchElementException):
-            return None
+        return self.el_clickable(by, value, timeout=timeout)
 
     def el_gone(self, found, timeout=None) -> bool:
-        """Ждёт, пока найденный Found исчезнет (stale/invisible) с учётом контекста."""
-        t = timeout or self.timeout
-        d = found.driver
-        orig = getattr(d, "current_context", "NATIVE_APP")
-        try:
-            if orig != found.context:
-                d.switch_to.context(found.context)
-
-            # 1) стал "протухшим" (частый случай при перерисовке)
-            try:
-                WebDriverWait(d, t, poll_frequency=self.poll).until(EC.staleness_of(found.element))
-                return True
-            except TimeoutException:
-                pass
-
-            # 2) невидим (если узел жив, но скрыли)
-            try:
-                WebDriverWait(d, t, poll_frequency=self.poll).until(
-                    lambda _ : not found.element.is_displayed()
-                )
-                return True
-            except Exception:
-                return False
-        finally:
-            if getattr(d, "current_context", None) != orig:
-                d.switch_to.context(orig)
-
+        """
+        Ждёт, пока найденный Found исчезнет (stale или invisible) с учётом контекста.
+        Оба признака проверяются в одном цикле: худший случай — один таймаут, а не два.
+        """
+        if found.element is None:
+            # совпадение из снимка без WebElement — отслеживать нечего
+            return False
+        with ContextCache.for_driver(found.driver).within(found.context):
+            result = self.any_of(
+                {"stale": stale(found.element), "invisible": invisible(found.element)},
+                timeout,
+                "el_gone",
+            )
+        return result.ok
@@ -0,0 +1,96 @@
+# core/webview_js.py
+"""
+Поиск текста в WEBVIEW одним execute_script.
+
+Скрипт сам отбрасывает страницу без совпадений, спускается только в
+поддеревья, где текст есть, и возвращает самые глубокие видимые узлы
+вместе с прямоугольниками — без XPath по всем предкам и без is_displayed
+на каждый элемент. По запросу кликает первое совпадение прямо в странице.
+"""
+from __future__ import annotations
+
+import logging
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+from appium.webdriver.webelement import WebElement as AppiumWebElement
+from selenium.common.exceptions import WebDriverException
+
+logger = logging.getLogger(__name__)
+
+FIND_TEXT_JS = r"""
+const query = arguments[0], limit = arguments[1] || 0, doClick = !!arguments[2];
+const norm = (s) => (s || '').replace(/\s+/g, ' ').trim().toLowerCase();
+const q = norm(query);
+const body = document.body;
+if (!q || !body || !norm(body.innerText).includes(q)) return [];
+
+const visibleRect = (el) => {
+  const r = el.getBoundingClientRect();
+  if (r.width <= 0 || r.height <= 0) return null;
+  const st = window.getComputedStyle(el);
+  if (st.visibility === 'hidden' || st.display === 'none' || st.opacity === '0') return null;
+  return r;
+};
+
+const deepest = [];
+const visit = (el) => {
+  if (!norm(el.textContent).includes(q)) return false;
+  let childHit = false;
+  for (const child of el.children) {
+    if (visit(child)) childHit = true;
+  }
+  if (!childHit) deepest.push(el);
+  return true;
+};
+visit(body);
+
+const seen = new Set();
+const out = [];
+for (let el of deepest) {
+  // скрытый узел — берём ближайшего видимого предка
+  let r = visibleRect(el);
+  while (!r && el.parentElement && el !== body) {
+    el = el.parentElement;
+    r = visibleRect(el);
+  }
+  if (!r || seen.has(el)) continue;
+  seen.add(el);
+  out.push({
+    el: el,
+    rect: {x: r.left, y: r.top, width: r.width, height: r.height},
+    text: (el.innerText || '').slice(0, 200),
+  });
+  if (limit && out.length >= limit) break;
+}
+if (doClick && out.length) out[0].el.click();
+return out;
+"""
+
+
+@dataclass
+class PageMatch:
+    element: AppiumWebElement
+    rect: Dict[str, float]   # CSS-пиксели относительно viewport
+    text: str
+
+
+def find_in_page(driver, text: str, limit: int = 0, click: bool = False) -> List[PageMatch]:
+    """
+    Один вызов execute_script в текущем WEBVIEW-контексте.
+
+    limit=0 — все совпадения; click=True — клик по первому совпадению в странице.
+    """
+    try:
+        raw = driver.execute_script(FIND_TEXT_JS, text, limit, click) or []
+    except WebDriverException as e:
+        logger.debug(f"JS-поиск '{text}' не выполнен: {e}")
+        return []
+
+    matches: List[PageMatch] = []
+    for item in raw:
+        el: Optional[AppiumWebElement] = item.get("el") if isinstance(item, dict) else None
+        if el is None:
+            continue
+        matches.append(PageMatch(el, item.get("rect") or {}, item.get("text") or ""))
+    return matches
@@ -1,22 +1,47 @@
+import functools
 from typing import Optional
 
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.remote.webelement import WebElement
 from selenium.webdriver.support import expected_conditions as EC
+from selenium.common.exceptions import TimeoutException
 
 # from conftest import driver
 from core import waits
-from core.textfinder import TextFinder, Found
+from core.element_cache import ElementCache
+from core.fingerprint import Fingerprint
+from core.input import type_code
+from core.locators import Compiled, Locator, compile_locator
+from core.polling import Poller
+from core.session import DeviceSession
+from core.settings_profiles import use_profile
+from core.textfinder import TextFinder, Found, ExpectResult
+
+
+def with_settings_profile(method):
+    """Выполнить метод экрана под его SETTINGS_PROFILE."""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self.settings_profile():
+            return method(self, *args, **kwargs)
+    return wrapper
 
 
 class BaseScreen:
+    # якоря для ScreenDetector; None — экран не распознаётся автоматически
+    FINGERPRINT: Optional[Fingerprint] = None
+    # профиль настроек драйвера (core.settings_profiles) для шагов экрана
+    SETTINGS_PROFILE: Optional[str] = None
+
     def __init__(self, driver, timeout=15):
         self.driver = driver
         self.timeout = timeout
+        self.session = DeviceSession.of(driver)
         self.wait = WebDriverWait(driver, timeout)
         self.waits = waits.Waits(driver, timeout)
-        self.text = TextFinder(driver, self.waits)
+        self.text = TextFinder(driver, self.waits, screen=type(self).__name__)
+        self.elements = ElementCache.of(driver)
 
     def click_element(self, target: tuple | WebElement | Found) -> Optional[WebElement]:
         """Универсальный клик по элементу или локатору."""
@@ -31,12 +56,73 @@ class BaseScreen:
             return target
 
         if isinstance(target, tuple) and len(target) == 2:
-            element = self.wait.until(EC.element_to_be_clickable(target))
+            element = self.waits.el_clickable(*target)
+            if element is None:
+                raise TimeoutException(f"Элемент {target} не стал кликабельным за {self.timeout}s")
             element.click()
             return element
 
         raise ValueError(f"Неподдерживаемый тип для клика: {type(target)}")
 
+    def locate(self, locator: tuple | Locator) -> tuple | Compiled:
+        """Декларативный Locator → (by, value) в самой дешёвой форме для платформы."""
+        if isinstance(locator, Locator):
+            return compile_locator(locator, self.session.platform)
+        return locator
+
+    def click_cached(self, locator: tuple | Locator, timeout: int = None) -> None:
+        """
+        Клик по локатору с переиспользованием найденного элемента, пока экран тот же
+        (см. core.element_cache). Повторные клики по одной кнопке — без нового поиска.
+        """
+        locator = tuple(self.locate(locator))
+        key = (type(self).__name__, *locator)
+        clicked = self.elements.act(
+            key,
+            lambda: self.waits.el_clickable(*locator, timeout=timeout),
+            lambda el: el.click(),
+        )
+        if not clicked:
+            raise TimeoutException(f"Элемент {locator} не стал кликабельным за {timeout or self.timeout}s")
+
+    def click_text_cached(self, text: str, timeout: int = 10) -> bool:
+        """Как click_cached, но по тексту через TextFinder; совпадения без WebElement не кэшируются."""
+        key = (type(self).__name__, "text", text)
+        return self.elements.act(
+            key,
+            lambda: self.text.find_anywhere(text, timeout=timeout),
+            lambda found: found.click(),
+            cacheable=lambda found: found.element is not None,
+        )
+
+    def enter_code(self, rid: str, code: str, timeout: int = None) -> None:
+        """
+        Код в поле по resource-id: тап и клавиши одним W3C actions (core.input).
+        Если поле не нашлось в снимке или пакетный ввод не прошёл — обычный send_keys
+        в очищенное поле (часть цифр могла уже попасть в него).
+        """
+        timeout = timeout or self.timeout
+        if type_code(self.driver, rid, code, timeout):
+            return
+        field = self.waits.el_clickable(By.ID, rid, timeout=timeout)
+        if not field:
+            raise TimeoutException(f"Поле {rid} недоступно")
+        field.clear()
+        field.send_keys(code)
+
+    def settings_profile(self, name: Optional[str] = None):
+        """Контекст с профилем настроек экрана (или явно указанным); без профиля — no-op."""
+        return use_profile(self.driver, name or self.SETTINGS_PROFILE)
+
+    def expect_texts(self, texts, mode: str = "all", timeout: int = None) -> ExpectResult:
+        """
+        Проверить набор текстов за один цикл опроса (all / any / none).
+
+        Returns:
+            ExpectResult — truthy при успехе, results: текст → найден ли
+        """
+        return self.text.expect(texts, mode=mode, timeout=timeout or self.timeout)
+
     def find_by_text_fast(self, text: str, exact_match: bool = False, timeout: int = None) -> Optional[WebElement]:
         """
         Быстрый поиск элемента по тексту для Appium (Android/iOS).
@@ -50,16 +136,12 @@ class BaseScreen:
         Returns:
             WebElement или None
         """
-        import time
-
         wait_time = timeout if timeout is not None else self.timeout
-        platform = (self.driver.capabilities.get("platformName") or "").lower()
-        deadline = time.time() + wait_time
-        poll_interval = 0.3  # Быстрый опрос каждые 300мс
+        platform = self.session.platform
 
-        # Временно убираем implicit wait для ускорения
+        # Временно убираем implicit wait для ускорения (без запросов, если он уже 0)
         original_implicit = self._get_implicit_wait()
-        self.driver.implicitly_wait(0)
+        self.session.set_implicit_wait(0)
 
         try:
             if platform.startswith("android"):
@@ -71,17 +153,8 @@ class BaseScreen:
                 else:
                     ui_selector = f'new UiSelector().textContains("{q}")'
 
-                # Быстрый поиск с повторами
-                while time.time() < deadline:
-                    try:
-                        elements = self.driver.find_elements("-android uiautomator", ui_selector)
-                        if elements:
-                            return elements[0]
-                    except Exception:
-                        pass
-                    time.sleep(poll_interval)
-
-                return None
+                # Быстрый поиск с повторами по общей политике опроса
+                return self._poll_first("-android uiautomator", ui_selector, wait_time)
 
             elif platform.startswith("ios"):
                 # Для iOS используем предикаты
@@ -92,17 +165,8 @@ class BaseScreen:
                 else:
                     predicate = f"label CONTAINS[c] '{p}' OR name CONTAINS[c] '{p}' OR value CONTAINS[c] '{p}'"
 
-                # Быстрый поиск с повторами
-                while time.time() < deadline:
-                    try:
-                        elements = self.driver.find_elements("-ios predicate string", predicate)
-                        if elements:
-                            return elements[0]
-                    except Exception:
-                        pass
-                    time.sleep(poll_interval)
-
-                return None
+                # Быстрый поиск с повторами по общей политике опроса
+                return self._poll_first("-ios predicate string", predicate, wait_time)
 
             else:
                 # Fallback для WebView или других платформ
@@ -111,15 +175,28 @@ class BaseScreen:
                 else:
                     xpath = f"//*[contains(text(), '{text}')]"
 
-                wait = WebDriverWait(self.driver, wait_time)
-                return wait.until(EC.presence_of_element_located((By.XPATH, xpath)))
+                return self.waits.until(EC.presence_of_element_located((By.XPATH, xpath)), wait_time)
 
         except Exception as e:
             print(f"⚠️ Элемент с текстом '{text}' не найден: {e}")
             return None
         finally:
             # Восстанавливаем implicit wait
-            self.driver.implicitly_wait(original_implicit)
+            self.session.set_implicit_wait(original_implicit)
+
+    def _poll_first(self, by: str, value: str, timeout: float) -> Optional[WebElement]:
+        """Первый элемент по локатору; паузы между попытками — по self.waits.policy."""
+        poller = Poller(timeout, self.waits.policy)
+        for _ in poller:
+            try:
+                elements = self.driver.find_elements(by, value)
+                if elements:
+                    self.waits.last_stats = poller.stats(True, f"find_by_text_fast {value}")
+                    return elements[0]
+            except Exception:
+                pass
+        self.waits.last_stats = poller.stats(False, f"find_by_text_fast {value}")
+        return None
 
     def find_by_text_instant(self, text: str, exact_match: bool = False) -> Optional[WebElement]:
         """
@@ -133,11 +210,11 @@ class BaseScreen:
         Returns:
             WebElement или None
         """
-        platform = (self.driver.capabilities.get("platformName") or "").lower()
+        platform = self.session.platform
 
         # Временно убираем implicit wait
         original_implicit = self._get_implicit_wait()
-        self.driver.implicitly_wait(0)
+        self.session.set_implicit_wait(0)
 
         try:
             if platform.startswith("android"):
@@ -162,7 +239,7 @@ class BaseScreen:
         except Exception:
             return None
         finally:
-            self.driver.implicitly_wait(original_implicit)
+            self.session.set_implicit_wait(original_implicit)
 
     def find_and_click_by_text(self, text: str, exact_match: bool = False, timeout: int = None) -> bool:
         """
@@ -185,10 +262,5 @@ class BaseScreen:
             return False
 
     def _get_implicit_wait(self) -> float:
-        """Получить текущий implicit wait в секундах."""
-        try:
-            settings = self.driver.get_settings()
-            implicit_ms = settings.get("implicitWaitMs", 0)
-            return implicit_ms / 1000.0
-        except Exception:
-            return 0.0
+        """Текущий implicit wait в секундах (из состояния сессии, без запроса)."""
+        return self.session.implicit_wait
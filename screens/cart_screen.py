@@ -1,3 +1,4 @@
+from core.fingerprint import Fingerprint
 from screens.base_screen import BaseScreen
 
 
@@ -7,14 +8,15 @@ class CartScreen(BaseScreen):
     SUCCESS_TEXT = "успешно"
     BACK_BUTTON_TEXT = "Перейти"
 
+    # «Оформить» + «₸» есть и на карточке товара — выбранная вкладка отличает корзину
+    FINGERPRINT = Fingerprint(tab="Корзина", texts=(CREATE_ORDER_BUTTON_TEXT, AMOUNT_TEXT))
+
     def create_order_button_clik(self):
         button = self.text.find_anywhere(self.CREATE_ORDER_BUTTON_TEXT, timeout=10)
         self.click_element(button)
 
     def verify_amount_displayed(self, amount: str = "1", timeout: int = 5) -> bool:
-        amount_found = self.text.find_anywhere(amount, timeout=timeout)
-        currency_found = self.text.find_anywhere(self.AMOUNT_TEXT, timeout=timeout)
-        return amount_found is not None and currency_found is not None
+        return bool(self.text.expect_all([amount, self.AMOUNT_TEXT], timeout=timeout))
 
     def success_text_check(self):
         text = self.text.find_anywhere(self.SUCCESS_TEXT, timeout=10)
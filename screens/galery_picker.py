@@ -1,8 +1,8 @@
 # screens/picker.py
 from __future__ import annotations
 
-import time
 from contextlib import suppress
+from dataclasses import dataclass
 from typing import Optional, List, Tuple
 
 from appium.webdriver.common.appiumby import AppiumBy as By
@@ -11,7 +11,27 @@ from selenium.common.exceptions import (
     WebDriverException,
     StaleElementReferenceException,
 )
-from screens.base_screen import BaseScreen
+from core.contexts import NATIVE
+from core.fingerprint import Fingerprint
+from core.locators import Locator
+from core.polling import Poller
+from core.ui_snapshot import UiNode, UiSnapshot
+from screens.base_screen import BaseScreen, with_settings_profile
+
+
+@dataclass(frozen=True)
+class PickerView:
+    """Что видно в пикере по одному снимку иерархии."""
+    provider: Optional[str]          # 'mediamodule' | 'documentsui' | 'photos' | None
+    package: str
+    container: Optional[UiNode] = None
+    item: Optional[UiNode] = None    # куда тапать, чтобы выбрать первый элемент
+    confirm: Optional[UiNode] = None
+    items: Tuple[UiNode, ...] = ()   # все видимые элементы по порядку (item — первый)
+
+    @property
+    def ready(self) -> bool:
+        return self.container is not None or self.item is not None
 
 
 class PickerScreen(BaseScreen):
@@ -21,6 +41,9 @@ class PickerScreen(BaseScreen):
       - System Photo Picker: com.google.android.providers.media.module
       - DocumentsUI: com.android.documentsui / com.google.android.documentsui
       - (фолбэк) Google Photos: com.google.android.apps.photos
+
+    Провайдер, превью и кнопка подтверждения определяются по одному снимку
+    иерархии на опрос; найденный провайдер запоминается в сессии устройства.
     """
 
     # пакеты провайдеров
@@ -30,6 +53,7 @@ class PickerScreen(BaseScreen):
 
     # якорные id (разные провайдеры)
     MM_THUMB_ID      = "id/icon_thumbnail"                # превью в media.module
+    MM_LIST_IDS      = ("id/picker_tab_recyclerview",)
     DOCS_LIST_IDS    = ("id/dir_list", "id/list", "id/container_directory_list")
     PHOTOS_GRID_IDS  = ("id/recycler_view", "id/photos_grid", "id/photos_view")
 
@@ -38,66 +62,57 @@ class PickerScreen(BaseScreen):
     DOCS_CONFIRM_IDS = ("id/action_menu_done", "id/done")
     PHOTOS_CONFIRM_IDS = ("id/done_button", "id/confirm_button")
 
+    # провайдер → (пакеты, контейнеры списка, кнопки подтверждения)
+    PROVIDERS = {
+        "mediamodule": ((MEDIA_MODULE_PKG,), MM_LIST_IDS, MM_CONFIRM_IDS),
+        "documentsui": (DOCSUI_PACKAGES, DOCS_LIST_IDS, DOCS_CONFIRM_IDS),
+        "photos": ((PHOTOS_PACKAGE,), PHOTOS_GRID_IDS, PHOTOS_CONFIRM_IDS),
+    }
+    CONFIRM_TIMEOUT = 2
+    # сетка превью без имён файлов — выбор только по позиции
+    UNLABELED_PROVIDERS = ("mediamodule", "photos")
+    SEARCH_SCROLLS = 3
+    ITEM_WAIT = 2   # сколько ждать подгрузки превью до скролла, сек
+
+    FINGERPRINT = Fingerprint(packages=(MEDIA_MODULE_PKG, *DOCSUI_PACKAGES, PHOTOS_PACKAGE))
+    # сетка превью постоянно подгружается — не ждём idle на каждом запросе
+    SETTINGS_PROFILE = "picker"
+
+    # ключ в DeviceSession.layouts: провайдер пикера на устройстве не меняется
+    _PROVIDER_KEY = ("picker", "provider")
+
     def __init__(self, driver, timeout: int = 10):
         super().__init__(driver, timeout)
-        self._provider: Optional[str] = None  # 'mediamodule' | 'documentsui' | 'photos' | None
+        self._provider: Optional[str] = self.session.layouts.get(self._PROVIDER_KEY)
+        self._view: Optional[PickerView] = None
+        self._snap: Optional[UiSnapshot] = None
 
     # ---------- публичные методы ----------
 
+    @with_settings_profile
     def wait_loaded(self, timeout: Optional[int] = None) -> bool:
         """Ждём, что открылся какой-то из известных пикеров."""
         t = timeout or self.waits.timeout
-        end = time.monotonic() + t
-        while time.monotonic() < end:
-            pkg = self.driver.current_package or ""
-
-            if pkg.startswith(self.MEDIA_MODULE_PKG):
-                self._provider = "mediamodule"
-                # убеждаемся, что появились миниатюры или контейнер
-                if self._has_any(By.ID, self._rid(pkg, self.MM_THUMB_ID)) or self._has_any(
-                    By.ID, self._rid(pkg, "id/picker_tab_recyclerview")
-                ):
-                    return True
-
-            elif any(pkg.startswith(p) for p in self.DOCSUI_PACKAGES):
-                self._provider = "documentsui"
-                if self._find_docs_container():
-                    return True
-
-            elif pkg.startswith(self.PHOTOS_PACKAGE):
-                self._provider = "photos"
-                if self._find_photos_container():
-                    return True
-
-            else:
-                # универсальный фолбэк: появились ли кликабельные элементы
-                if self._list_items(limit=1):
-                    return True
-
-            time.sleep(0.2)
-
+        poller = Poller(t, self.waits.policy)
+        for _ in poller:
+            view = self._look()
+            if view and view.ready:
+                poller.stats(True, f"picker {view.provider or view.package}")
+                return True
+        poller.stats(False, "picker")
         return False
 
+    @with_settings_profile
     def select_first_recent(self, timeout: Optional[int] = None) -> bool:
         """Выбрать первый элемент в «Недавних» (или первом видимом контейнере)."""
-        if not self._provider:
-            self.wait_loaded(timeout=timeout)
-
-        pkg = self.driver.current_package or ""
-        prov = self._provider
+        view = self._with_items(timeout)
+        if view and view.item:
+            # превью в media.module не кликабельно → тап по центру кликабельного предка
+            self.session.tap(*view.item.center)
+            self._view = None
+            return True
 
-        if prov == "mediamodule":
-            # превью не кликабельно → кликаем кликабельного предка или тапаем по центру
-            thumbs = self.driver.find_elements(By.ID, self._rid(pkg, self.MM_THUMB_ID))
-            if thumbs:
-                thumb = thumbs[0]
-                with suppress(NoSuchElementException, WebDriverException, StaleElementReferenceException):
-                    parent = thumb.find_element(By.XPATH, "./ancestor::*[@clickable='true'][1]")
-                    parent.click()
-                    return True
-                return self._tap_center(thumb)
-
-        # DocumentsUI / Photos / неизвестный → кликаем первый кликабельный элемент в контейнере
+        # снимок ничего не дал — поиск элементами
         items = self._list_items(limit=6)
         if not items:
             self._scroll_list_down()
@@ -108,89 +123,197 @@ class PickerScreen(BaseScreen):
                 return True
         return False
 
+    @with_settings_profile
+    def select_image(self, name: Optional[str] = None, index: int = 0,
+                     timeout: Optional[int] = None) -> bool:
+        """
+        Выбрать изображение по имени файла или по позиции в «Недавних» (0 — самое новое).
+
+        Где подписи видны (DocumentsUI, неизвестный пикер), name обязателен к совпадению:
+        не нашли на экране и после SEARCH_SCROLLS скроллов — False, без выбора по позиции
+        (элементы списка там не соответствуют порядку «Недавних»). В media.module и
+        Google Photos сетка без подписей — там выбор по index, и проверить имя нельзя:
+        позиция верна, только пока нужные файлы — самые новые на устройстве.
+        """
+        view = self._with_items(timeout)
+        if view is None:
+            return False
+        if name and view.provider not in self.UNLABELED_PROVIDERS:
+            target = self._search_named(name)
+        elif view.items:
+            target = view.items[index] if index < len(view.items) else None
+        else:
+            return not name and index == 0 and self.select_first_recent(timeout=timeout)
+        if target is None:
+            return False
+        self.session.tap(*target.center)
+        self._view = None
+        return True
+
+    @with_settings_profile
     def confirm_if_needed(self) -> None:
         """Нажать подтверждение, если у провайдера есть такая кнопка."""
-        pkg = self.driver.current_package or ""
-        prov = self._provider
-
-        ids: Tuple[str, ...] = ()
-        if prov == "mediamodule":
-            ids = tuple(self._rid(pkg, i) for i in self.MM_CONFIRM_IDS)
-        elif prov == "documentsui":
-            ids = tuple(self._rid(pkg, i) for i in self.DOCS_CONFIRM_IDS)
-        elif prov == "photos":
-            ids = tuple(self._rid(pkg, i) for i in self.PHOTOS_CONFIRM_IDS)
-
-        for rid in ids:
-            with suppress(WebDriverException, NoSuchElementException):
-                button = self.waits.clickable(By.ID, rid, timeout=2)
-                if button:
-                    button.click()
-                    return
+        if not self._provider:
+            # пикер без известного провайдера подтверждения не имеет
+            return
+        poller = Poller(self.CONFIRM_TIMEOUT, self.waits.policy)
+        for _ in poller:
+            view = self._look()
+            if view is None:
+                continue
+            if view.provider is None:
+                # пикер закрылся сам — подтверждение не требовалось
+                break
+            if view.confirm is not None:
+                self.session.tap(*view.confirm.center)
+                poller.stats(True, "picker confirm")
+                return
         # многие пикеры подтверждение не требуют — no-op
+        poller.stats(False, "picker confirm")
 
     def cancel(self) -> None:
         with suppress(WebDriverException):
             self.driver.back()
 
-    # ---------- внутренние помощники ----------
+    # ---------- снимок ----------
 
-    @staticmethod
-    def _rid(pkg: str, short_id: str) -> str:
-        return short_id if ":" in short_id else f"{pkg}:{short_id}"
+    def _look(self) -> Optional[PickerView]:
+        """Один снимок иерархии → PickerView; пакет берётся из снимка, без отдельного запроса."""
+        try:
+            with self.session.contexts.within(NATIVE):
+                snap = UiSnapshot.capture(self.driver)
+        except WebDriverException:
+            return None
+        pkg = snap.package or self.session.current_package(refresh=True)
+        self.session.note_package(pkg)
+        self._snap = snap
+        self._view = self._read(snap, pkg)
+        if self._view.provider and self._view.provider != self._provider:
+            self._provider = self._view.provider
+            self.session.layouts[self._PROVIDER_KEY] = self._provider
+        return self._view
+
+    def _provider_of(self, pkg: str) -> Optional[str]:
+        # запомненный провайдер проверяем первым
+        order = sorted(self.PROVIDERS, key=lambda p: p != self._provider)
+        for prov in order:
+            if any(pkg.startswith(p) for p in self.PROVIDERS[prov][0]):
+                return prov
+        return None
 
-    def _has_any(self, by, value) -> bool:
-        with suppress(NoSuchElementException, WebDriverException):
-            return len(self.driver.find_elements(by, value)) > 0
-        return False
+    def _read(self, snap: UiSnapshot, pkg: str) -> PickerView:
+        prov = self._provider_of(pkg)
+        if prov is None:
+            # универсальный фолбэк: появились ли кликабельные элементы
+            item = next((n for n in snap.nodes if n.clickable and n.has_area), None)
+            return PickerView(None, pkg, item=item)
+
+        _, list_ids, confirm_ids = self.PROVIDERS[prov]
+        container = self._first(snap, pkg, list_ids)
+        confirm = self._first(snap, pkg, confirm_ids)
+        items: List[UiNode] = []
+        if prov == "mediamodule":
+            thumbs = [n for n in snap.by_id(self._rid(pkg, self.MM_THUMB_ID)) if n.has_area]
+            items = [snap.clickable_ancestor(t) for t in thumbs]
+        elif container is not None:
+            items = [n for n in snap.descendants(container) if n.clickable and n.has_area]
+            if not items:
+                items = [n for n in snap.children(container) if n.has_area]
+        item = items[0] if items else None
+        return PickerView(prov, pkg, container, item, confirm, tuple(items))
+
+    def _first(self, snap: UiSnapshot, pkg: str, short_ids: Tuple[str, ...]) -> Optional[UiNode]:
+        for sid in short_ids:
+            for node in snap.by_id(self._rid(pkg, sid)):
+                if node.has_area and node.enabled:
+                    return node
+        return None
 
-    def _find_docs_container(self):
-        pkg = self.driver.current_package or ""
-        for sid in self.DOCS_LIST_IDS:
-            rid = self._rid(pkg, sid)
-            if self._has_any(By.ID, rid):
-                return By.ID, rid
+    def _with_items(self, timeout: Optional[int]) -> Optional[PickerView]:
+        """Пикер открыт и элементы подгружены (или хотя бы открыт)."""
+        view = self._view
+        if not (view and view.item):
+            self.wait_loaded(timeout=timeout)
+            view = self._view
+        if view and not view.item and view.ready:
+            # контейнер есть, элементов ещё нет: короткое ожидание подгрузки, затем один
+            # скролл и ещё столько же — не весь таймаут до скролла
+            wait = min(self.ITEM_WAIT, timeout or self.waits.timeout)
+            view = self._wait_item(wait) or (self._scroll_list_down() and self._wait_item(wait)) or self._view
+        return view
+
+    def _named(self, name: str) -> Optional[UiNode]:
+        """Элемент с подписью-именем файла (DocumentsUI показывает имя; расширение может быть скрыто)."""
+        view, snap = self._view, self._snap
+        if not (view and snap):
+            return None
+        stem = name.rsplit(".", 1)[0]
+        for node in snap.find_text(stem):
+            if node.package == view.package:
+                return snap.clickable_ancestor(node)
         return None
 
-    def _find_photos_container(self):
-        pkg = self.driver.current_package or ""
-        for sid in self.PHOTOS_GRID_IDS:
-            rid = self._rid(pkg, sid)
-            if self._has_any(By.ID, rid):
-                return By.ID, rid
+    def _search_named(self, name: str) -> Optional[UiNode]:
+        """Элемент по имени на экране, при необходимости — с прокруткой списка."""
+        target = self._named(name)
+        for _ in range(self.SEARCH_SCROLLS):
+            if target is not None or not self._scroll_list_down():
+                break
+            self._look()
+            target = self._named(name)
+        return target
+
+    def _wait_item(self, timeout: float) -> Optional[PickerView]:
+        poller = Poller(timeout, self.waits.policy)
+        for _ in poller:
+            view = self._look()
+            if view and view.item:
+                poller.stats(True, "picker item")
+                return view
+        poller.stats(False, "picker item")
         return None
 
+    # ---------- внутренние помощники ----------
+
+    @staticmethod
+    def _rid(pkg: str, short_id: str) -> str:
+        return short_id if ":" in short_id else f"{pkg}:{short_id}"
+
     def _list_container_locator(self) -> Optional[Tuple[str, str]]:
-        if self._provider == "documentsui":
-            return self._find_docs_container()
-        if self._provider == "photos":
-            return self._find_photos_container()
-        if self._provider == "mediamodule":
-            # у системного пикера контейнеры разные; кликаем по превью/предку, поэтому None ок
-            return None
+        # контейнер берём из последнего снимка; у media.module кликаем по превью, поэтому None ок
+        view = self._view
+        if view and view.container is not None and view.provider != "mediamodule":
+            return By.ID, view.container.rid
         return None
 
     def _list_items(self, limit: int = 20) -> List:
         loc = self._list_container_locator()
         if loc:
-            by, rid = loc
+            _, rid = loc
+            container = Locator(id=rid)
             with suppress(WebDriverException, NoSuchElementException):
-                root = self.driver.find_element(by, rid)
-                items = root.find_elements(By.XPATH, ".//*[@clickable='true' or @focusable='true']")
-                if not items:
-                    items = root.find_elements(By.XPATH, "./*")
-                return items[:limit]
-        # фолбэк: любые кликабельные на экране
+                # кликабельные, затем фокусируемые потомки контейнера — UiSelector вместо XPath
+                for item in (Locator(parent=container, clickable=True), Locator(parent=container, focusable=True)):
+                    items = self.driver.find_elements(*self.locate(item))
+                    if items:
+                        return items[:limit]
+                # прямые дети UiSelector'ом не выражаются — XPath, но от контейнера
+                root = self.driver.find_element(By.ID, rid)
+                return root.find_elements(By.XPATH, "./*")[:limit]
+        # фолбэк: любые кликабельные/фокусируемые на экране
         with suppress(WebDriverException):
-            return self.driver.find_elements(By.XPATH, "//*[@clickable='true' or @focusable='true']")[:limit]
+            for item in (Locator(clickable=True), Locator(focusable=True)):
+                items = self.driver.find_elements(*self.locate(item))
+                if items:
+                    return items[:limit]
         return []
 
     def _scroll_list_down(self) -> bool:
         """Короткий скролл вниз в пределах контейнера (или по экрану)."""
-        loc = self._list_container_locator()
-        if not loc:
+        view = self._view
+        if not (view and view.container is not None):
             # скролл по экрану как фолбэк
-            size = self.driver.get_window_size()
+            size = self.session.window_size()
             x = int(size["width"] * 0.5)
             start_y = int(size["height"] * 0.75)
             end_y = int(size["height"] * 0.35)
@@ -199,31 +322,20 @@ class PickerScreen(BaseScreen):
                 return True
             return False
 
-        by, rid = loc
-        container = self.driver.find_element(by, rid)
-        rect = container.rect
+        # bounds контейнера уже есть в снимке — без поиска элемента
+        l, t, r, b = view.container.bounds
         with suppress(WebDriverException):
             self.driver.execute_script(
                 "mobile: scrollGesture",
                 {
-                    "left": rect["x"] + 8,
-                    "top": rect["y"] + 8,
-                    "width": max(16, rect["width"] - 16),
-                    "height": max(16, rect["height"] - 16),
+                    "left": l + 8,
+                    "top": t + 8,
+                    "width": max(16, r - l - 16),
+                    "height": max(16, b - t - 16),
                     "direction": "down",
                     "percent": 0.8,
                 },
             )
-            return True
-        return False
-
-    def _tap_center(self, el) -> bool:
-        """Тап по центру элемента как последний фолбэк."""
-        with suppress(WebDriverException):
-            r = el.rect
-            self.driver.execute_script(
-                "mobile: clickGesture",
-                {"x": int(r["x"] + r["width"] / 2), "y": int(r["y"] + r["height"] / 2)}
-            )
+            self.session.invalidate_screen()
             return True
         return False
@@ -1,15 +1,34 @@
 from selenium.webdriver.common.by import By
 from selenium.common.exceptions import TimeoutException
+from core.fingerprint import Fingerprint
+from core.input import Keypad
+from core.locators import Locator
 from screens.base_screen import BaseScreen
 
 class LoginScreen(BaseScreen):
     PHONE_INPUT_ID = "kz.halyk.onlinebank.stage:id/phone_input"
     LOGIN_BUTTON_ID = "kz.halyk.onlinebank.stage:id/login_button"
     CONFIRMATION_CODE_INPUT_ID = "kz.halyk.onlinebank.stage:id/et"
-    ZERO_INT_XPATH = '//android.view.ViewGroup[@resource-id="kz.halyk.onlinebank.stage:id/passcode_fragment_keyboard"]/android.widget.FrameLayout[10]/android.widget.FrameLayout/android.widget.LinearLayout'
     GEO_PERMISSION_ID = "kz.halyk.onlinebank.stage:id/successButtonNext"
     MORE_MENU_ID = "kz.halyk.onlinebank.stage:id/navigation_more"
     ONLINE_DUKEN_TEXT = "Duken"
+    PASSCODE_KEYBOARD_ID = "kz.halyk.onlinebank.stage:id/passcode_fragment_keyboard"
+    # кнопка '0' клавиатуры PIN: UiSelector-цепочкой вместо абсолютного XPath.
+    # У клавиатуры все дети — FrameLayout, поэтому FrameLayout[10] == index(9)
+    ZERO_KEY = Locator(
+        parent=Locator(
+            parent=Locator(id=PASSCODE_KEYBOARD_ID),
+            cls="android.widget.FrameLayout", index=9,
+        ),
+        cls="android.widget.LinearLayout",
+        xpath='//android.view.ViewGroup[@resource-id="kz.halyk.onlinebank.stage:id/passcode_fragment_keyboard"]'
+              '/android.widget.FrameLayout[10]/android.widget.FrameLayout/android.widget.LinearLayout',
+        name="PIN 0",
+        platform="android",
+    )
+
+    # любой из шагов входа: телефон, код из СМС, PIN
+    FINGERPRINT = Fingerprint(any_ids=(PHONE_INPUT_ID, CONFIRMATION_CODE_INPUT_ID, PASSCODE_KEYBOARD_ID))
 
     def phone_enter(self, phone):
         field = self.waits.el_clickable(By.ID, self.PHONE_INPUT_ID)
@@ -24,17 +43,21 @@ class LoginScreen(BaseScreen):
         self.click_element(login)
 
     def confirmation_code_enter(self, code):
-        code_field = self.waits.el_clickable(By.ID, self.CONFIRMATION_CODE_INPUT_ID)
-        if not code_field:
+        try:
+            self.enter_code(self.CONFIRMATION_CODE_INPUT_ID, code)
+        except TimeoutException:
             raise TimeoutException("Поле ввода проверочного кода недоступно")
-        code_field.send_keys(code)
 
     def quik_pin_setup(self):
+        # весь PIN одним W3C actions по координатам клавиш из снимка
+        if Keypad(self.driver, self.PASSCODE_KEYBOARD_ID).enter("0000", timeout=self.timeout):
+            return
+        # запасной путь: кнопка '0' ищется один раз; при перерисовке клавиатуры (stale) — заново
         for _ in range(4):
-            el = self.waits.el_clickable(By.XPATH, self.ZERO_INT_XPATH)
-            if not el:
+            try:
+                self.click_cached(self.ZERO_KEY)
+            except TimeoutException:
                 raise TimeoutException("Кнопка '0' для ввода PIN недоступна")
-            el.click()
 
     def geo_permission(self):
         button = self.waits.el_clickable(By.ID, self.GEO_PERMISSION_ID)
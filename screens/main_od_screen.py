@@ -1,3 +1,4 @@
+from core.fingerprint import Fingerprint
 from screens.base_screen import BaseScreen
 
 class MainOdScreen(BaseScreen):
@@ -7,6 +8,9 @@ class MainOdScreen(BaseScreen):
     ALL_DISTRIBUTORS_TEXT = "Всеgreen-arrow"
     ALL_GOODS_TEXT = "Все товары"
 
+    # выбранная вкладка — якорь не из текста страницы; текст отличает главную от вложенных экранов
+    FINGERPRINT = Fingerprint(tab="Главная", texts=(ALL_ORDERS_BUTTON_TEXT,))
+
     def create_order_button_clik(self):
         button = self.text.find_anywhere(self.CREATE_ORDER_BUTTON_TEXT, timeout=10)
         self.click_element(button)
@@ -0,0 +1,190 @@
+# screens/navigator.py
+"""
+Граф переходов между экранами и переход по кратчайшему пути.
+
+    Navigator(driver).navigate_to(CartScreen)
+
+Текущий экран определяется ScreenDetector; если он уже целевой — ничего не
+делается. После каждого ребра экран определяется заново, поэтому лишние шаги
+пропускаются, а неожиданный экран приводит к перепланированию. Время каждого
+ребра копится в Navigator.edge_stats.
+"""
+from __future__ import annotations
+
+import logging
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple, Type
+
+from components.bottom_nav import BottomNav
+from screens.base_screen import BaseScreen
+from screens.cart_screen import CartScreen
+from screens.catalog_screen import CatalogScreen
+from screens.galery_picker import PickerScreen
+from screens.login_screen import LoginScreen
+from screens.main_od_screen import MainOdScreen
+from screens.payment_screen import PaymentScreen
+from screens.scanner import ScannerScreen
+from screens.screen_detector import ScreenDetector
+from screens.success_screen import SuccessScreen
+
+logger = logging.getLogger(__name__)
+
+Screen = Type[BaseScreen]
+
+
+@dataclass(frozen=True)
+class Edge:
+    source: Optional[Screen]       # None — из любого экрана с нижней панелью (или неизвестного)
+    target: Screen
+    name: str
+    action: Callable[[object], None]
+    settle: float = 5              # сколько ждать, пока target распознается
+
+    def __str__(self) -> str:
+        src = self.source.__name__ if self.source else "*"
+        return f"{src} → {self.target.__name__} ({self.name})"
+
+
+@dataclass
+class EdgeStats:
+    runs: int = 0
+    failures: int = 0
+    total: float = 0.0
+    last: float = 0.0
+
+    @property
+    def avg(self) -> float:
+        return self.total / self.runs if self.runs else 0.0
+
+
+def _tab(name: str) -> Callable[[object], None]:
+    return lambda driver: BottomNav(driver).open(name)
+
+
+def _open_picker(driver) -> None:
+    ScannerScreen(driver).tap_upload_from_gallery()
+
+
+def _pick_first(driver) -> None:
+    picker = PickerScreen(driver)
+    if not picker.select_first_recent():
+        raise AssertionError("Не удалось выбрать изображение в пикере")
+    picker.confirm_if_needed()
+
+
+def _pay(driver) -> None:
+    payment = PaymentScreen(driver)
+    payment.pay_click()
+    payment.confirm_payment()
+
+
+# экраны, на которых видна нижняя панель навигации
+TAB_HOSTS: Tuple[Screen, ...] = (MainOdScreen, CatalogScreen, CartScreen, ScannerScreen)
+TABS: Dict[Screen, str] = {
+    MainOdScreen: "Главная",
+    CatalogScreen: "Каталог",
+    ScannerScreen: "QR",
+    CartScreen: "Корзина",
+}
+
+EDGES: List[Edge] = [
+    Edge(LoginScreen, MainOdScreen, "online_duken", lambda d: LoginScreen(d).online_duken(), settle=15),
+    *(Edge(None, target, f"tab {name}", _tab(name)) for target, name in TABS.items()),
+    Edge(ScannerScreen, PickerScreen, "upload_from_gallery", _open_picker, settle=10),
+    Edge(PickerScreen, PaymentScreen, "pick_first_recent", _pick_first, settle=15),
+    Edge(PaymentScreen, SuccessScreen, "pay", _pay, settle=30),
+]
+
+
+class Navigator:
+    # общая на процесс статистика рёбер: str(edge) → EdgeStats
+    edge_stats: Dict[str, EdgeStats] = {}
+
+    def __init__(self, driver, edges: List[Edge] = EDGES, max_steps: int = 6):
+        self.driver = driver
+        self.edges = edges
+        self.max_steps = max_steps
+        self.detector = ScreenDetector(driver)
+
+    def navigate_to(self, target: Screen, timeout: float = 1) -> BaseScreen:
+        """
+        Перейти на экран target по кратчайшему пути и вернуть его экземпляр.
+        Если target уже открыт — ни одного действия.
+        """
+        start = time.monotonic()
+        steps = 0
+        here = target if self.detector.is_on(target) else self.detector.detect(timeout).screen
+        while here is not target:
+            if steps >= self.max_steps:
+                raise AssertionError(f"Не дошли до {target.__name__} за {steps} шаг(ов), открыт {self.detector.detect_once()}")
+            path = self.plan(here, target)
+            if not path:
+                name = here.__name__ if here else "неизвестный экран"
+                raise AssertionError(f"Нет пути {name} → {target.__name__}")
+            edge = path[0]
+            steps += 1
+            # не дошли до цели ребра — определяем, куда попали, и планируем заново
+            here = edge.target if self._run(edge) else self.detector.detect(timeout).screen
+
+        logger.info(f"navigate_to {target.__name__}: {steps} шаг(ов) за {time.monotonic() - start:.2f}s")
+        return target(self.driver)
+
+    def plan(self, source: Optional[Screen], target: Screen) -> List[Edge]:
+        """Кратчайший по числу рёбер путь (BFS); при равной длине — по среднему времени рёбер."""
+        queue = deque([(source, [])])
+        seen = {source}
+        while queue:
+            node, path = queue.popleft()
+            for edge in sorted(self._outgoing(node), key=lambda e: self._avg(e)):
+                if edge.target in seen:
+                    continue
+                route = path + [edge]
+                if edge.target is target:
+                    return route
+                seen.add(edge.target)
+                queue.append((edge.target, route))
+        return []
+
+    def _outgoing(self, node: Optional[Screen]) -> List[Edge]:
+        out = [e for e in self.edges if e.source is node and node is not None]
+        # вкладки нижней панели доступны с экранов-хостов; с неизвестного экрана — пробуем их же
+        if node is None or node in TAB_HOSTS:
+            out += [e for e in self.edges if e.source is None and e.target is not node]
+        return out
+
+    def _avg(self, edge: Edge) -> float:
+        st = self.edge_stats.get(str(edge))
+        return st.avg if st else 0.0
+
+    def _run(self, edge: Edge) -> bool:
+        """Действие ребра + ожидание его цели; время считается целиком, до распознавания цели."""
+        st = self.edge_stats.setdefault(str(edge), EdgeStats())
+        start = time.monotonic()
+        try:
+            edge.action(self.driver)
+            reached = self.detector.is_on(edge.target, edge.settle)
+        except Exception:
+            st.failures += 1
+            raise
+        finally:
+            st.last = time.monotonic() - start
+        st.runs += 1
+        st.total += st.last
+        if not reached:
+            st.failures += 1
+        logger.info(f"Переход {edge}: {st.last:.2f}s (среднее {st.avg:.2f}s за {st.runs}), цель {'да' if reached else 'нет'}")
+        return reached
+
+    @classmethod
+    def report(cls) -> str:
+        """Рёбра по убыванию среднего времени — кандидаты на оптимизацию."""
+        rows = sorted(cls.edge_stats.items(), key=lambda kv: kv[1].avg, reverse=True)
+        return "\n".join(
+            f"{st.avg:6.2f}s avg  {st.runs:3d} run(s)  {st.failures:2d} fail(s)  {name}" for name, st in rows
+        )
+
+
+def navigate_to(driver, target: Screen, timeout: float = 1) -> BaseScreen:
+    return Navigator(driver).navigate_to(target, timeout)
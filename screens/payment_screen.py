@@ -1,5 +1,5 @@
-
-from screens.base_screen import BaseScreen
+from core.fingerprint import Fingerprint
+from screens.base_screen import BaseScreen, with_settings_profile
 from screens.login_screen import LoginScreen
 
 
@@ -10,6 +10,10 @@ class PaymentScreen(BaseScreen):
     AMOUNT_TEXT = "₸"
     MANAGER_TEXT = "менеджер"
 
+    FINGERPRINT = Fingerprint(texts=(PAY_BUTTON_TEXT, AMOUNT_TEXT))
+    SETTINGS_PROFILE = "animated-webview"
+
+    @with_settings_profile
     def pay_click(self):
         element = self.text.find_anywhere(self.PAY_BUTTON_TEXT, timeout=10)
         if element:
@@ -17,12 +21,12 @@ class PaymentScreen(BaseScreen):
         else:
             raise AssertionError(f"Элемент '{self.PAY_BUTTON_TEXT}' не найден на экране")
 
+    @with_settings_profile
     def verify_amount_displayed(self, amount: str = "1", timeout: int = 5) -> bool:
         """Проверяет, что сумма и символ валюты отображаются на экране"""
-        amount_found = self.text.find_anywhere(amount, timeout=timeout)
-        currency_found = self.text.find_anywhere(self.AMOUNT_TEXT, timeout=timeout)
-        return amount_found is not None and currency_found is not None
+        return bool(self.text.expect_all([amount, self.AMOUNT_TEXT], timeout=timeout))
 
+    @with_settings_profile
     def select_bank_account(self):
         element = self.text.find_anywhere(self.BANK_ACCOUNT_TEXT, timeout=10)
         if element:
@@ -31,5 +35,5 @@ class PaymentScreen(BaseScreen):
             raise AssertionError(f"Элемент '{self.BANK_ACCOUNT_TEXT}' не найден на экране")
 
     def confirm_payment(self):
-        login = LoginScreen(self.driver)
-        login.confirmation_code_enter("123456")
+        # поле кода то же, что при входе; экран входа не создаём
+        self.enter_code(LoginScreen.CONFIRMATION_CODE_INPUT_ID, "123456")
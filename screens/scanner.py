@@ -1,10 +1,13 @@
 from appium.webdriver.common.appiumby import AppiumBy as By
+from core.fingerprint import Fingerprint
 from screens.base_screen import BaseScreen
 
 
 class ScannerScreen(BaseScreen):
     GALLERY_BTN_ID = "kz.halyk.onlinebank.stage:id/gallery"
 
+    FINGERPRINT = Fingerprint(ids=(GALLERY_BTN_ID,))
+
     def tap_upload_from_gallery(self):
         gallery_locator = (By.ID, self.GALLERY_BTN_ID)
         self.click_element(gallery_locator)
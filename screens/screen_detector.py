@@ -0,0 +1,159 @@
+# screens/screen_detector.py
+"""
+Определение текущего экрана по отпечаткам (BaseScreen.FINGERPRINT).
+
+Один снимок иерархии на попытку; innerText webview снимается, только если
+по нативному снимку не подошёл ни один экран, чьи якоря — тексты. Экраны-вкладки
+узнаются по выбранной вкладке нижней панели в том же снимке.
+"""
+from __future__ import annotations
+
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, Optional, Type
+
+from selenium.common.exceptions import WebDriverException
+
+from core.contexts import NATIVE
+from core.polling import Poller
+from core.session import DeviceSession
+from core.ui_snapshot import UiSnapshot
+from components.bottom_nav import BottomNav
+from screens.base_screen import BaseScreen
+from screens.cart_screen import CartScreen
+from screens.catalog_screen import CatalogScreen
+from screens.galery_picker import PickerScreen
+from screens.login_screen import LoginScreen
+from screens.main_od_screen import MainOdScreen
+from screens.payment_screen import PaymentScreen
+from screens.scanner import ScannerScreen
+from screens.success_screen import SuccessScreen
+
+logger = logging.getLogger(__name__)
+
+SCREENS = (
+    LoginScreen,
+    MainOdScreen,
+    CatalogScreen,
+    CartScreen,
+    ScannerScreen,
+    PaymentScreen,
+    SuccessScreen,
+    PickerScreen,
+)
+
+
+@dataclass
+class Detection:
+    screen: Optional[Type[BaseScreen]]
+    score: int = 0
+    scores: Dict[str, int] = field(default_factory=dict)   # имя экрана → очки (только подошедшие)
+    package: str = ""
+    elapsed: float = 0.0
+
+    def __bool__(self) -> bool:
+        return self.screen is not None
+
+    @property
+    def name(self) -> str:
+        return self.screen.__name__ if self.screen else "неизвестный экран"
+
+    def __str__(self) -> str:
+        return f"{self.name} (пакет {self.package or '?'}, {self.elapsed:.2f}s)"
+
+
+class ScreenDetector:
+    def __init__(self, driver, screens: Iterable[Type[BaseScreen]] = SCREENS):
+        self.driver = driver
+        self.session = DeviceSession.of(driver)
+        self.screens = [s for s in screens if s.FINGERPRINT]
+
+    def detect(self, timeout: float = 0) -> Detection:
+        """
+        Классифицировать текущий экран. timeout > 0 — опрашивать, пока экран
+        не распознается (например, сразу после перехода).
+        """
+        poller = Poller(timeout)
+        detection = Detection(None)
+        for _ in poller:
+            detection = self.detect_once()
+            if detection:
+                break
+        poller.stats(bool(detection), f"detect → {detection.name}")
+        return detection
+
+    def detect_once(self, snap: UiSnapshot | None = None) -> Detection:
+        start = time.monotonic()
+        if snap is None:
+            try:
+                with self.session.contexts.within(NATIVE):
+                    snap = UiSnapshot.capture(self.driver)
+            except WebDriverException as e:
+                logger.debug(f"Снимок для определения экрана недоступен: {e}")
+                return Detection(None, elapsed=time.monotonic() - start)
+        self.session.note_package(snap.package)
+
+        package = snap.package or self.session.current_package()
+        activity = ""
+        if any(s.FINGERPRINT.needs_activity for s in self.screens):
+            activity = self.session.current_activity()
+
+        tab = self._selected_tab(snap) if any(s.FINGERPRINT.needs_tab for s in self.screens) else None
+
+        scores = self._score(snap, "", package, activity, tab)
+        if not scores and any(s.FINGERPRINT.needs_text for s in self.screens):
+            web_text = self._webview_text()
+            if web_text:
+                scores = self._score(snap, web_text, package, activity, tab)
+
+        best = max(scores, key=scores.get, default=None)
+        screen = next((s for s in self.screens if s.__name__ == best), None)
+        detection = Detection(screen, scores.get(best, 0), scores, package, time.monotonic() - start)
+        logger.debug(f"Экран: {detection} {scores}")
+        return detection
+
+    def is_on(self, screen: Type[BaseScreen], timeout: float = 0) -> bool:
+        """Подходит ли отпечаток конкретного экрана (не обязательно лучший)."""
+        fp = screen.FINGERPRINT
+        if fp is None:
+            raise ValueError(f"У экрана {screen.__name__} нет FINGERPRINT")
+        poller = Poller(timeout)
+        for _ in poller:
+            try:
+                with self.session.contexts.within(NATIVE):
+                    snap = UiSnapshot.capture(self.driver)
+            except WebDriverException:
+                continue
+            self.session.note_package(snap.package)
+            package = snap.package or self.session.current_package()
+            activity = self.session.current_activity() if fp.needs_activity else ""
+            tab = self._selected_tab(snap) if fp.needs_tab else None
+            if fp.score(snap, "", package, activity, tab):
+                return True
+            if fp.needs_text and fp.score(snap, self._webview_text(), package, activity, tab):
+                return True
+        return False
+
+    def _selected_tab(self, snap: UiSnapshot) -> Optional[str]:
+        return BottomNav.selected_in(snap, self.session.window_size().get("height", 0))
+
+    def _score(self, snap: UiSnapshot, web_text: str, package: str, activity: str,
+               tab: Optional[str] = None) -> Dict[str, int]:
+        scores = {}
+        for s in self.screens:
+            score = s.FINGERPRINT.score(snap, web_text, package, activity, tab)
+            if score:
+                scores[s.__name__] = score
+        return scores
+
+    def _webview_text(self) -> str:
+        """innerText всех webview одной строкой, в нижнем регистре."""
+        parts = []
+        for ctx in self.session.contexts.webviews():
+            try:
+                with self.session.contexts.within(ctx):
+                    parts.append(self.driver.execute_script("return document.body?.innerText || '';") or "")
+            except WebDriverException:
+                continue
+        return "\n".join(parts).casefold()
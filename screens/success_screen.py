@@ -1,6 +1,6 @@
 from selenium.webdriver.common.by import By
-from screens.base_screen import BaseScreen
-import time
+from core.fingerprint import Fingerprint
+from screens.base_screen import BaseScreen, with_settings_profile
 
 class SuccessScreen(BaseScreen):
     SUCCESS_TEXT = "Оплата прошла успешно"
@@ -10,17 +10,16 @@ class SuccessScreen(BaseScreen):
     BACK_TO_ORDERS_BUTTON_TEXT = "Перейти к Заказам"
     PAYMENT_PROCESSING_TEXT = "Платеж в обработке"
 
-    def payment_processing_wait(self, timeout: int = 15) -> None:
-        end = time.monotonic() + timeout
-        # Опционально: подождать, чтобы спиннер успел появиться
-        self.text.present_anywhere(self.PAYMENT_PROCESSING_TEXT, timeout=1)
-
-        while time.monotonic() < end:
-            if not self.text.present_anywhere(self.PAYMENT_PROCESSING_TEXT, timeout=1):
-                return
-            time.sleep(0.3)
+    FINGERPRINT = Fingerprint(any_texts=(SUCCESS_TEXT, PAYMENT_PROCESSING_TEXT, INVOISE_TEXT))
+    # пока крутится спиннер, idle не наступает
+    SETTINGS_PROFILE = "payment-processing"
 
-        raise AssertionError(f"«{self.PAYMENT_PROCESSING_TEXT}» не исчез за {timeout} c")
+    @with_settings_profile
+    def payment_processing_wait(self, timeout: int = 15) -> None:
+        # до секунды даём спиннеру появиться, дальше ждём первый кадр без него
+        result = self.text.wait_gone(self.PAYMENT_PROCESSING_TEXT, timeout=timeout, appear_timeout=1)
+        if not result:
+            raise AssertionError(f"«{self.PAYMENT_PROCESSING_TEXT}» не исчез за {timeout} c")
 
     def back_to_orders_button_clik(self):
         button = self.text.find_anywhere(self.BACK_TO_ORDERS_BUTTON_TEXT, timeout=10)
@@ -37,3 +36,11 @@ class SuccessScreen(BaseScreen):
 
     def feedback_text_check(self):
         assert self.text.find_anywhere(self.FEEDBACK_TEXT, timeout=10)
+
+    def success_screen_check(self, timeout: int = 60) -> None:
+        """Все блоки экрана успеха за один проход вместо четырёх отдельных ожиданий."""
+        result = self.text.expect_all(
+            [self.SUCCESS_TEXT, self.INVOISE_TEXT, self.BONUS_BOCK_TEXT, self.FEEDBACK_TEXT],
+            timeout=timeout,
+        )
+        assert result, f"На экране успеха не найдены: {result.missing}"
@@ -0,0 +1,25 @@
+"""
+Отчёт по локаторам экранов: во что компилируется каждый и какие ещё требуют XPath.
+
+    python scripts/locator_report.py            # оценка стоимости без устройства
+    python scripts/locator_report.py android    # только одна платформа
+"""
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from components.bottom_nav import BottomNav  # noqa: E402
+from core.locators import format_report, locator_report  # noqa: E402
+from screens.screen_detector import SCREENS  # noqa: E402
+
+
+def main(argv):
+    platforms = tuple(argv) or ("android", "ios")
+    rows = locator_report((*SCREENS, BottomNav), platforms=platforms)
+    print(format_report(rows))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,50 @@
+"""
+Пропускная способность генерации QR: изображений в секунду по способам рендера.
+
+    python scripts/qr_benchmark.py                 # 500 счетов megapolis
+    python scripts/qr_benchmark.py 2000 universal  # число и kind
+"""
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from core.qr_generator import QrGenerator, render_png_pil  # noqa: E402
+
+
+def _overrides(kind: str, n: int):
+    field = "contract" if kind == "megapolis" else "invoiceId"
+    return [{field: str(100000 + i)} for i in range(n)]
+
+
+def _measure(name: str, n: int, fn) -> None:
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    print(f"{name:24} {n:6d} шт  {elapsed:7.2f}s  {n / elapsed:8.0f} шт/с")
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description="Пропускная способность генерации QR.")
+    parser.add_argument("count", nargs="?", type=int, default=500, help="число счетов (по умолчанию 500)")
+    parser.add_argument("kind", nargs="?", default="megapolis", choices=("megapolis", "universal"))
+    args = parser.parse_args(argv)
+    n, kind = args.count, args.kind
+    gen = QrGenerator()
+    overrides = _overrides(kind, n)
+    urls = [gen.build_url(kind, **o)["url"] for o in overrides]
+    workers = os.cpu_count() or 1
+
+    # без кэша: меряем рендер, а не попадания
+    _measure("qrcode + PIL", n, lambda: [render_png_pil(u) for u in urls])
+    _measure("numpy", n, lambda: gen.batch(kind, overrides, use_cache=False))
+    if workers > 1:
+        _measure(f"numpy + {workers} процесс(ов)", n, lambda: gen.batch(kind, overrides, workers=workers, use_cache=False))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
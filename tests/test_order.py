@@ -1,17 +1,16 @@
 import allure
 
-from components.bottom_nav import BottomNav
 from screens.catalog_screen import CatalogScreen
 from screens.cart_screen import CartScreen
+from screens.navigator import navigate_to
 
 
 def test_add_to_cart(login, driver):
     catalog = CatalogScreen(driver)
     cart = CartScreen(driver)
-    nav = BottomNav(driver)
 
     with allure.step("Переход в каталог"):
-        nav.open("Каталог")
+        navigate_to(driver, CatalogScreen)
 
     with allure.step("Переход в католог дистра"):
         catalog.enter_to_distr_catalog()
@@ -24,7 +23,7 @@ def test_add_to_cart(login, driver):
         catalog.add_to_cart_button_clik()
 
     with allure.step("Переход в Корзину"):
-        nav.open("Корзина")
+        navigate_to(driver, CartScreen)
 
     with allure.step("Проверка корзины"):
         cart.verify_amount_displayed()
@@ -10,9 +10,10 @@ from screens.success_screen import SuccessScreen
 
 @pytest.mark.parametrize("kind", [
     pytest.param("megapolis",  id="mega"),
-    pytest.param("universal",  id="univ", marks=pytest.mark.delayed(seconds=5)),
+    pytest.param("universal",  id="univ"),
 ])
-def test_scan_qr_from_gallery(login, driver, clean_gallery_before_test, qr_png_on_device, kind):
+def test_scan_qr_from_gallery(seeded_qr, login, driver, kind):
+    # seeded_qr до login: альбом QR загружается в фоне, пока выполняется логин (раз за сессию)
 
     nav = BottomNav(driver)
     payments = PaymentScreen(driver)
@@ -25,9 +26,11 @@ def test_scan_qr_from_gallery(login, driver, clean_gallery_before_test, qr_png_o
         nav.find_tab_by_text("Qr")
 
     with allure.step("Загрузить QR из галереи"):
+        # QR всех случаев уже в альбоме — выбираем свой по имени или позиции
+        qr = seeded_qr.result()
         scanner.tap_upload_from_gallery()
         assert picker.wait_loaded(), "Пикер не открылся"
-        assert picker.select_first_recent(), "Не удалось выбрать изображение"
+        assert picker.select_image(name=qr.name, index=qr.index), "Не удалось выбрать изображение"
         picker.confirm_if_needed()
 
 
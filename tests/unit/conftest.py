@@ -0,0 +1,9 @@
+# tests/unit/conftest.py
+"""Модульные тесты без устройства: проверка Appium из корневого conftest не нужна."""
+import pytest
+
+
+@pytest.fixture(scope="session", autouse=True)
+def check_environment():
+    """Перекрывает корневую фикстуру: Appium для модульных тестов не требуется."""
+    return None
@@ -0,0 +1,36 @@
+# tests/unit/test_device_shell.py
+import shutil
+import subprocess
+
+import pytest
+
+from core.device_shell import DeviceShell, _mobile_shell
+
+pytestmark = pytest.mark.skipif(not shutil.which("sh"), reason="нужен sh")
+
+
+class AdbLikeDriver:
+    """mobile: shell как в Appium: аргументы уходят в adb и склеиваются через пробел."""
+
+    def execute_script(self, name, params):
+        line = " ".join([params["command"], *params["args"]])
+        return subprocess.run(["sh", "-c", line], capture_output=True, text=True).stdout
+
+
+def test_batch_through_adb_like_runner():
+    shell = DeviceShell(_mobile_shell(AdbLikeDriver()))
+    shell.add("echo first").add("echo 'two words'; exit 3").add('echo "$((1 + 1))"')
+    first, second, third = shell.run()
+    assert (first.code, first.output) == (0, "first")
+    assert (second.code, second.output) == (3, "two words")
+    assert (third.code, third.output) == (0, "2")
+
+
+def test_parse_missing_marker():
+    token = "ODtest"
+    commands = ["true", "false"]
+    raw = subprocess.run(["sh", "-c", DeviceShell._script(token, commands[:1])],
+                         capture_output=True, text=True).stdout
+    ok, lost = DeviceShell._parse(token, commands, raw)
+    assert ok.ok
+    assert lost.code is None and not lost.ok
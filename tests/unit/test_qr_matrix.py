@@ -0,0 +1,40 @@
+# tests/unit/test_qr_matrix.py
+import io
+import random
+import string
+
+import numpy as np
+import pytest
+import qrcode
+from PIL import Image
+from qrcode.constants import ERROR_CORRECT_M
+
+from core.qr_generator import BORDER, module_matrix, render_png, render_png_pil
+
+
+def _payload(length: int, seed: int) -> str:
+    rnd = random.Random(seed)
+    alphabet = string.ascii_letters + string.digits + "/?=&%.-_:"
+    return "https://pay.example/" + "".join(rnd.choice(alphabet) for _ in range(length))
+
+
+def _reference(url: str) -> np.ndarray:
+    qr = qrcode.QRCode(error_correction=ERROR_CORRECT_M, border=BORDER)
+    qr.add_data(url)
+    qr.make(fit=True)
+    return np.array(qr.get_matrix(), dtype=bool)
+
+
+# длины подобраны под разные версии: 2–3, ~7 (выравнивающие узоры), 10+ (блок версии)
+@pytest.mark.parametrize("length", [5, 60, 150, 300])
+@pytest.mark.parametrize("seed", [1, 2, 3])
+def test_module_matrix_matches_qrcode(length, seed):
+    url = _payload(length, seed)
+    assert np.array_equal(module_matrix(url), _reference(url))
+
+
+def test_render_png_matches_stock_renderer():
+    url = _payload(120, 7)
+    ours = np.array(Image.open(io.BytesIO(render_png(url))).convert("1"))
+    stock = np.array(Image.open(io.BytesIO(render_png_pil(url))).convert("1"))
+    assert np.array_equal(ours, stock)
@@ -0,0 +1,32 @@
+# tests/unit/test_strategy_cache.py
+from core.strategy_cache import StrategyCache
+
+KEY_A = "android|1.0|Каталог|Оплатить"
+KEY_B = "android|1.0|Корзина|Оформить"
+
+
+def test_flush_merges_entries_of_two_writers(tmp_path):
+    path = tmp_path / "locator_cache.json"
+    # оба экземпляра прочитали пустой файл — как два воркера xdist на старте
+    first, second = StrategyCache(path), StrategyCache(path)
+
+    first.record(KEY_A, "text", 0.1)
+    second.record(KEY_B, "content-desc", 0.2)
+
+    entries = StrategyCache(path)
+    assert entries.get(KEY_A)["strategy"] == "text"
+    assert entries.get(KEY_B)["strategy"] == "content-desc"
+    # после записи второму виден и победитель первого
+    assert second.get(KEY_A)["strategy"] == "text"
+
+
+def test_flush_drops_entries_of_other_build(tmp_path):
+    path = tmp_path / "locator_cache.json"
+    old = StrategyCache(path)
+    old.record(KEY_A, "text", 0.1)
+
+    cache = StrategyCache(path)
+    assert cache.evict_build("android", "2.0") == 1
+    cache.record("android|2.0|Каталог|Оплатить", "xpath", 0.3)
+
+    assert StrategyCache(path).get(KEY_A) is None